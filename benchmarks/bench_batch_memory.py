@@ -0,0 +1,137 @@
+"""Batch memory benchmark: peak traced memory must not grow with the batch size.
+
+Writes one distinct resume file per pair (DOCX resumes carry a 1 MB
+incompressible photo, PDFs are multi-page text), replaces the OpenAI API
+with the in-process stub from bench_pipeline and runs run_batch on batches
+of increasing size under tracemalloc. With a fixed number of workers only
+that many jobs are in flight at once, so the peak per in-flight job should
+stay at what a single job needs on its own; it fails if any batch exceeds
+that by more than --tolerance.
+Run from the repository root:
+
+    python benchmarks/bench_batch_memory.py
+    python benchmarks/bench_batch_memory.py --jobs 4 32 128 --workers 2
+"""
+import gc
+import os
+import sys
+import zlib
+import shutil
+import struct
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resume_optimizer
+from bench_pipeline import build_docx, build_pdf, make_engine, stub_completion
+
+
+def noise_png(side):
+    """An RGB PNG of random pixels; random data keeps it about 3 * side**2 bytes."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    rows = b"".join(b"\x00" + os.urandom(side * 3) for _ in range(side))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows, 1))
+        + chunk(b"IEND", b"")
+    )
+
+
+def build_templates(directory, pages):
+    """Write one PDF and one DOCX (with a photo) resume; returns their paths."""
+    import docx
+
+    pdf_path = os.path.join(directory, "template.pdf")
+    build_pdf(pdf_path, pages)
+
+    docx_path = os.path.join(directory, "template.docx")
+    build_docx(docx_path, pages)
+    photo_path = os.path.join(directory, "photo.png")
+    with open(photo_path, "wb") as f:
+        f.write(noise_png(600))
+    document = docx.Document(docx_path)
+    document.add_picture(photo_path)
+    document.save(docx_path)
+    return [pdf_path, docx_path]
+
+
+def make_jobs(directory, templates, count):
+    """Copy the templates into count distinct resume files, one job each."""
+    jobs = []
+    for index in range(count):
+        template = templates[index % len(templates)]
+        resume_path = os.path.join(directory, f"resume_{index}{os.path.splitext(template)[1]}")
+        shutil.copyfile(template, resume_path)
+        jobs.append(resume_optimizer.BatchJob(
+            name=f"job{index}",
+            resume_path=resume_path,
+            job_text=f"Senior platform engineer {index}: Python, Kubernetes, Kafka, Terraform and AWS.",
+            output_format="txt"
+        ))
+    return jobs
+
+
+def measure_batch(directory, templates, count, workers):
+    """Run a batch of count pairs; returns (peak, retained) traced bytes."""
+    batch_dir = tempfile.mkdtemp(prefix=f"batch_{count}_", dir=directory)
+    jobs = make_jobs(batch_dir, templates, count)
+    engine = make_engine()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        summaries = resume_optimizer.run_batch(
+            jobs, os.path.join(batch_dir, "out"), max_workers=workers, engine=engine, log=lambda message: None
+        )
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    failed = [summary["name"] for summary in summaries if summary["status"] != "ok"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} jobs failed, e.g. {failed[0]}")
+    return peak - baseline, current - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[4, 16, 64], help="Batch sizes to run")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=10, help="Pages per resume")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed peak per in-flight job over a single job's peak (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    resume_optimizer.openai.chat.completions.create = stub_completion
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        templates = build_templates(temp_dir, args.pages)
+        sizes = ", ".join(f"{os.path.basename(path)} {os.path.getsize(path) // 1024} KB" for path in templates)
+        print(f"Resumes: {sizes}; {args.workers} workers")
+        # Imports, lazy caches and the render processes are set up by a first batch, not measured
+        measure_batch(temp_dir, templates, args.workers, args.workers)
+        single = max(measure_batch(temp_dir, [template], 1, 1)[0] for template in templates)
+        print(f"    1 job:  peak {single / 1024 / 1024:7.2f} MB (largest resume on its own)")
+
+        failed = False
+        for count in sorted(args.jobs):
+            peak, retained = measure_batch(temp_dir, templates, count, args.workers)
+            per_job = peak / min(count, args.workers)
+            print(
+                f"{count:5d} jobs: peak {peak / 1024 / 1024:7.2f} MB, "
+                f"{per_job / 1024:8.1f} KB per in-flight job, retained {retained / 1024:8.1f} KB"
+            )
+            if per_job > single * (1 + args.tolerance):
+                failed = True
+
+    if failed:
+        print(f"FAIL: peak memory per in-flight job grew more than {args.tolerance:.0%} over a single job's")
+        return 1
+    print("OK: peak memory per job stays flat as the batch grows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
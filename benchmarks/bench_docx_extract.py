@@ -0,0 +1,153 @@
+"""DOCX extraction benchmark: previous per-paragraph extractor vs the single-pass one.
+
+Generates large multi-table resumes with python-docx (bullets, bold/italic
+runs, metrics, merged cells), then times both extractors on the same files.
+Run from the repository root:
+
+    python benchmarks/bench_docx_extract.py
+    python benchmarks/bench_docx_extract.py --paragraphs 4000 --tables 80
+"""
+import io
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import docx
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+import resume_optimizer
+
+
+def build_docx(paragraphs, tables, rows, cols):
+    """Build a synthetic resume and return its bytes."""
+    doc = docx.Document()
+    for index in range(paragraphs):
+        if index % 25 == 0:
+            doc.add_heading(f"SECTION {index // 25}", level=1)
+        para = doc.add_paragraph(style="List Bullet" if index % 3 else None)
+        if index % 7 == 0:
+            para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = para.add_run(f"Company {index} ")
+        run.bold = True
+        run = para.add_run("led a team of 12 engineers, ")
+        run.italic = index % 2 == 0
+        para.add_run(f"grew revenue by {index % 90 + 5}% and cut costs 15 percent")
+    for table_index in range(tables):
+        table = doc.add_table(rows=rows, cols=cols)
+        for r in range(rows):
+            for c in range(cols):
+                table.cell(r, c).text = f"Skill {table_index}-{r}-{c} improved 30 pct"
+        # Horizontal and vertical merges produce cells python-docx repeats in row.cells
+        table.cell(0, 0).merge(table.cell(0, cols - 1))
+        table.cell(1, 0).merge(table.cell(rows - 1, 0))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def legacy_extract(docx_file):
+    """The extractor as it was before the single-pass rewrite (string concatenation,
+    per-paragraph pattern creation, repeated replace, row.cells)."""
+    text = ""
+    formatted_text = ""
+    doc = docx.Document(docx_file)
+    for para in doc.paragraphs:
+        if not para.text.strip():
+            formatted_text += "\n"
+            text += "\n"
+            continue
+        alignment_tag_start = ""
+        alignment_tag_end = ""
+        if para.alignment == WD_ALIGN_PARAGRAPH.CENTER:
+            alignment_tag_start = "<center>"
+            alignment_tag_end = "</center>"
+        elif para.alignment == WD_ALIGN_PARAGRAPH.RIGHT:
+            alignment_tag_start = "<right>"
+            alignment_tag_end = "</right>"
+        if para.style.name.startswith('Heading'):
+            formatted_text += f"{alignment_tag_start}**{para.text}**{alignment_tag_end}\n"
+            text += para.text + "\n"
+            continue
+        para_text = ""
+        formatted_para = ""
+        bullet_prefix = "• " if para.style.name.startswith('List') else ""
+        for run in para.runs:
+            run_text = run.text
+            if run.bold and run.italic:
+                formatted_para += f"**_{run_text}_**"
+            elif run.bold:
+                formatted_para += f"**{run_text}**"
+            elif run.italic:
+                formatted_para += f"_{run_text}_"
+            else:
+                formatted_para += run_text
+            para_text += run_text
+        metrics_pattern = r'\b(\d+%|\$\d+(?:,\d+)*(?:\.\d+)?|\d+\s*%|\d+\s*(?:percent|pct))\b'
+        metrics = re.findall(metrics_pattern, para_text, re.IGNORECASE)
+        for metric in metrics:
+            if metric in formatted_para and f"**[{metric}]**" not in formatted_para:
+                formatted_para = formatted_para.replace(metric, f"**[{metric}]**")
+        if bullet_prefix:
+            formatted_para = bullet_prefix + formatted_para
+        formatted_text += f"{alignment_tag_start}{formatted_para}{alignment_tag_end}\n"
+        text += bullet_prefix + para_text + "\n"
+    for table in doc.tables:
+        formatted_text += "<table>\n"
+        for row in table.rows:
+            row_text = ""
+            formatted_row = ""
+            for cell in row.cells:
+                cell_text = cell.text.strip()
+                row_text += cell_text + "\t"
+                cell_formatted = cell_text
+                metrics_pattern = r'\b(\d+%|\$\d+(?:,\d+)*(?:\.\d+)?|\d+\s*%|\d+\s*(?:percent|pct))\b'
+                for metric in re.findall(metrics_pattern, cell_text, re.IGNORECASE):
+                    cell_formatted = cell_formatted.replace(metric, f"**[{metric}]**")
+                formatted_row += cell_formatted + "\t"
+            text += row_text + "\n"
+            formatted_text += formatted_row + "\n"
+        formatted_text += "</table>\n"
+        text += "\n"
+    return text, formatted_text
+
+
+def time_call(func, content, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(io.BytesIO(content))
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--tables", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--cols", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = resume_optimizer.ResumeOptimizerEngine()
+    for scale in (0.25, 1.0):
+        content = build_docx(
+            int(args.paragraphs * scale), int(args.tables * scale), args.rows, args.cols
+        )
+        legacy = time_call(legacy_extract, content, args.repeat)
+        current = time_call(engine._parse_docx, content, args.repeat)
+        print(
+            f"{int(args.paragraphs * scale):5d} paragraphs, {int(args.tables * scale):3d} tables "
+            f"({len(content) // 1024} KB): legacy {legacy * 1000:8.1f} ms, "
+            f"single-pass {current * 1000:8.1f} ms, speedup {legacy / current:4.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
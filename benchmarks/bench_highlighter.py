@@ -0,0 +1,130 @@
+"""Analysis Report highlighter benchmark: previous relative-index tagger vs ReportHighlighter.
+
+Builds synthetic reports with thousands of lines (numbered headings,
+"Label:" subheadings, bullets and prose), loads them into a Tk Text widget
+and times the legacy highlighter, a full ReportHighlighter pass and a
+streamed pass that feeds the report in small chunks. Needs a display; it
+prints a notice and exits cleanly without one. Run from the repository root:
+
+    python benchmarks/bench_highlighter.py
+    python benchmarks/bench_highlighter.py --lines 2000 10000 --legacy-max-lines 5000
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk
+
+import resume_optimizer
+
+
+def build_report(lines):
+    """Return a report with the given number of lines."""
+    out = []
+    for index in range(lines):
+        kind = index % 10
+        if kind == 0:
+            out.append(f"{index // 10 + 1}. Section {index // 10} Findings")
+        elif kind == 1:
+            out.append("Strengths:")
+        elif kind in (2, 3, 4):
+            out.append(f"• Matched keyword python-{index} with strong evidence of impact")
+        elif kind == 5:
+            out.append(f"  - Missing keyword kubernetes-{index}")
+        elif kind == 6:
+            out.append("")
+        else:
+            out.append(f"Line {index}: the resume mentions relevant experience but could quantify results more.")
+    return "\n".join(out)
+
+
+def legacy_highlight(text_widget):
+    """The highlighter as it was before ReportHighlighter (delete and reinsert,
+    indices built as ever-growing "+Nc" expressions)."""
+    content = text_widget.get("1.0", tk.END)
+    text_widget.delete("1.0", tk.END)
+    text_widget.insert(tk.END, content)
+    lines = content.split('\n')
+    pos = "1.0"
+    for line in lines:
+        line_end = f"{pos}+{len(line)}c"
+        if re.match(r'^\d+\.\s+\w+', line.strip()):
+            text_widget.tag_add("heading", pos, line_end)
+        if line.strip().endswith(':'):
+            text_widget.tag_add("subheading", pos, line_end)
+        if line.strip().startswith('•') or line.strip().startswith('-'):
+            text_widget.tag_add("bullet", pos, f"{pos}+1c")
+        pos = f"{line_end}+1c"
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 3000, 10000])
+    parser.add_argument("--legacy-max-lines", type=int, default=3000,
+                        help="Skip the quadratic legacy highlighter above this size")
+    parser.add_argument("--chunk-size", type=int, default=40, help="Characters per streamed chunk")
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipped: no display available ({e})")
+        return 0
+    root.withdraw()
+    widget = tk.Text(root)
+
+    for lines in args.lines:
+        report = build_report(lines)
+
+        def load():
+            widget.delete("1.0", tk.END)
+            for tag in resume_optimizer.ReportHighlighter.TAG_STYLES:
+                widget.tag_remove(tag, "1.0", tk.END)
+            widget.insert("1.0", report)
+
+        highlighter = resume_optimizer.ReportHighlighter(widget)
+        load()
+        full = timed(highlighter.highlight_all)
+        tagged = len(widget.tag_ranges("bullet"))
+
+        def stream():
+            widget.delete("1.0", tk.END)
+            highlighter.reset()
+            for start in range(0, len(report), args.chunk_size):
+                chunk = report[start:start + args.chunk_size]
+                widget.insert(tk.END, chunk)
+                highlighter.feed(chunk)
+            highlighter.finish()
+        streamed = timed(stream)
+        if len(widget.tag_ranges("bullet")) != tagged:
+            print("FAIL: streamed tagging differs from a full pass")
+            return 1
+
+        if lines <= args.legacy_max_lines:
+            load()
+            legacy = timed(lambda: legacy_highlight(widget))
+            legacy_text = f"legacy {legacy * 1000:9.1f} ms, "
+            speedup = f", speedup {legacy / full:5.1f}x"
+        else:
+            legacy_text = "legacy   skipped, "
+            speedup = ""
+        print(
+            f"{lines:6d} lines: {legacy_text}full pass {full * 1000:7.1f} ms, "
+            f"streamed (insert + tag) {streamed * 1000:7.1f} ms{speedup}"
+        )
+    root.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Job description extraction benchmark: previous BeautifulSoup extractor vs the single-pass one.
+
+Runs every saved page in benchmarks/job_pages through each extractor and
+reports the median time and extraction quality: the share of expected
+phrases found, and the share of page chrome (menus, related jobs, cookie
+banners) that leaked into the result, as listed in job_pages/expected.json.
+Pages can be inflated with --scale (nested wrappers and extra related-job
+cards) to show how each extractor grows on heavy job-board pages.
+Run from the repository root:
+
+    python benchmarks/bench_job_extract.py
+    python benchmarks/bench_job_extract.py --scale 8
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resume_optimizer
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "job_pages")
+
+
+def legacy_extract(html):
+    """The extractor as it was before the single-pass rewrite (broad CSS
+    selector, get_text() on every matched container)."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    job_containers = soup.select('.job-description, .description, .content, [class*="job"], [class*="description"], [id*="job"], [id*="description"]')
+    if job_containers:
+        largest_container = max(job_containers, key=lambda x: len(x.get_text()))
+        job_description = largest_container.get_text(strip=True, separator='\n')
+    else:
+        job_description = soup.body.get_text(strip=True, separator='\n')
+    return ' '.join(job_description.split())
+
+
+def inflate(html, scale):
+    """Wrap the body in nested job-ish containers and append related-job cards."""
+    if scale <= 1:
+        return html
+    depth = 4 * scale
+    cards = "".join(
+        f'<div class="related-job job-card"><div class="job-title"><a href="/job/{i}">Related job {i}</a></div>'
+        f'<div class="job-snippet">Experience with Python and cloud platforms required.</div></div>'
+        for i in range(150 * scale)
+    )
+    opened = '<div class="job-wrapper">' * depth
+    closed = '</div>' * depth
+    html = re.sub(r'<body([^>]*)>', lambda m: f'<body{m.group(1)}>{opened}', html, count=1)
+    return html.replace('</body>', f'{closed}<div class="similar-jobs">{cards}</div></body>', 1)
+
+
+def quality(text, expected):
+    """Return (recall of expected phrases, leaked chrome phrases) for one page."""
+    normalized = " ".join(text.split())
+    found = sum(1 for phrase in expected["include"] if phrase in normalized)
+    leaked = sum(1 for phrase in expected["exclude"] if phrase in normalized)
+    return found / len(expected["include"]), leaked / len(expected["exclude"])
+
+
+def time_call(func, html, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(html)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="Inflate every page by this factor")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(os.path.join(PAGES_DIR, "expected.json"), "r", encoding="utf-8") as f:
+        expected = json.load(f)
+
+    extractors = {"legacy (bs4)": legacy_extract}
+    extractors["single-pass (html.parser)"] = lambda html: resume_optimizer.extract_main_text(html, parser="html.parser")
+    if resume_optimizer._lxml_etree() is not None:
+        extractors["single-pass (lxml)"] = lambda html: resume_optimizer.extract_main_text(html, parser="lxml")
+
+    totals = {name: [0.0, 0.0, 0.0] for name in extractors}
+    for page in sorted(expected):
+        with open(os.path.join(PAGES_DIR, page), "r", encoding="utf-8") as f:
+            html = inflate(f.read(), args.scale)
+        print(f"{page} ({len(html) // 1024} KB)")
+        for name, func in extractors.items():
+            elapsed, text = time_call(func, html, args.repeat)
+            recall, leakage = quality(text, expected[page])
+            totals[name][0] += elapsed
+            totals[name][1] += recall
+            totals[name][2] += leakage
+            print(f"  {name:27s} {elapsed * 1000:8.2f} ms  recall {recall:4.0%}  leakage {leakage:4.0%}")
+
+    print("Total")
+    for name, (elapsed, recall, leakage) in totals.items():
+        print(
+            f"  {name:27s} {elapsed * 1000:8.2f} ms  recall {recall / len(expected):4.0%}  "
+            f"leakage {leakage / len(expected):4.0%}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
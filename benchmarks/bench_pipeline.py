@@ -0,0 +1,279 @@
+"""End-to-end stage benchmark on a synthetic corpus with an offline LLM stub.
+
+Generates resumes of 1 to 30 pages as PDF (reportlab) and DOCX (python-docx)
+with headings, bullets and tables, serves the saved pages in
+benchmarks/job_pages from a local HTTP server, and replaces the OpenAI API
+with a deterministic in-process stub (no network, no API key). Every stage
+is then timed: PDF/DOCX extraction, job description fetch + extraction,
+optimize + analyze against the stub, and the txt/docx/pdf writers.
+
+For each case it reports the median wall time, peak traced memory
+(tracemalloc, measured in a separate run) and throughput, and compares them
+with pipeline_baseline.json. A case fails when it exceeds the baseline by
+both the relative tolerance and an absolute slack, so cases that take a
+few milliseconds are not failed by timer noise. Run from the repository
+root:
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --pages 1 5 --repeat 5
+    python benchmarks/bench_pipeline.py --update-baseline
+"""
+import io
+import os
+import sys
+import json
+import time
+import types
+import argparse
+import tempfile
+import functools
+import threading
+import statistics
+import tracemalloc
+import http.server
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import resume_optimizer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGES_DIR = os.path.join(BENCH_DIR, "job_pages")
+BASELINE_FILE = os.path.join(BENCH_DIR, "pipeline_baseline.json")
+# Smallest regression over the baseline that can fail a case, per metric
+ABSOLUTE_SLACK = {"ms": 5.0, "peak_kb": 64.0}
+
+SKILLS = ["Python", "Kubernetes", "PostgreSQL", "AWS", "Terraform", "React", "Kafka", "Go", "Airflow", "Spark"]
+
+
+def page_sections(page):
+    """Deterministic content for one resume page: (heading, bullets, table rows)."""
+    heading = f"EXPERIENCE {page + 1}" if page else "PROFESSIONAL SUMMARY"
+    bullets = [
+        f"Led migration of service {page}-{i} to {SKILLS[(page + i) % len(SKILLS)]}, "
+        f"cutting p99 latency by {(page * 7 + i * 3) % 60 + 10}% and saving ${(i + 1) * 12},000 a year"
+        for i in range(10)
+    ]
+    rows = [["Skill", "Years", "Level", "Last used"]] + [
+        [SKILLS[(page + r) % len(SKILLS)], str(r % 9 + 1), ("Expert", "Advanced", "Working")[r % 3], str(2015 + r)]
+        for r in range(6)
+    ]
+    return heading, bullets, rows
+
+
+def build_pdf(path, pages):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, ListFlowable, ListItem, PageBreak
+
+    styles = getSampleStyleSheet()
+    story = []
+    for page in range(pages):
+        heading, bullets, rows = page_sections(page)
+        story.append(Paragraph(heading, styles["Heading1"]))
+        story.append(ListFlowable(
+            [ListItem(Paragraph(bullet, styles["Normal"])) for bullet in bullets],
+            bulletType="bullet"
+        ))
+        table = Table(rows)
+        table.setStyle(TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.grey)]))
+        story.append(table)
+        if page < pages - 1:
+            story.append(PageBreak())
+    SimpleDocTemplate(path, pagesize=letter).build(story)
+
+
+def build_docx(path, pages):
+    import docx
+
+    doc = docx.Document()
+    for page in range(pages):
+        heading, bullets, rows = page_sections(page)
+        doc.add_heading(heading, level=1)
+        for bullet in bullets:
+            para = doc.add_paragraph(style="List Bullet")
+            para.add_run(bullet.split(",")[0]).bold = True
+            para.add_run("," + ",".join(bullet.split(",")[1:]))
+        table = doc.add_table(rows=len(rows), cols=len(rows[0]))
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                table.cell(r, c).text = value
+        if page < pages - 1:
+            doc.add_page_break()
+    doc.save(path)
+
+
+def build_corpus(directory, page_counts):
+    """Write resume_<n>p.pdf/.docx for each page count (skipping existing files)."""
+    corpus = {}
+    for pages in page_counts:
+        for extension, builder in ((".pdf", build_pdf), (".docx", build_docx)):
+            path = os.path.join(directory, f"resume_{pages}p{extension}")
+            if not os.path.exists(path):
+                builder(path, pages)
+            corpus[(extension[1:], pages)] = path
+    return corpus
+
+
+def stub_completion(model, messages, temperature=None, stream=False, stream_options=None, **kwargs):
+    """In-process stand-in for openai.chat.completions.create.
+
+    Answers with resume_optimizer.stub_reply, the same deterministic reply
+    as the stub-server command, and streams it in fixed-size chunks when
+    asked to.
+    """
+    content = resume_optimizer.stub_reply(messages)
+    prompt_tokens = sum(resume_optimizer.count_tokens(message["content"]) for message in messages)
+    usage = types.SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=resume_optimizer.count_tokens(content),
+        total_tokens=prompt_tokens + resume_optimizer.count_tokens(content)
+    )
+    if not stream:
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+    
+    def chunks():
+        for start in range(0, len(content), 64):
+            delta = types.SimpleNamespace(content=content[start:start + 64])
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)], usage=None)
+        yield types.SimpleNamespace(choices=[], usage=usage)
+    return chunks()
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_page_server():
+    """Serve benchmarks/job_pages on a free localhost port; returns (server, base URL)."""
+    handler = functools.partial(QuietHandler, directory=PAGES_DIR)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def make_engine():
+    """An engine with caches off, no quota limits and private metrics."""
+    engine = resume_optimizer.ResumeOptimizerEngine(
+        scheduler=resume_optimizer.LLMScheduler(rpm=0, tpm=0, max_concurrency=8),
+        metrics=resume_optimizer.Metrics(jsonl_path="", prometheus_path="", history_path="")
+    )
+    engine.llm_cache.enabled = False
+    engine.resume_cache.enabled = False
+    engine.http_cache.enabled = False
+    return engine
+
+
+def measure(func, repeat):
+    """Return (median seconds, peak traced bytes) for func()."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(samples), peak
+
+
+def extract_docx(engine, path):
+    with open(path, "rb") as f:
+        return engine.extract_text_from_docx(f)
+
+
+def build_cases(engine, corpus, base_url, output_dir):
+    """Return [(name, func, units processed, unit name)] for every stage."""
+    cases = []
+    for (kind, pages), path in sorted(corpus.items()):
+        if kind == "pdf":
+            cases.append((f"extract_pdf/{pages}p", lambda path=path: engine.extract_text_from_pdf(path), pages, "pages"))
+        else:
+            cases.append((f"extract_docx/{pages}p", lambda path=path: extract_docx(engine, path), pages, "pages"))
+    
+    pages = sorted(name for name in os.listdir(PAGES_DIR) if name.endswith(".html"))
+    cases.append((
+        "job_description/corpus",
+        lambda: [engine.extract_job_description(f"{base_url}/{name}") for name in pages],
+        len(pages), "pages"
+    ))
+    
+    largest = max(pages_count for _, pages_count in corpus)
+    resume_text, _ = extract_docx(engine, corpus[("docx", largest)])
+    with open(os.path.join(PAGES_DIR, pages[0]), "r", encoding="utf-8") as f:
+        job_description = resume_optimizer.extract_main_text(f.read())
+    cases.append((
+        "optimize_and_analyze/stub",
+        lambda: engine.optimize_and_analyze(resume_text, job_description, on_optimize_chunk=len, on_analysis_chunk=len),
+        1, "runs"
+    ))
+    
+    optimized, _, _ = engine.optimize_and_analyze(resume_text, job_description)
+    for output_format in ("txt", "docx", "pdf"):
+        filename = os.path.join(output_dir, f"optimized{resume_optimizer.FORMAT_EXTENSIONS[output_format]}")
+        cases.append((
+            f"render_{output_format}/{largest}p",
+            lambda filename=filename, output_format=output_format: engine.render_resume(filename, optimized, output_format),
+            largest, "pages"
+        ))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 15, 30], help="Resume page counts to generate")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--corpus-dir", help="Keep the generated resumes here instead of a temporary directory")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown or memory growth over the baseline (0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the current results as the baseline")
+    args = parser.parse_args()
+
+    resume_optimizer.openai.chat.completions.create = stub_completion
+    server, base_url = start_page_server()
+    engine = make_engine()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_dir = args.corpus_dir or temp_dir
+        os.makedirs(corpus_dir, exist_ok=True)
+        corpus = build_corpus(corpus_dir, args.pages)
+        
+        results = {}
+        print(f"{'case':28s} {'median ms':>10s} {'peak KB':>9s}  throughput")
+        for name, func, units, unit_name in build_cases(engine, corpus, base_url, temp_dir):
+            elapsed, peak = measure(func, args.repeat)
+            results[name] = {"ms": round(elapsed * 1000, 2), "peak_kb": round(peak / 1024, 1)}
+            print(f"{name:28s} {elapsed * 1000:10.2f} {peak / 1024:9.1f}  {units / elapsed:8.1f} {unit_name}/s")
+    server.shutdown()
+
+    if args.update_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        return 0
+    with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    failed = False
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric, label in (("ms", "time"), ("peak_kb", "peak memory")):
+            budget = max(baseline[name][metric] * (1 + args.tolerance), baseline[name][metric] + ABSOLUTE_SLACK[metric])
+            if result[metric] > budget:
+                print(f"FAIL: {name} {label} regressed: {result[metric]} > budget {budget:.1f} (baseline {baseline[name][metric]})")
+                failed = True
+    if not failed:
+        print(f"OK: all cases within {args.tolerance:.0%} (at least {ABSOLUTE_SLACK['ms']:g} ms) of the baseline")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Cold-start benchmark for resume_optimizer.
+
+Imports the module in fresh interpreters, reports the import time and fails
+if it exceeds the budget in startup_baseline.json or if a heavy dependency
+(Tk, reportlab, PyPDF2, python-docx, bs4, requests, openai) was imported
+eagerly. Run from the repository root:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --update-baseline
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+# Modules that must only be imported when their stage first runs
+HEAVY_MODULES = ["tkinter", "customtkinter", "reportlab", "PyPDF2", "docx", "bs4", "requests", "openai"]
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import resume_optimizer
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"import_ms": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(runs):
+    """Import resume_optimizer in `runs` fresh interpreters."""
+    samples = []
+    heavy = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["import_ms"])
+        heavy.update(result["heavy"])
+    return samples, sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Number of fresh interpreters to time")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown over the baseline (0.5 = 50%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Record the current median as the baseline")
+    args = parser.parse_args()
+
+    samples, heavy = measure(args.runs)
+    median = statistics.median(samples)
+    print(f"import resume_optimizer: median {median:.1f} ms, min {min(samples):.1f} ms over {len(samples)} runs")
+
+    if args.update_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"import_ms": round(median, 1)}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_FILE}")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["import_ms"]
+        budget = baseline * (1 + args.tolerance)
+        if median > budget:
+            print(f"FAIL: startup regressed: {median:.1f} ms > budget {budget:.1f} ms (baseline {baseline} ms)")
+            failed = True
+        else:
+            print(f"OK: within budget {budget:.1f} ms (baseline {baseline} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,34 +1,3381 @@
 import os
 import io
 import re
+import sys
+import json
+import math
+import mmap
+import heapq
+import random
+import atexit
+import argparse
+import time
+import zlib
+import sqlite3
+import hashlib
+import contextlib
+import dataclasses
+import functools
+import importlib
+import itertools
 import threading
-import tkinter as tk
-from tkinter import filedialog, scrolledtext, messagebox
-import customtkinter as ctk
-import requests
-from bs4 import BeautifulSoup
-import PyPDF2
-import docx
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.shared import RGBColor
-from docx.oxml.shared import OxmlElement, qn
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_JUSTIFY, TA_LEFT, TA_CENTER, TA_RIGHT
-import openai
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Set up OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
-
-# Set CustomTkinter appearance
-ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
-ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
+import urllib.parse
+from collections import Counter, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+
+class _LazyModule:
+    """Stand-in for a module that is only imported on first attribute access.
+
+    Keeps heavy dependencies (Tk, reportlab, PyPDF2, python-docx, requests,
+    openai) out of startup and out of code paths that never use them.
+    """
+
+    _lock = threading.RLock()
+
+    def __init__(self, name, on_import=None):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_on_import", on_import)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self):
+        module = object.__getattribute__(self, "_module")
+        if module is None:
+            with _LazyModule._lock:
+                module = object.__getattribute__(self, "_module")
+                if module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_import:
+                        self._on_import(module)
+                    object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}>"
+
+
+def _configure_openai(module):
+    # Set up OpenAI API key
+    module.api_key = os.getenv("OPENAI_API_KEY")
+    # Retries are handled by LLMScheduler, which also knows about our quota
+    module.max_retries = 0
+
+
+tk = _LazyModule("tkinter")
+filedialog = _LazyModule("tkinter.filedialog")
+scrolledtext = _LazyModule("tkinter.scrolledtext")
+messagebox = _LazyModule("tkinter.messagebox")
+ctk = _LazyModule("customtkinter")
+requests = _LazyModule("requests")
+PyPDF2 = _LazyModule("PyPDF2")
+docx = _LazyModule("docx")
+openai = _LazyModule("openai", on_import=_configure_openai)
+asyncio = _LazyModule("asyncio")
+
+# Load environment variables from a .env next to the script or in the working
+# directory (python-dotenv is only imported when there is a file to read)
+for _env_path in (os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"), ".env"):
+    if os.path.isfile(_env_path):
+        from dotenv import load_dotenv
+        load_dotenv(_env_path)
+
+# Output formats supported by the renderers
+FORMAT_EXTENSIONS = {
+    "txt": ".txt",
+    "docx": ".docx",
+    "pdf": ".pdf"
+}
+
+# Formats written by "export all"
+EXPORT_FORMATS = ("txt", "docx", "pdf")
+
+
+def detect_resume_format(path):
+    """Return 'pdf', 'docx' or 'unknown' based on the file extension."""
+    lower_path = path.lower()
+    if lower_path.endswith('.pdf'):
+        return 'pdf'
+    elif lower_path.endswith('.docx'):
+        return 'docx'
+    return 'unknown'
+
+
+# Prompt templates for the LLM calls, kept flush-left so no indentation
+# whitespace is sent to the model. Part of the response cache key, so
+# editing a template naturally invalidates its cached answers.
+#
+# User prompts are (resume message, job message) pairs sent in that order
+# after the system prompt. Everything up to the job description is then
+# identical for every posting a resume is sent to, so providers with prompt
+# prefix caching only process the job-specific tail again.
+OPTIMIZE_SYSTEM_PROMPT = """\
+You are an expert resume optimizer who helps candidates match their resumes to job descriptions for better ATS matching scores.
+
+When optimizing resumes, you must preserve the original formatting structure:
+1. Keep section headings exactly as they are (same capitalization, punctuation)
+2. Maintain heading levels and hierarchy
+3. Preserve bullet points and list formatting
+4. Maintain indentation and text alignment patterns
+5. Preserve any hyperlinks by using [text](url) format
+6. Keep date formats consistent
+
+For formatting instructions:
+- Use **bold** for headings and important text
+- Use _italics_ for emphasis where appropriate
+- Format metrics and key achievements like: **[increased revenue by 25%]**
+- Preserve center or right alignment with <center> or <right> tags
+- For left-justified text, no special tags are needed
+- Maintain any table-like structures by using consistent spacing"""
+
+OPTIMIZE_USER_PROMPT = ("""\
+I need to optimize my resume for a specific job.
+
+Here is my current resume:
+{resume_text}""", """\
+Here is the job description:
+{job_description}
+
+Please optimize my resume to better match this job description and increase my ATS matching score.
+Use the same format as my original resume, but enhance the content to better align with the job requirements.
+Keep my honest experiences and qualifications, but highlight relevant skills and use appropriate keywords from the job description.
+
+Very important formatting requirements:
+1. Maintain the exact same section structure and headings
+2. Bold all headings and section titles using **text**
+3. Make key metrics and achievements bold using **[metric]** format
+4. Preserve text alignment - use <center> tags for centered text and <right> tags for right-justified text
+5. Maintain any hyperlinks in the form [text](url)
+
+Return only the optimized resume text with thorough formatting indicators.""")
+
+OPTIMIZE_SECTION_USER_PROMPT = ("""\
+I need to optimize my resume for a specific job. My resume is being optimized one section at a time.
+
+Here is one section of my current resume:
+{resume_text}""", """\
+Here is the job description:
+{job_description}
+
+Please optimize this section to better match this job description and increase my ATS matching score.
+Keep my honest experiences and qualifications, but highlight relevant skills and use appropriate keywords from the job description.
+Only rewrite this section: do not add content from other sections, a summary or any commentary.
+
+Very important formatting requirements:
+1. Keep the section heading exactly as it is, on the first line
+2. Bold all headings and titles using **text**
+3. Make key metrics and achievements bold using **[metric]** format
+4. Preserve text alignment - use <center> tags for centered text and <right> tags for right-justified text
+5. Maintain any hyperlinks in the form [text](url)
+
+Return only the optimized section text with thorough formatting indicators.""")
+
+ANALYSIS_SYSTEM_PROMPT = "You are an expert resume analyst who provides objective feedback on resumes."
+
+ANALYSIS_USER_PROMPT = ("""\
+I need an analysis of my resume compared to a specific job description.
+
+Resume:
+{resume_text}""", """\
+Job Description:
+{job_description}
+
+Please provide a detailed analysis with the following sections:
+1. Strengths: What parts of my resume match well with the job description?
+2. Weaknesses: What important elements from the job description are missing or underrepresented in my resume?
+3. Areas for Improvement: Specific suggestions to make my resume more competitive for this position.
+4. Keyword Analysis: Key terms from the job description that should be included in my resume.
+
+Be honest, specific, and actionable in your feedback.""")
+
+# Location of the on-disk caches, overridable through the environment
+CACHE_DIR = os.getenv(
+    "RESUME_OPTIMIZER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".resume_optimizer", "cache")
+)
+
+# Size cap for cached LLM responses (megabytes)
+LLM_CACHE_MAX_MB = float(os.getenv("RESUME_OPTIMIZER_LLM_CACHE_MB", "256"))
+
+# Size cap for cached parsed resumes (megabytes)
+RESUME_CACHE_MAX_MB = float(os.getenv("RESUME_OPTIMIZER_RESUME_CACHE_MB", "64"))
+
+# Size cap for cached job posting pages (megabytes)
+HTTP_CACHE_MAX_MB = float(os.getenv("RESUME_OPTIMIZER_HTTP_CACHE_MB", "64"))
+
+# How long (seconds) a cached page is reused without revalidation when the
+# server sends no Cache-Control max-age of its own
+HTTP_CACHE_TTL = float(os.getenv("RESUME_OPTIMIZER_HTTP_CACHE_TTL", "900"))
+
+# Connect/read timeouts (seconds) and connection pool size for job posting requests
+HTTP_CONNECT_TIMEOUT = float(os.getenv("RESUME_OPTIMIZER_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("RESUME_OPTIMIZER_HTTP_READ_TIMEOUT", "20"))
+HTTP_POOL_SIZE = int(os.getenv("RESUME_OPTIMIZER_HTTP_POOL_SIZE", "16"))
+
+# PDF extraction: page cap (0 = no cap), and the page count from which a PDF
+# is split into page ranges extracted in parallel worker processes
+PDF_MAX_PAGES = int(os.getenv("RESUME_OPTIMIZER_PDF_MAX_PAGES", "100"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("RESUME_OPTIMIZER_PDF_PARALLEL_MIN_PAGES", "12"))
+
+# HTML parser for job postings: "auto" (lxml when installed), "lxml" or "html.parser"
+JOB_HTML_PARSER = os.getenv("RESUME_OPTIMIZER_HTML_PARSER", "auto")
+
+# Worker processes for CPU-bound stages (defaults to the number of cores)
+PROCESS_POOL_WORKERS = int(os.getenv("RESUME_OPTIMIZER_PROCESS_WORKERS", "0")) or os.cpu_count() or 1
+
+# Version of the resume extractors. Part of the parsed-resume cache key:
+# bump it whenever extraction output changes so stale entries are ignored
+# (they age out through LRU eviction).
+EXTRACTOR_VERSION = 2
+
+# Set RESUME_OPTIMIZER_NO_CACHE=1 to bypass every cache
+CACHE_DISABLED = os.getenv("RESUME_OPTIMIZER_NO_CACHE", "").lower() in ("1", "true", "yes")
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """Return the shared process pool for CPU-bound stages, creating it on first use."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Imported here: concurrent.futures.process loads multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            _process_pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS)
+            atexit.register(_shutdown_process_pool)
+    return _process_pool
+
+
+def _shutdown_process_pool():
+    # Shut the pool down while concurrent.futures.process is still intact:
+    # imported late, it is torn down before this module at exit, and an
+    # executor collected after that fails in its weakref callback
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+@contextlib.contextmanager
+def open_mapped(path):
+    """Open a file read-only as a memory map, so parsers seek around it
+    instead of holding a copy of it in memory. Empty files (which can't be
+    mapped) come back as a plain binary file object."""
+    with open(path, 'rb') as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield file
+            return
+        with mapped:
+            yield mapped
+
+
+def file_sha256(path):
+    """Return the SHA-256 hex digest of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _release_pdf_reader(reader):
+    """Drop a PdfReader's table of parsed objects.
+
+    The objects point back at the reader, so otherwise a parsed PDF stays in
+    memory until the next full garbage collection.
+    """
+    reader.resolved_objects.clear()
+    reader.flattened_pages = None
+
+
+def _extract_pdf_page_range(path, start, stop):
+    """Extract the text of pages start..stop-1 of a PDF (process pool worker)."""
+    with open_mapped(path) as stream:
+        reader = PyPDF2.PdfReader(stream)
+        try:
+            return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+        finally:
+            _release_pdf_reader(reader)
+
+
+def iter_pdf_pages(pdf_file, max_pages=None):
+    """Yield the text of each page of a PDF, in page order.
+
+    pdf_file is a path or a binary file object. At most max_pages pages are
+    read (PDF_MAX_PAGES by default, 0 for no cap). When the PDF is given by
+    path and has at least PDF_PARALLEL_MIN_PAGES pages, page ranges are
+    extracted concurrently in the process pool so latency scales with cores
+    rather than page count; otherwise pages are extracted one at a time.
+    """
+    if max_pages is None:
+        max_pages = PDF_MAX_PAGES
+    
+    with contextlib.ExitStack() as stack:
+        path = None
+        if isinstance(pdf_file, (str, os.PathLike)):
+            path = os.fspath(pdf_file)
+            # Given a path, PyPDF2 would read the whole file into memory first
+            pdf_file = stack.enter_context(open_mapped(path))
+        
+        reader = PyPDF2.PdfReader(pdf_file)
+        stack.callback(_release_pdf_reader, reader)
+        page_count = len(reader.pages)
+        if max_pages:
+            page_count = min(page_count, max_pages)
+        
+        if path and PROCESS_POOL_WORKERS > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+            # Two ranges per worker keeps cores busy when pages differ in cost
+            chunk_size = -(-page_count // (PROCESS_POOL_WORKERS * 2))
+            pool = get_process_pool()
+            futures = [
+                pool.submit(_extract_pdf_page_range, path, start, min(start + chunk_size, page_count))
+                for start in range(0, page_count, chunk_size)
+            ]
+            for future in futures:
+                yield from future.result()
+            return
+        
+        for index in range(page_count):
+            yield reader.pages[index].extract_text() or ""
+
+
+# Token budget for one prompt (system + user message). GPT-4's 8k context
+# also has to hold the answer, which is about as long as the resume.
+PROMPT_TOKEN_BUDGET = int(os.getenv("RESUME_OPTIMIZER_PROMPT_TOKEN_BUDGET", "5000"))
+
+# Job posting sections and sentences that never help tailor a resume:
+# benefits, EEO statements, cookie banners and similar site chrome. Only
+# whole phrases that mean the same thing in any posting, so a dental
+# practice's job ad or "design intuitive interfaces" are left alone.
+_BOILERPLATE_HEADING_RE = re.compile(
+    r'^\W*(benefits|perks|what we offer|our benefits|compensation (and|&) benefits|equal (employment )?opportunity'
+    r'|eeo|diversity|accommodations?|privacy|cookies?|about us|why join us|legal|disclaimer)\b',
+    re.IGNORECASE
+)
+_BOILERPLATE_SENTENCE_RE = re.compile(
+    r'\b(cookies?|privacy (policy|notice)|terms of (use|service)|accept all|equal (employment )?opportunity'
+    r'|affirmative action|all qualified applicants|without regard to|sexual orientation|gender identity'
+    r'|protected veteran|reasonable accommodations?|e-verify|401\(?k\)?|paid time off'
+    r'|medical,? dental,? (and|&) vision|share this job|apply now|sign in|create (an )?account)(?!\w)',
+    re.IGNORECASE
+)
+# Headings of the sections a posting is about, written as plain titles
+# ("The Role", "What You'll Do", "Minimum Qualifications"). Any other
+# short line inside a boilerplate section is one of its list items.
+_CONTENT_HEADING_RE = re.compile(
+    r"^\W*(about the |the |your |key |core |main |minimum |basic |preferred |required |desired |additional |job |position )*"
+    r"(role|position|job|responsibilities|duties|requirements|qualifications|skills|experience|description|overview"
+    r"|what you('ll| will) (do|bring|need)|who you are|what we('re| are) looking for)\W*$",
+    re.IGNORECASE
+)
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Compaction that keeps less than this share of a job description has
+# most likely mistaken its content for boilerplate; the original is used
+JOB_COMPACTION_MIN_KEPT = 0.3
+
+
+def _is_section_heading(line):
+    """Heuristic for a heading line in pasted job descriptions."""
+    stripped = line.strip()
+    return 0 < len(stripped) <= 60 and (stripped.endswith(':') or stripped.isupper() or stripped.startswith('#'))
+
+
+def compact_job_description(job_description):
+    """Strip boilerplate from a job description.
+
+    Drops whole sections under boilerplate headings (benefits, EEO, privacy,
+    ...) in pasted text, up to the next heading (marked up, or the title of
+    a section about the job such as "The Role"), and boilerplate sentences
+    anywhere, which also covers scraped postings that arrive as one long
+    line. If that would leave less than JOB_COMPACTION_MIN_KEPT of the text,
+    the job description is returned unchanged.
+    """
+    kept_lines = []
+    skipping = False
+    for line in job_description.split("\n"):
+        boilerplate_heading = bool(_BOILERPLATE_HEADING_RE.match(line.strip()))
+        if boilerplate_heading or _is_section_heading(line) or _CONTENT_HEADING_RE.match(line.strip()):
+            skipping = boilerplate_heading
+            if skipping:
+                continue
+        if skipping:
+            continue
+        sentences = [
+            sentence for sentence in _SENTENCE_SPLIT_RE.split(line)
+            if not _BOILERPLATE_SENTENCE_RE.search(sentence)
+        ]
+        if line.strip() and not sentences:
+            continue
+        kept_lines.append(" ".join(sentences))
+    compacted = re.sub(r'\n{3,}', '\n\n', "\n".join(kept_lines)).strip()
+    
+    original_size = len("".join(job_description.split()))
+    if len("".join(compacted.split())) < original_size * JOB_COMPACTION_MIN_KEPT:
+        return job_description.strip()
+    return compacted
+
+
+@functools.lru_cache(maxsize=1)
+def _token_encoder():
+    """Return a tiktoken encoder when tiktoken is installed, else None."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+_TOKEN_ESTIMATE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """Count prompt tokens locally.
+
+    Exact with tiktoken; otherwise estimated as one token per punctuation
+    mark plus one per four characters of each word, which tracks GPT-4's
+    tokenizer closely on resume-like English text.
+    """
+    encoder = _token_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_ESTIMATE_RE.findall(text))
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut text to at most max_tokens tokens, at a line or word boundary when possible."""
+    if max_tokens <= 0:
+        return ""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    marker = "\n[...truncated]"
+    max_tokens = max(1, max_tokens - count_tokens(marker))
+    # Shrink proportionally, then back off to a boundary until it fits
+    cut = int(len(text) * max_tokens / tokens)
+    while cut > 0:
+        candidate = text[:cut]
+        boundary = max(candidate.rfind("\n"), candidate.rfind(" "))
+        if boundary > cut // 2:
+            candidate = candidate[:boundary]
+        if count_tokens(candidate) <= max_tokens:
+            return candidate.rstrip() + marker
+        cut = int(cut * 0.9)
+    return marker.strip()
+
+
+def build_messages(system_prompt, user_prompt, resume_text, job_description):
+    """Return the chat messages for a system prompt and a (resume, job) user prompt pair."""
+    messages = [{"role": "system", "content": system_prompt}]
+    for template in user_prompt:
+        messages.append({"role": "user", "content": template.format(
+            resume_text=resume_text,
+            job_description=job_description
+        )})
+    return messages
+
+
+def fit_prompt_inputs(system_prompt, user_prompt, resume_text, job_description, token_budget=None):
+    """Compact the inputs and trim them to fit the prompt token budget.
+
+    Boilerplate is stripped from the job description first. If the prompt
+    is still over budget the job description gives way first (down to a
+    third of the space left after the templates), then the resume.
+    Returns (resume_text, job_description).
+    """
+    if token_budget is None:
+        token_budget = PROMPT_TOKEN_BUDGET
+    job_description = compact_job_description(job_description)
+    
+    template_tokens = count_tokens(system_prompt) + sum(
+        count_tokens(template.format(resume_text="", job_description="")) for template in user_prompt
+    )
+    available = token_budget - template_tokens
+    resume_tokens = count_tokens(resume_text)
+    job_tokens = count_tokens(job_description)
+    if resume_tokens + job_tokens <= available:
+        return resume_text, job_description
+    
+    job_description = truncate_to_tokens(job_description, max(available - resume_tokens, available // 3))
+    resume_text = truncate_to_tokens(resume_text, available - count_tokens(job_description))
+    return resume_text, job_description
+
+
+# LLM request scheduling. Every completion goes through one LLMScheduler,
+# which keeps the process inside the account's requests-per-minute and
+# tokens-per-minute quota (with a little headroom), caps concurrent
+# requests and retries transient failures with backoff.
+LLM_RPM = int(os.getenv("RESUME_OPTIMIZER_LLM_RPM", "500"))
+LLM_TPM = int(os.getenv("RESUME_OPTIMIZER_LLM_TPM", "40000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("RESUME_OPTIMIZER_LLM_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("RESUME_OPTIMIZER_LLM_MAX_RETRIES", "5"))
+# Share of the quota the scheduler aims for, so bursts from other clients
+# on the same key don't push us into 429s
+LLM_QUOTA_HEADROOM = 0.9
+# Completion tokens assumed for a request before its real usage is known
+LLM_COMPLETION_TOKEN_ESTIMATE = 1000
+
+# Queue priorities: lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at per_minute / 60 per second.
+
+    Not thread-safe on its own: LLMScheduler only touches it under its lock.
+    A per_minute of 0 means unlimited.
+    """
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until amount can be taken (0 if it can be taken now)."""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount):
+        if self.capacity:
+            self._refill()
+            self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        """Take (or give back, when negative) tokens after the fact; the level may go into debt."""
+        if self.capacity:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+
+def is_retryable_llm_error(exc):
+    """True for failures worth retrying: rate limits, timeouts, connection errors and 5xx."""
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        if status == 429:
+            # An exhausted quota is not going to come back within a retry
+            return getattr(exc, "code", None) != "insufficient_quota"
+        return status in (408, 409) or status >= 500
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError") or isinstance(exc, (ConnectionError, TimeoutError))
+
+
+def _retry_after(exc):
+    """Return the server's Retry-After delay in seconds, if the error carries one."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class LLMScheduler:
+    """Admission control for LLM requests.
+
+    run() blocks until the call's priority comes up, a concurrency slot is
+    free and both the request and token buckets can cover it, then runs it.
+    Retryable failures back off exponentially with full jitter, or for the
+    delay the server asked for in Retry-After; a 429 pauses every queued
+    call for that delay instead of letting them all hit the limit again.
+    arun() is the same for coroutines: threads and event loops share one
+    queue, and async callers wait on the loop without holding a thread.
+    """
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM, max_concurrency=LLM_MAX_CONCURRENCY,
+                 max_retries=LLM_MAX_RETRIES, headroom=LLM_QUOTA_HEADROOM,
+                 base_delay=1.0, max_delay=60.0, clock=time.monotonic, sleep=time.sleep):
+        self.requests = TokenBucket(rpm * headroom, clock)
+        self.tokens = TokenBucket(tpm * headroom, clock)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self._condition = threading.Condition()
+        self._waiting = []
+        # Wake-up callbacks of async callers in the queue, by ticket
+        self._async_waiters = {}
+        self._sequence = itertools.count()
+        self._active = 0
+        self._paused_until = 0.0
+        # Counters reported by stats()
+        self.calls = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+
+    def run(self, func, tokens=0, priority=PRIORITY_INTERACTIVE, retryable=is_retryable_llm_error):
+        """Call func() once admitted, retrying it while retryable(exc) allows.
+
+        tokens is the estimated prompt + completion size of the request;
+        correct it with record_usage() once the real usage is known.
+        """
+        attempt = 0
+        while True:
+            self._acquire(tokens, priority)
+            try:
+                return func()
+            except Exception as exc:
+                if attempt >= self.max_retries or not retryable(exc):
+                    raise
+                delay = self._backoff(exc, attempt)
+                attempt += 1
+                with self._condition:
+                    self.retries += 1
+                    if getattr(exc, "status_code", None) == 429:
+                        self._paused_until = max(self._paused_until, self.clock() + delay)
+            finally:
+                self._release()
+            self.sleep(delay)
+
+    async def arun(self, func, tokens=0, priority=PRIORITY_INTERACTIVE, retryable=is_retryable_llm_error):
+        """Like run(), for a coroutine function: awaits func() once admitted.
+
+        Async callers share the queue and quota with run(); both the wait for
+        admission and the request itself stay on the event loop.
+        """
+        attempt = 0
+        while True:
+            await self._aacquire(tokens, priority)
+            try:
+                return await func()
+            except Exception as exc:
+                if attempt >= self.max_retries or not retryable(exc):
+                    raise
+                delay = self._backoff(exc, attempt)
+                attempt += 1
+                with self._condition:
+                    self.retries += 1
+                    if getattr(exc, "status_code", None) == 429:
+                        self._paused_until = max(self._paused_until, self.clock() + delay)
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Correct the token bucket once a request's real token usage is known."""
+        with self._condition:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+            self._notify_all()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "active": self._active,
+                "queued": len(self._waiting)
+            }
+
+    def _backoff(self, exc, attempt):
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            # Small jitter so callers told the same delay don't return in lockstep
+            return min(self.max_delay, retry_after) * random.uniform(1.0, 1.1)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _acquire(self, tokens, priority):
+        with self._condition:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            start = self.clock()
+            try:
+                while True:
+                    timeout = self._admission_delay(ticket, tokens)
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+            except BaseException:
+                self._leave_queue(ticket)
+                raise
+            self._admit(tokens, start)
+
+    async def _aacquire(self, tokens, priority):
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        with self._condition:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            self._async_waiters[ticket] = lambda: loop.call_soon_threadsafe(wakeup.set)
+            start = self.clock()
+        try:
+            while True:
+                with self._condition:
+                    timeout = self._admission_delay(ticket, tokens)
+                    if timeout is not None and timeout <= 0:
+                        del self._async_waiters[ticket]
+                        self._admit(tokens, start)
+                        return
+                    # Cleared under the lock, so no wake-up after this is lost
+                    wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    # Not the builtin TimeoutError before Python 3.11
+                    pass
+        except BaseException:
+            with self._condition:
+                del self._async_waiters[ticket]
+                self._leave_queue(ticket)
+            raise
+
+    def _admission_delay(self, ticket, tokens):
+        """Seconds until ticket can be admitted (0 or less: now).
+
+        None while another ticket is ahead of it or no slot is free. Called
+        under the lock.
+        """
+        if self._waiting[0] != ticket or self._active >= self.max_concurrency:
+            return None
+        return max(
+            self._paused_until - self.clock(),
+            self.requests.wait_time(1),
+            self.tokens.wait_time(tokens)
+        )
+
+    def _admit(self, tokens, start):
+        heapq.heappop(self._waiting)
+        self._active += 1
+        self.requests.consume(1)
+        self.tokens.consume(tokens)
+        self.calls += 1
+        self.wait_seconds += self.clock() - start
+        # The next caller in line may be admissible too
+        self._notify_all()
+
+    def _leave_queue(self, ticket):
+        self._waiting.remove(ticket)
+        heapq.heapify(self._waiting)
+        self._notify_all()
+
+    def _notify_all(self):
+        """Wake every waiting caller, threads and event loops alike (under the lock)."""
+        self._condition.notify_all()
+        for wake in self._async_waiters.values():
+            wake()
+
+    def _release(self):
+        with self._condition:
+            self._active -= 1
+            self._notify_all()
+
+
+_llm_scheduler = None
+_llm_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler():
+    """Return the process-wide LLM scheduler, creating it on first use."""
+    global _llm_scheduler
+    with _llm_scheduler_lock:
+        if _llm_scheduler is None:
+            _llm_scheduler = LLMScheduler()
+    return _llm_scheduler
+
+
+# LLM backends and model routing. A backend is an OpenAI-compatible
+# endpoint; each task ("optimize", "analyze") has an ordered list of routes
+# and the first route whose max_input_tokens covers the prompt is used, so
+# routes should go from the fastest model to the most capable one. The
+# configuration is read from the JSON file named by
+# RESUME_OPTIMIZER_LLM_CONFIG, for example:
+#
+#   {
+#     "backends": {"local": {"base_url": "http://127.0.0.1:8089/v1", "api_key": "stub"}},
+#     "tasks": {
+#       "analyze": [{"model": "gpt-4o-mini", "max_input_tokens": 3000}, {"model": "gpt-4"}],
+#       "optimize": [{"model": "gpt-4"}]
+#     }
+#   }
+#
+# RESUME_OPTIMIZER_OPTIMIZE_MODEL / RESUME_OPTIMIZER_ANALYZE_MODEL pin a
+# task to one model, and RESUME_OPTIMIZER_LLM_BASE_URL points the default
+# backend at another OpenAI-compatible server.
+LLM_CONFIG_PATH = os.getenv("RESUME_OPTIMIZER_LLM_CONFIG", "")
+DEFAULT_LLM_ROUTES = {
+    "optimize": [{"model": "gpt-4"}],
+    "analyze": [{"model": "gpt-4"}]
+}
+
+
+class LLMBackend:
+    """An OpenAI-compatible chat completions endpoint.
+
+    The default backend (no base_url) uses the module-level openai client
+    configured from OPENAI_API_KEY; others get their own client.
+    """
+
+    def __init__(self, name, base_url="", api_key="", api_key_env="", timeout=120.0):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key or (os.getenv(api_key_env) if api_key_env else "")
+        self.timeout = timeout
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        if not self.base_url:
+            return openai
+        with self._lock:
+            if self._client is None:
+                self._client = openai.OpenAI(
+                    base_url=self.base_url,
+                    api_key=self.api_key or os.getenv("OPENAI_API_KEY") or "unused",
+                    timeout=self.timeout,
+                    # Retries are handled by LLMScheduler
+                    max_retries=0
+                )
+        return self._client
+
+    def create(self, **kwargs):
+        """Call chat.completions.create on this backend."""
+        return self.client().chat.completions.create(**kwargs)
+
+    def async_client(self):
+        """Return an AsyncOpenAI client for this backend (one per backend, used from one event loop)."""
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = openai.AsyncOpenAI(
+                    base_url=self.base_url or None,
+                    api_key=self.api_key or os.getenv("OPENAI_API_KEY") or "unused",
+                    timeout=self.timeout,
+                    max_retries=0
+                )
+        return self._async_client
+
+    async def acreate(self, **kwargs):
+        """Await chat.completions.create on this backend without blocking the event loop."""
+        return await self.async_client().chat.completions.create(**kwargs)
+
+
+class ModelRouter:
+    """Pick the backend and model for a task from its routes."""
+
+    def __init__(self, backends=None, routes=None):
+        self.backends = {"openai": LLMBackend("openai", base_url=os.getenv("RESUME_OPTIMIZER_LLM_BASE_URL", ""))}
+        self.backends.update(backends or {})
+        self.routes = {task: list(task_routes) for task, task_routes in DEFAULT_LLM_ROUTES.items()}
+        self.routes.update(routes or {})
+        for task, task_routes in self.routes.items():
+            if not task_routes:
+                raise ValueError(f"No model routes configured for task {task!r}")
+            for route in task_routes:
+                if route.get("backend", "openai") not in self.backends:
+                    raise ValueError(f"Unknown LLM backend {route['backend']!r} in routes for {task!r}")
+
+    @classmethod
+    def from_config(cls, path=LLM_CONFIG_PATH):
+        """Build a router from a JSON config file (if any) plus environment overrides."""
+        backends = {}
+        routes = {}
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            for name, options in config.get("backends", {}).items():
+                backends[name] = LLMBackend(name, **options)
+            routes.update(config.get("tasks", {}))
+        for task in DEFAULT_LLM_ROUTES:
+            model = os.getenv(f"RESUME_OPTIMIZER_{task.upper()}_MODEL")
+            if model:
+                routes[task] = [{"model": model}]
+        return cls(backends, routes)
+
+    def needs_openai_key(self):
+        """True when some route calls the OpenAI API with the key from OPENAI_API_KEY."""
+        return any(
+            not self.backends[route.get("backend", "openai")].base_url
+            and not self.backends[route.get("backend", "openai")].api_key
+            for task_routes in self.routes.values() for route in task_routes
+        )
+
+    def route(self, task, input_tokens):
+        """Return (backend, model) for a prompt of input_tokens tokens."""
+        task_routes = self.routes.get(task) or self.routes["optimize"]
+        for route in task_routes:
+            limit = route.get("max_input_tokens")
+            if limit is None or input_tokens <= limit:
+                break
+        else:
+            # Nothing is large enough: the last (most capable) route is the best bet
+            route = task_routes[-1]
+        return self.backends[route.get("backend", "openai")], route["model"]
+
+
+_model_router = None
+_model_router_lock = threading.Lock()
+
+
+def get_model_router():
+    """Return the process-wide model router, loading its configuration on first use."""
+    global _model_router
+    with _model_router_lock:
+        if _model_router is None:
+            _model_router = ModelRouter.from_config()
+    return _model_router
+
+
+def stub_reply(messages):
+    """Deterministic answer of the offline LLM stubs (stub server and benchmarks).
+
+    Analysis prompts get a short keyword report; anything else is answered
+    with the resume from the prompt, headings in bold.
+    """
+    prompt = "\n\n".join(message.get("content") or "" for message in messages if message.get("role") == "user")
+    if "Job Description:" in prompt and "Resume:" in prompt:
+        job_description = prompt.split("Job Description:", 1)[1].split("Please provide", 1)[0]
+        words = sorted(set(re.findall(r"[A-Za-z][A-Za-z+#.-]{5,}", job_description)), key=lambda w: (-len(w), w))[:15]
+        return "1. Strengths:\n" + "\n".join(f"• {word}" for word in words)
+    resume = re.split(r"resume:\n", prompt, maxsplit=1)[-1].split("Here is the job description:", 1)[0].strip()
+    return "\n".join(f"**{line}**" if line.isupper() else line for line in resume.split("\n"))
+
+
+# The OpenAI API only caches prompt prefixes of at least this many tokens
+STUB_PREFIX_CACHE_MIN_TOKENS = 1024
+
+
+def make_stub_server(host="127.0.0.1", port=8089, latency=0.0, chunk_delay=0.0, chunk_size=64):
+    """Create a local OpenAI-compatible server answering with stub_reply.
+
+    Serves POST /v1/chat/completions (plain and streamed) and GET /v1/models
+    for offline load tests. latency delays the first byte of every answer
+    and chunk_delay each streamed chunk. Prompt prefix caching is imitated:
+    the longest run of leading messages seen before is reported as
+    usage.prompt_tokens_details.cached_tokens. Call serve_forever() to run it.
+    """
+    import http.server
+    
+    seen_prefixes = set()
+    seen_lock = threading.Lock()
+    
+    def cached_prefix_tokens(messages):
+        cached = 0
+        tokens = 0
+        digest = hashlib.sha256()
+        with seen_lock:
+            for message in messages:
+                content = message.get("content") or ""
+                digest.update(json.dumps([message.get("role"), content]).encode("utf-8"))
+                tokens += count_tokens(content)
+                key = digest.hexdigest()
+                if key in seen_prefixes:
+                    cached = tokens
+                seen_prefixes.add(key)
+        return cached if cached >= STUB_PREFIX_CACHE_MIN_TOKENS else 0
+
+    class StubHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "local"}]})
+            else:
+                self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "Not found"}})
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            messages = request.get("messages", [])
+            content = stub_reply(messages)
+            prompt_tokens = sum(count_tokens(message.get("content") or "") for message in messages)
+            completion_tokens = count_tokens(content)
+            usage = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_prefix_tokens(messages)}
+            }
+            base = {"id": f"chatcmpl-stub-{time.time_ns()}", "created": int(time.time()), "model": request.get("model", "stub")}
+            if latency:
+                time.sleep(latency)
+            
+            if not request.get("stream"):
+                self._send_json(200, {
+                    **base, "object": "chat.completion", "usage": usage,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]
+                })
+                return
+            
+            # Server-sent events, the way the OpenAI API streams
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            events = [
+                {**base, "object": "chat.completion.chunk",
+                 "choices": [{"index": 0, "delta": {"content": content[start:start + chunk_size]}, "finish_reason": None}]}
+                for start in range(0, len(content), chunk_size)
+            ]
+            events.append({**base, "object": "chat.completion.chunk",
+                           "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (request.get("stream_options") or {}).get("include_usage"):
+                events.append({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+            for event in events:
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if chunk_delay:
+                    time.sleep(chunk_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    return http.server.ThreadingHTTPServer((host, port), StubHandler)
+
+
+# Section-level optimization. Resumes of at least SECTION_SPLIT_MIN_TOKENS
+# tokens are split at their headings and every section is optimized in its
+# own concurrent request; sections under SECTION_MIN_TOKENS are merged into
+# the next one so short headings don't each cost a request.
+SECTION_SPLIT_MIN_TOKENS = int(os.getenv("RESUME_OPTIMIZER_SECTION_SPLIT_MIN_TOKENS", "800"))
+SECTION_MIN_TOKENS = int(os.getenv("RESUME_OPTIMIZER_SECTION_MIN_TOKENS", "150"))
+
+
+def _is_plain_heading(line):
+    """An all-caps short line, the way headings come out of PDF text extraction."""
+    stripped = line.strip().rstrip(':')
+    return 2 <= len(stripped) <= 40 and stripped.isupper() and any(c.isalpha() for c in stripped)
+
+
+def split_resume_sections(resume_text, min_tokens=SECTION_MIN_TOKENS):
+    """Split resume text into sections at heading lines.
+
+    Headings are whole-line **bold** lines (as extract_text_from_docx writes
+    them) or all-caps lines. Returns a list of (section text, separator)
+    where separator is the blank lines that followed the section, so
+    "".join(text + sep) gives back the original. Small sections are merged
+    forward until they reach min_tokens.
+    """
+    lines = resume_text.split("\n")
+    blocks = parse_resume_markup(resume_text)
+    sections = [[]]
+    for line, block in zip(lines, blocks):
+        if (block.kind == "heading" or _is_plain_heading(line)) and any(l.strip() for l in sections[-1]):
+            sections.append([])
+        sections[-1].append(line)
+    
+    merged = []
+    pending = []
+    for section in sections:
+        pending.extend(section)
+        if count_tokens("\n".join(pending)) >= min_tokens:
+            merged.append(pending)
+            pending = []
+    if pending:
+        if merged and count_tokens("\n".join(pending)) < min_tokens:
+            merged[-1].extend(pending)
+        else:
+            merged.append(pending)
+    
+    result = []
+    for index, section in enumerate(merged):
+        text = "\n".join(section)
+        body = text.rstrip("\n")
+        # Every section but the last was followed by one more newline in the original
+        separator = text[len(body):] + ("\n" if index < len(merged) - 1 else "")
+        result.append((body, separator))
+    return result
+
+
+class _OrderedStream:
+    """Forward chunks from concurrently generated sections in section order.
+
+    Chunks of the section currently being shown go straight through; later
+    sections are buffered and flushed as soon as every earlier one is done.
+    """
+
+    def __init__(self, on_chunk, separators):
+        self.on_chunk = on_chunk
+        self.separators = separators
+        self.buffers = [[] for _ in separators]
+        self.done = [False] * len(separators)
+        self.current = 0
+        self.lock = threading.Lock()
+
+    def chunk_callback(self, index):
+        def on_chunk(text):
+            with self.lock:
+                if index == self.current:
+                    self.on_chunk(text)
+                else:
+                    self.buffers[index].append(text)
+        return on_chunk
+
+    def finish(self, index):
+        with self.lock:
+            self.done[index] = True
+            while self.current < len(self.done) and self.done[self.current]:
+                if self.separators[self.current] and self.current < len(self.done) - 1:
+                    self.on_chunk(self.separators[self.current])
+                self.current += 1
+                if self.current < len(self.done):
+                    for text in self.buffers[self.current]:
+                        self.on_chunk(text)
+                    self.buffers[self.current] = []
+
+
+# Stage metrics. Every pipeline stage runs inside Metrics.span(), which
+# records its duration, bytes and tokens. Spans can be appended to a JSON
+# lines file and are aggregated for the Prometheus text format. Smoothed
+# per-stage durations and output sizes are remembered across runs so the
+# progress bar can be weighted by how long each stage really takes.
+METRICS_JSONL = os.getenv("RESUME_OPTIMIZER_METRICS_JSONL", "")
+METRICS_PROMETHEUS = os.getenv("RESUME_OPTIMIZER_METRICS_PROM", "")
+
+# Typical stage durations (seconds) and output sizes (bytes) until a stage has been measured
+_DEFAULT_STAGE_DURATIONS = {
+    "fetch": 1.0, "parse_job": 0.05, "extract_resume": 0.5,
+    "optimize": 40.0, "analyze": 30.0, "render": 0.5
+}
+_DEFAULT_STAGE_BYTES = {"optimize": 4000, "analyze": 3000}
+# Progress label shown while a stage runs
+STAGE_LABELS = {
+    "fetch": "Obtaining job description...",
+    "parse_job": "Obtaining job description...",
+    "extract_resume": "Reading and analyzing resume file...",
+    "optimize": "Optimizing resume and generating analysis report...",
+    "analyze": "Optimizing resume and generating analysis report...",
+    "render": "Saving formatted resume..."
+}
+_STAGE_HISTORY_WEIGHT = 0.3
+_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+@dataclass
+class StageSpan:
+    """One timed run of a pipeline stage."""
+    stage: str
+    started: float
+    duration: float = 0.0
+    bytes: int = 0
+    tokens: int = 0
+    status: str = "ok"
+    # Served from a cache: recorded, but not used to predict future runs
+    cached: bool = False
+
+
+class Metrics:
+    """Thread-safe recorder and exporter for stage spans."""
+
+    def __init__(self, jsonl_path=METRICS_JSONL, prometheus_path=METRICS_PROMETHEUS,
+                 history_path=os.path.join(CACHE_DIR, "stage_history.json")):
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.history_path = history_path
+        self._lock = threading.Lock()
+        self._listeners = []
+        # stage -> [count, duration sum, bytes, tokens, errors, bucket counts]
+        self._totals = {}
+        self._history = {}
+        if history_path and os.path.exists(history_path):
+            try:
+                with open(history_path, "r", encoding="utf-8") as f:
+                    self._history = json.load(f)
+            except (OSError, ValueError):
+                self._history = {}
+
+    @contextlib.contextmanager
+    def span(self, stage, **fields):
+        """Time the enclosed block as one run of stage.
+
+        Yields the StageSpan so the block can fill in bytes and tokens.
+        """
+        span = StageSpan(stage, time.time(), **fields)
+        self._notify("start", span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            self.record(span)
+
+    @contextlib.asynccontextmanager
+    async def aspan(self, stage, **fields):
+        """span for the event loop: recording (and its file writes) runs on the default executor."""
+        span = StageSpan(stage, time.time(), **fields)
+        self._notify("start", span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            await asyncio.get_running_loop().run_in_executor(None, self.record, span)
+
+    def record(self, span):
+        with self._lock:
+            totals = self._totals.setdefault(span.stage, [0, 0.0, 0, 0, 0, [0] * len(_DURATION_BUCKETS)])
+            totals[0] += 1
+            totals[1] += span.duration
+            totals[2] += span.bytes
+            totals[3] += span.tokens
+            if span.status != "ok":
+                totals[4] += 1
+            for index, bound in enumerate(_DURATION_BUCKETS):
+                if span.duration <= bound:
+                    totals[5][index] += 1
+            if span.status == "ok" and not span.cached:
+                self._update_history(span)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(dataclasses.asdict(span)) + "\n")
+        if self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+        self._notify("end", span)
+
+    def _update_history(self, span):
+        """Fold a finished span into the smoothed duration and size for its stage."""
+        history = self._history.setdefault(span.stage, {})
+        for name, value in (("duration", span.duration), ("bytes", span.bytes)):
+            previous = history.get(name)
+            history[name] = value if previous is None else previous + _STAGE_HISTORY_WEIGHT * (value - previous)
+        if self.history_path:
+            try:
+                os.makedirs(os.path.dirname(self.history_path), exist_ok=True)
+                temp_path = f"{self.history_path}.{os.getpid()}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._history, f)
+                os.replace(temp_path, self.history_path)
+            except OSError:
+                pass
+
+    def expected_duration(self, stage):
+        with self._lock:
+            return self._history.get(stage, {}).get("duration") or _DEFAULT_STAGE_DURATIONS.get(stage, 1.0)
+
+    def expected_bytes(self, stage):
+        with self._lock:
+            return self._history.get(stage, {}).get("bytes") or _DEFAULT_STAGE_BYTES.get(stage, 0)
+
+    def add_listener(self, listener):
+        """Call listener(event, span) with event "start" or "end" for every span."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self, event, span):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(event, span)
+
+    def summary(self):
+        """Return {stage: {count, seconds, bytes, tokens, errors}}."""
+        with self._lock:
+            return {
+                stage: {
+                    "count": totals[0], "seconds": round(totals[1], 4), "bytes": totals[2],
+                    "tokens": totals[3], "errors": totals[4]
+                }
+                for stage, totals in self._totals.items()
+            }
+
+    def to_prometheus(self):
+        """Render the aggregated spans in the Prometheus text exposition format."""
+        with self._lock:
+            totals = {stage: [*values[:5], list(values[5])] for stage, values in sorted(self._totals.items())}
+        lines = [
+            "# HELP resume_optimizer_stage_duration_seconds Time spent in each pipeline stage.",
+            "# TYPE resume_optimizer_stage_duration_seconds histogram"
+        ]
+        for stage, (count, seconds, _, _, _, buckets) in totals.items():
+            for bound, bucket in zip(_DURATION_BUCKETS, buckets):
+                lines.append(f'resume_optimizer_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {bucket}')
+            lines.append(f'resume_optimizer_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'resume_optimizer_stage_duration_seconds_sum{{stage="{stage}"}} {seconds:.6f}')
+            lines.append(f'resume_optimizer_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+        for index, name, help_text in (
+            (2, "bytes", "Bytes read or produced by each pipeline stage."),
+            (3, "tokens", "LLM tokens used by each pipeline stage."),
+            (4, "errors", "Failed runs of each pipeline stage.")
+        ):
+            lines.append(f"# HELP resume_optimizer_stage_{name}_total {help_text}")
+            lines.append(f"# TYPE resume_optimizer_stage_{name}_total counter")
+            for stage, values in totals.items():
+                lines.append(f'resume_optimizer_stage_{name}_total{{stage="{stage}"}} {values[index]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text to path atomically (for a textfile collector)."""
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+
+class RunProgress:
+    """Overall progress of one run, measured from its stage spans.
+
+    Each stage is weighted by its expected duration from Metrics history. A
+    running stage counts the larger of elapsed / expected time and, for
+    streamed stages, bytes received / expected bytes, capped below done.
+    """
+
+    def __init__(self, metrics, stages):
+        self.metrics = metrics
+        self.weights = {stage: metrics.expected_duration(stage) for stage in stages}
+        self._lock = threading.Lock()
+        self._started = {}
+        self._finished = set()
+        self._received = dict.fromkeys(stages, 0)
+        self.current = None
+
+    def __enter__(self):
+        self.metrics.add_listener(self.on_span)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.remove_listener(self.on_span)
+
+    def on_span(self, event, span):
+        if span.stage not in self.weights:
+            return
+        with self._lock:
+            if event == "start":
+                self._started[span.stage] = time.perf_counter()
+                self.current = span.stage
+            else:
+                self._finished.add(span.stage)
+
+    def add_bytes(self, stage, count):
+        """Record streamed output for a running stage."""
+        with self._lock:
+            self._received[stage] = self._received.get(stage, 0) + count
+
+    def fraction(self):
+        with self._lock:
+            now = time.perf_counter()
+            done = 0.0
+            for stage, weight in self.weights.items():
+                if stage in self._finished:
+                    done += weight
+                elif stage in self._started:
+                    measured = (now - self._started[stage]) / weight
+                    expected_bytes = self.metrics.expected_bytes(stage)
+                    if expected_bytes:
+                        measured = max(measured, self._received[stage] / expected_bytes)
+                    done += weight * min(measured, 0.95)
+            return done / (sum(self.weights.values()) or 1)
+
+
+class TokenUsage:
+    """Thread-safe tally of the tokens reported for a group of LLM requests.
+
+    cached_tokens counts prompt tokens the provider served from its prompt
+    prefix cache (usage.prompt_tokens_details.cached_tokens).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, usage):
+        """Add one response's usage object."""
+        details = getattr(usage, "prompt_tokens_details", None)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += getattr(usage, "prompt_tokens", None) or 0
+            self.cached_tokens += getattr(details, "cached_tokens", None) or 0
+            self.completion_tokens += getattr(usage, "completion_tokens", None) or 0
+
+    def cached_ratio(self):
+        with self._lock:
+            return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def as_dict(self):
+        ratio = self.cached_ratio()
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cached_ratio": round(ratio, 4)
+            }
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the process-wide stage metrics, creating them on first use."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+    return _metrics
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session():
+    """Return the process-wide requests session used for job postings.
+
+    Connections are pooled per host and kept alive, so repeated fetches from
+    the same job board skip the TCP/TLS handshake.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                max_retries=requests.adapters.Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({'User-Agent': 'Mozilla/5.0'})
+            _http_session = session
+    return _http_session
+
+
+def _cache_max_age(cache_control):
+    """Return the max-age from a Cache-Control header, None if absent, -1 for no-store."""
+    directives = [d.strip().lower() for d in cache_control.split(",") if d.strip()]
+    if "no-store" in directives:
+        return -1
+    if "no-cache" in directives:
+        return 0
+    for directive in directives:
+        if directive.startswith("max-age="):
+            try:
+                return max(0, int(directive[len("max-age="):]))
+            except ValueError:
+                return 0
+    return None
+
+
+# Job posting extraction. The page is parsed once; every element's text
+# length, link text length and descendant tag count are accumulated
+# bottom-up as its end tag is seen, and the element with the best
+# text-density score is taken as the posting. Text is collected into one
+# flat list of chunks, so an element's text is a slice of that list and
+# nothing is ever walked twice.
+
+# Elements whose content is never part of a posting
+_JD_SKIP_TAGS = frozenset((
+    "script", "style", "noscript", "template", "svg", "iframe", "head", "nav",
+    "footer", "aside", "button", "select", "option", "canvas", "object", "form"
+))
+# Elements without end tags (html.parser reports no end event for them)
+_JD_VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr"
+))
+# Elements that start a new line in the extracted text
+_JD_BLOCK_TAGS = frozenset((
+    "p", "div", "section", "article", "main", "header", "ul", "ol", "li", "dl",
+    "dt", "dd", "table", "tr", "td", "th", "h1", "h2", "h3", "h4", "h5", "h6",
+    "br", "hr", "blockquote", "pre", "fieldset"
+))
+# class/id hints for page chrome, whose text counts against its container
+_JD_CHROME_HINT_RE = re.compile(
+    r'nav|menu|footer|sidebar|related|similar|recommend|cookie|consent|banner|modal|share|social|comment|breadcrumb|promo',
+    re.IGNORECASE
+)
+_JD_JSON_LD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+class _DensityScorer:
+    """Parser target that scores elements by text density in one pass.
+
+    An element's score is its plain text minus its link text and any text in
+    navigation-like descendants (menus, related jobs, cookie banners), so the
+    winner is the tightest container holding most of the prose. Implements
+    the lxml parser-target interface (start/end/data/close);
+    _feed_with_stdlib_parser drives it from html.parser. Application forms
+    are skipped unless skip_forms is false (for pages that wrap everything
+    in one form).
+    """
+
+    def __init__(self, skip_forms=True):
+        self.skip_tags = _JD_SKIP_TAGS if skip_forms else _JD_SKIP_TAGS - {"form"}
+        self.chunks = []
+        # Open elements: [tag, first chunk, good chars, bad chars, chrome]
+        self.stack = [["#root", 0, 0, 0, False]]
+        self.skip_depth = 0
+        self.link_depth = 0
+        self.best = None
+
+    def start(self, tag, attrib):
+        tag = tag.lower()
+        if tag in _JD_VOID_TAGS:
+            if tag in ("br", "hr") and not self.skip_depth:
+                self.chunks.append("\n")
+            return
+        if self.skip_depth or tag in self.skip_tags:
+            self.skip_depth += 1
+            return
+        if tag == "a":
+            self.link_depth += 1
+        if tag in _JD_BLOCK_TAGS:
+            self.chunks.append("\n")
+        chrome = bool(_JD_CHROME_HINT_RE.search(f"{attrib.get('class', '')} {attrib.get('id', '')}"))
+        self.stack.append([tag, len(self.chunks), 0, 0, chrome])
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag in _JD_VOID_TAGS:
+            return
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        # Close any elements html.parser left open inside this one (<p>, <li>, ...)
+        if not any(node[0] == tag for node in self.stack[1:]):
+            return
+        while True:
+            node = self.stack.pop()
+            self._close(node)
+            if node[0] == tag:
+                break
+        if tag in _JD_BLOCK_TAGS:
+            self.chunks.append("\n")
+
+    def _close(self, node):
+        tag, first, good, bad, chrome = node
+        if tag == "a":
+            self.link_depth = max(0, self.link_depth - 1)
+        if chrome:
+            good, bad = 0, good + bad
+        parent = self.stack[-1]
+        parent[2] += good
+        parent[3] += bad
+        # Inner elements close first, so ties go to the tighter container
+        score = good - bad
+        if good and (self.best is None or score > self.best[0]):
+            self.best = (score, first, len(self.chunks))
+
+    def data(self, data):
+        if self.skip_depth:
+            return
+        self.chunks.append(data)
+        length = len(data.strip())
+        self.stack[-1][3 if self.link_depth else 2] += length
+
+    def close(self):
+        while len(self.stack) > 1:
+            self._close(self.stack.pop())
+        if self.best is None:
+            return _clean_extracted_text(self.chunks)
+        _, first, last = self.best
+        return _clean_extracted_text(self.chunks[first:last])
+
+
+def _feed_with_stdlib_parser(scorer, html):
+    """Drive a _DensityScorer from html.parser."""
+    from html.parser import HTMLParser
+    
+    parser = HTMLParser(convert_charrefs=True)
+    parser.handle_starttag = lambda tag, attrs: scorer.start(tag, {name: value or "" for name, value in attrs})
+    parser.handle_endtag = scorer.end
+    parser.handle_data = scorer.data
+    
+    def handle_startendtag(tag, attrs):
+        parser.handle_starttag(tag, attrs)
+        scorer.end(tag)
+    
+    parser.handle_startendtag = handle_startendtag
+    parser.feed(html)
+    parser.close()
+    return scorer.close()
+
+
+def _clean_extracted_text(chunks):
+    """Join text chunks into lines, collapsing whitespace and blank lines."""
+    lines = (" ".join(line.split()) for line in "".join(chunks).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _job_description_from_json_ld(html):
+    """Return the description of a schema.org JobPosting embedded in the page, if any."""
+    for match in _JD_JSON_LD_RE.finditer(html):
+        try:
+            data = json.loads(match.group(1))
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            data = data.get("@graph", [data])
+        items = data if isinstance(data, list) else []
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            types = item.get("@type")
+            if not isinstance(types, list):
+                types = [types]
+            if "JobPosting" in types and item.get("description"):
+                description = item["description"]
+                # The description is itself HTML more often than not
+                if "<" in description:
+                    return extract_main_text(description, use_json_ld=False)
+                return _clean_extracted_text([description])
+    return ""
+
+
+@functools.lru_cache(maxsize=1)
+def _lxml_etree():
+    """Return lxml.etree when lxml is installed, else None."""
+    try:
+        return importlib.import_module("lxml.etree")
+    except ImportError:
+        return None
+
+
+def extract_main_text(html, parser=None, use_json_ld=True):
+    """Extract the main text of an HTML page (a job posting) in a single pass.
+
+    A schema.org JobPosting description embedded in the page is preferred
+    when present. parser is "lxml", "html.parser" or None for
+    JOB_HTML_PARSER ("auto" uses lxml when it is installed).
+    """
+    if use_json_ld and "application/ld+json" in html:
+        description = _job_description_from_json_ld(html)
+        if description:
+            return description
+    
+    parser = parser or JOB_HTML_PARSER
+    etree = _lxml_etree() if parser in ("auto", "lxml") else None
+    if parser == "lxml" and etree is None:
+        raise ImportError("lxml is not installed (pip install lxml)")
+    
+    for skip_forms in (True, False):
+        scorer = _DensityScorer(skip_forms)
+        if etree is not None:
+            lxml_parser = etree.HTMLParser(target=scorer, remove_comments=True, remove_pis=True)
+            lxml_parser.feed(html)
+            text = lxml_parser.close()
+        else:
+            text = _feed_with_stdlib_parser(scorer, html)
+        # Nothing outside forms: the page is wrapped in one (ASP.NET and the like)
+        if text or "<form" not in html.lower():
+            return text
+    return text
+
+
+def normalize_text(text):
+    """Normalize whitespace so cosmetic differences don't change cache keys."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
+    return text.strip()
+
+
+class DiskCache:
+    """Persistent key/value cache stored in a single SQLite file.
+
+    Values are JSON-serializable objects kept zlib-compressed. Every read
+    refreshes an entry's access time, and once the stored size exceeds
+    max_bytes the least recently used entries are evicted. Safe to share
+    between threads and between processes using the same file.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, enabled=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @staticmethod
+    def make_key(*parts):
+        """Hash arbitrary JSON-serializable parts into a content address."""
+        payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+        return self._conn
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss."""
+        if not self.enabled:
+            return default
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def set(self, key, value):
+        """Store value under key and evict old entries if over the size cap."""
+        if not self.enabled:
+            return
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time())
+            )
+            self._evict(conn)
+
+    def delete(self, key):
+        """Remove a single entry."""
+        with self._lock:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._connection().execute("DELETE FROM cache")
+            self.hits = 0
+            self.misses = 0
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Walk entries from least to most recently used until back under the cap
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM cache WHERE key = ?", stale)
+
+    def stats(self):
+        """Return hit/miss counters and current entry count and size."""
+        with self._lock:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+# Intermediate document model shared by the txt, docx and pdf writers.
+# A Block is one line of the optimized resume: kind is "blank", "heading",
+# "bullet" or "paragraph", align is "left", "center" or "right", and prefix
+# holds the original indentation and bullet marker for plain-text output.
+# A Span is a run of inline text styled "plain", "bold", "italic", "metric"
+# or "link" (url is only set for links).
+Span = namedtuple("Span", "style text url")
+Block = namedtuple("Block", "kind align spans prefix")
+
+# All inline markup in one alternation. At any position the alternatives are
+# tried in order, so when two markers start at the same place metrics win
+# over links, links over bold and bold over italics.
+_INLINE_MARKUP_RE = re.compile(
+    r'\*\*\[(?P<metric>.*?)\]\*\*'
+    r'|\[(?P<link_text>.*?)\]\((?P<link_url>.*?)\)'
+    r'|\*\*(?P<bold>.*?)\*\*'
+    r'|_(?P<italic>.*?)_'
+)
+
+# Metrics (numbers with % or $ signs) highlighted when extracting DOCX resumes
+_METRICS_RE = re.compile(r'\b(\d+%|\$\d+(?:,\d+)*(?:\.\d+)?|\d+\s*%|\d+\s*(?:percent|pct))\b', re.IGNORECASE)
+
+# A line that is bold from start to end is a heading
+_HEADING_RE = re.compile(r'^\s*\*\*(.*?)\*\*\s*$')
+
+
+def _parse_inline(text):
+    """Split a line into styled spans in a single left-to-right scan."""
+    spans = []
+    position = 0
+    for match in _INLINE_MARKUP_RE.finditer(text):
+        if match.start() > position:
+            spans.append(Span("plain", text[position:match.start()], ""))
+        if match.group("metric") is not None:
+            spans.append(Span("metric", match.group("metric"), ""))
+        elif match.group("link_text") is not None:
+            spans.append(Span("link", match.group("link_text"), match.group("link_url")))
+        elif match.group("bold") is not None:
+            spans.append(Span("bold", match.group("bold"), ""))
+        else:
+            spans.append(Span("italic", match.group("italic"), ""))
+        position = match.end()
+    if position < len(text):
+        spans.append(Span("plain", text[position:], ""))
+    return tuple(spans)
+
+
+@functools.lru_cache(maxsize=64)
+def parse_resume_markup(content):
+    """Parse optimized resume markup into a tuple of Blocks.
+
+    Understands <center>/<right> line tags, whole-line **headings**, bullet
+    lines starting with • or -, and inline **[metric]**, [text](url),
+    **bold** and _italic_ markup. The result is immutable and memoized, so
+    saving one resume in several formats parses it only once.
+    """
+    blocks = []
+    for line in content.split('\n'):
+        if not line.strip():
+            blocks.append(Block("blank", "left", (), ""))
+            continue
+        
+        # Check for alignment tags
+        align = "left"
+        processed_line = line
+        if line.startswith('<center>') and line.endswith('</center>'):
+            align = "center"
+            processed_line = line[8:-9]  # Remove tags
+        elif line.startswith('<right>') and line.endswith('</right>'):
+            align = "right"
+            processed_line = line[7:-8]  # Remove tags
+        
+        # Check if line is a heading (bold)
+        heading = _HEADING_RE.match(processed_line)
+        if heading:
+            blocks.append(Block("heading", align, (Span("bold", heading.group(1), ""),), ""))
+            continue
+        
+        # Handle bullet points, remembering indentation and marker for plain text
+        stripped = processed_line.lstrip()
+        if stripped.startswith('•') or stripped.startswith('-'):
+            bullet_text = stripped[1:].strip()
+            prefix = processed_line[:len(processed_line) - len(stripped)] + stripped[0] + " "
+            blocks.append(Block("bullet", align, _parse_inline(bullet_text), prefix))
+            continue
+        
+        blocks.append(Block("paragraph", align, _parse_inline(processed_line), ""))
+    return tuple(blocks)
+
+
+def render_plain_text(blocks):
+    """Render parsed resume blocks as plain text without formatting markers."""
+    lines = []
+    for block in blocks:
+        parts = [block.prefix]
+        for span in block.spans:
+            if span.style == "link":
+                parts.append(f"{span.text} ({span.url})")
+            else:
+                parts.append(span.text)
+        lines.append("".join(parts))
+    return "\n".join(lines)
+
+
+def _xml_escape(text, quote=False):
+    """Escape &, < and > (and " when quote is set) for ReportLab markup.
+
+    xml.sax.saxutils would do the same but imports urllib.request on load.
+    """
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    if quote:
+        text = text.replace('"', "&quot;")
+    return text
+
+
+def _pdf_markup(spans):
+    """Convert spans to ReportLab paragraph markup."""
+    parts = []
+    for span in spans:
+        text = _xml_escape(span.text)
+        if span.style in ("bold", "metric"):
+            # Metrics are just made bold, no highlighting
+            parts.append(f"<b>{text}</b>")
+        elif span.style == "italic":
+            parts.append(f"<i>{text}</i>")
+        elif span.style == "link":
+            url = _xml_escape(span.url, quote=True)
+            parts.append(f'<link href="{url}">{text}</link>')
+        else:
+            parts.append(text)
+    return "".join(parts)
+
+
+# Words that carry no signal for keyword matching: English stopwords plus
+# boilerplate that appears in nearly every job posting
+_ATS_STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can
+could do does each etc for from had has have how i if in into is it its may more most
+must no not of on or other our out over per should so such than that the their them
+then there these they this those through to under up us use using via was we well were
+what when where which while who will with within would you your
+ability able applicant applicants apply benefits candidate candidates company description employer
+duties environment equal etc excellent experience full including job join looking new
+opportunity plus position preferred related required requirements responsibilities role
+skills strong team work working year years
+one two three four five six seven eight nine ten eleven twelve fifteen twenty thirty forty
+fifty hundred hundreds thousand thousands million millions billion billions trillion dozens
+first second third once twice half
+d ll m re s t ve
+""".split())
+
+# Background document frequencies for keyword IDF, built from a directory
+# of real job postings with the ats-background command, so that a single
+# pair is weighted the way a large batch would be. Without one, IDF comes
+# from the job descriptions being scored.
+ATS_BACKGROUND_PATH = os.getenv("RESUME_OPTIMIZER_ATS_BACKGROUND", "")
+
+# "Austin, TX": a city (one or more capitalized words) and a US state code
+_ATS_US_STATES = frozenset("""
+AL AK AZ AR CA CO CT DC DE FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS MO MT NE NV NH NJ
+NM NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA WV WI WY
+""".split())
+_ATS_LOCATION_RE = re.compile(r"\b((?:[A-Z][a-z]+ )*[A-Z][a-z]+), ([A-Z]{2})\b")
+_ATS_SENTENCE_RE = re.compile(r"[.!?;:]\s+|\s+[-–—|]\s+")
+# "Northwind Analytics builds ...": the employer introducing itself
+_ATS_EMPLOYER_RE = re.compile(
+    r"\s*((?:[A-Z][A-Za-z0-9&]* )+)(?:is|are|builds|makes|helps|powers|partners|provides|offers|creates|develops)\b"
+)
+_ATS_WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9+#'-]*")
+
+# Tokens keep inner + # . / - so terms like c++, c#, node.js and ci/cd survive
+_ATS_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+_ATS_MARKUP_RE = re.compile(r"</?(?:center|right|table)>|\*\*|\]\([^)]*\)")
+# Bare numbers like 6+, 3.5, 24/7 and 10%
+_ATS_NUMBER_RE = re.compile(r"[0-9][0-9.,/+%-]*")
+
+
+def ats_terms(text):
+    """Tokenize text into ATS match terms with their counts.
+
+    Terms are lowercased words minus stopwords and numbers, plus
+    adjacent word pairs (e.g. "machine learning") so multi-word skills can
+    be matched as a unit.
+    """
+    counts = Counter()
+    for line in _ATS_MARKUP_RE.sub(" ", text.lower()).split("\n"):
+        previous = None
+        for token in _ATS_TOKEN_RE.findall(line):
+            if token in _ATS_STOPWORDS or _ATS_NUMBER_RE.fullmatch(token):
+                previous = None
+                continue
+            counts[token] += 1
+            if previous:
+                counts[f"{previous} {token}"] += 1
+            previous = token
+    return counts
+
+
+def ats_proper_nouns(text):
+    """Return the lowercased names of places and organizations in a job description.
+
+    Names are found by the way postings introduce them, not by looking
+    words up: the subject of a sentence introducing the employer ("Acme
+    Labs builds ...") and a city before a US state code ("Austin, TX", code
+    included). Words that also appear in lowercase are not names.
+    """
+    names = set()
+    lowercase = set()
+    for line in text.split("\n"):
+        lowercase.update(word for word in _ATS_WORD_RE.findall(line) if word.islower())
+        for sentence in _ATS_SENTENCE_RE.split(line):
+            subject = _ATS_EMPLOYER_RE.match(sentence)
+            if subject and subject.group(1).split()[0].lower() not in _ATS_STOPWORDS:
+                names.update(subject.group(1).lower().split())
+    for city, state in _ATS_LOCATION_RE.findall(text):
+        if state in _ATS_US_STATES:
+            names.add(state.lower())
+            names.update(city.lower().split())
+    return names - lowercase - _ATS_STOPWORDS
+
+
+def build_ats_background(job_descriptions):
+    """Count the job descriptions each ATS term appears in.
+
+    Returns {"documents": n, "document_frequency": {term: count}}, the
+    format ATSScorer takes as its background and ats-background writes.
+    """
+    document_frequency = Counter()
+    documents = 0
+    for job_description in job_descriptions:
+        document_frequency.update(ats_terms(job_description).keys())
+        documents += 1
+    return {"documents": documents, "document_frequency": dict(document_frequency)}
+
+
+def load_ats_background(path=ATS_BACKGROUND_PATH):
+    """Load background document frequencies written by ats-background (None without a path)."""
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ATSScorer:
+    """Deterministic keyword match scorer for resume/job description pairs.
+
+    Job description terms are weighted BM25-style: term frequency saturated
+    with k1, times an IDF over the job descriptions being scored plus an
+    optional background corpus (see build_ats_background), so words every
+    posting uses count less than distinctive skills. Names of companies
+    and places are not keywords. The top keywords are then checked against
+    the resume, whose term frequencies are saturated and length-normalized
+    with the same parameters. The match percentage is the weighted share of
+    keywords the resume covers.
+    """
+
+    def __init__(self, k1=1.2, b=0.75, max_keywords=40, background=None):
+        self.k1 = k1
+        self.b = b
+        self.max_keywords = max_keywords
+        background = background or {"documents": 0, "document_frequency": {}}
+        self.background_documents = background["documents"]
+        self.background_frequency = background["document_frequency"]
+
+    def score(self, resume_text, job_description):
+        """Score one pair; see score_batch for the result format."""
+        return self.score_batch([(resume_text, job_description)])[0]
+
+    def score_batch(self, pairs):
+        """Score (resume_text, job_description) pairs.
+
+        Returns one dict per pair with "score" (0-100), and "matched" and
+        "missing" keyword lists ordered by weight. Keyword weights and resume
+        coverage form a sparse pairs x keywords matrix, one entry per pair
+        and keyword, so the work grows with the number of pairs; the final
+        scoring is a single matrix operation (numpy when installed).
+        """
+        if not pairs:
+            return []
+        k1 = self.k1
+        job_counts = [ats_terms(job_description) for _, job_description in pairs]
+        resume_counts = [ats_terms(resume_text) for resume_text, _ in pairs]
+        
+        # Document frequency across the distinct job descriptions in the batch,
+        # on top of the background corpus
+        distinct_jobs = {job_description: counts for (_, job_description), counts in zip(pairs, job_counts)}
+        document_count = self.background_documents + len(distinct_jobs)
+        document_frequency = Counter()
+        for counts in distinct_jobs.values():
+            document_frequency.update(counts.keys())
+        names = {job_description: ats_proper_nouns(job_description) for job_description in distinct_jobs}
+        
+        resume_lengths = [sum(counts.values()) for counts in resume_counts]
+        average_length = (sum(resume_lengths) / len(resume_lengths)) or 1
+        
+        # Pick each posting's keywords; word pairs only count when repeated.
+        # Ties keep the order terms first appear in the posting.
+        keyword_lists = []
+        for (_, job_description), counts in zip(pairs, job_counts):
+            job_names = names[job_description]
+            weighted = []
+            for term, frequency in counts.items():
+                if " " in term and frequency < 2:
+                    continue
+                if job_names and any(word in job_names for word in term.split(" ")):
+                    continue
+                df = self.background_frequency.get(term, 0) + document_frequency[term]
+                idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+                weighted.append((idf * frequency * (k1 + 1) / (frequency + k1), term))
+            weighted.sort(key=lambda item: -item[0])
+            keyword_lists.append(weighted[:self.max_keywords])
+        
+        # Sparse matrix entries: rows[n] is the pair of keyword n, weights[n]
+        # its weight and coverage[n] the resume saturation capped at 1
+        rows = []
+        weights = []
+        coverage = []
+        for i, keywords in enumerate(keyword_lists):
+            norm = 1 - self.b + self.b * resume_lengths[i] / average_length
+            for weight, term in keywords:
+                frequency = resume_counts[i].get(term, 0)
+                rows.append(i)
+                weights.append(weight)
+                coverage.append(min(1.0, frequency * (k1 + 1) / (frequency + k1 * norm)) if frequency else 0.0)
+        
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is not None:
+            row_index = np.array(rows, dtype=np.intp)
+            weight_values = np.array(weights, dtype=float)
+            totals = np.bincount(row_index, weights=weight_values, minlength=len(pairs))
+            matched_weight = np.bincount(
+                row_index, weights=weight_values * np.array(coverage, dtype=float), minlength=len(pairs)
+            )
+            scores = np.divide(matched_weight, totals, out=np.zeros_like(totals), where=totals > 0).tolist()
+        else:
+            totals = [0.0] * len(pairs)
+            matched_weight = [0.0] * len(pairs)
+            for i, weight, covered in zip(rows, weights, coverage):
+                totals[i] += weight
+                matched_weight[i] += weight * covered
+            scores = [matched / total if total else 0.0 for matched, total in zip(matched_weight, totals)]
+        
+        results = []
+        for i, keywords in enumerate(keyword_lists):
+            results.append({
+                "score": round(scores[i] * 100, 1),
+                "matched": [term for _, term in keywords if resume_counts[i].get(term)],
+                "missing": [term for _, term in keywords if not resume_counts[i].get(term)]
+            })
+        return results
+
+
+def format_ats_report(match, max_terms=20):
+    """Format an ATSScorer result as an analysis report section."""
+    matched = ", ".join(match["matched"][:max_terms]) or "none"
+    missing = ", ".join(match["missing"][:max_terms]) or "none"
+    return (
+        f"Local ATS Match Score: {match['score']:.0f}%\n"
+        f"(keyword match computed locally against the job description)\n"
+        f"Matched Keywords:\n"
+        f"• {matched}\n"
+        f"Missing Keywords:\n"
+        f"• {missing}"
+    )
+
+
+@dataclass
+class PipelineResult:
+    """Artifacts produced by one run of the optimization pipeline."""
+    resume_text: str = ""
+    job_description: str = ""
+    optimized_resume: str = ""
+    analysis_report: str = ""
+    resume_format: str = ""
+    ats_match: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+
+
+@functools.lru_cache(maxsize=1)
+def _pdf_styles():
+    """Build the PDF stylesheet once per process and reuse it for every render."""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+    
+    styles = getSampleStyleSheet()
+    
+    # Create custom styles
+    styles.add(ParagraphStyle(
+        name='ResumeHeading',
+        parent=styles['Heading1'],
+        fontSize=14,
+        fontName='Helvetica-Bold',
+        spaceAfter=10,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ResumeNormal',
+        parent=styles['Normal'],
+        fontSize=11,
+        spaceAfter=5,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ResumeBold',
+        parent=styles['Normal'],
+        fontSize=11,
+        fontName='Helvetica-Bold',
+        spaceAfter=5,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ResumeCentered',
+        parent=styles['Normal'],
+        fontSize=11,
+        alignment=TA_CENTER,
+        spaceAfter=5,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ResumeCenteredBold',
+        parent=styles['Normal'],
+        fontSize=11,
+        fontName='Helvetica-Bold',
+        alignment=TA_CENTER,
+        spaceAfter=5,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ResumeRight',
+        parent=styles['Normal'],
+        fontSize=11,
+        alignment=TA_RIGHT,
+        spaceAfter=5,
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='ResumeRightBold',
+        parent=styles['Normal'],
+        fontSize=11,
+        fontName='Helvetica-Bold',
+        alignment=TA_RIGHT,
+        spaceAfter=5,
+    ))
+    return styles
+
+
+class ResumeRenderer:
+    """Writers for the optimized resume in txt, docx and pdf.
+
+    Stateless, so worker processes can render without building an engine.
+    All writers render from parse_resume_markup, which is memoized, so
+    saving the same text in several formats parses it only once.
+    """
+
+    def render(self, filename, content, output_format):
+        """Write content to filename in output_format (txt for anything unknown)."""
+        if output_format == "docx":
+            self.write_docx_resume(filename, content)
+        elif output_format == "pdf":
+            self.create_pdf_resume(filename, content)
+        else:
+            self.write_txt_resume(filename, content)
+
+    def create_pdf_resume(self, filename, content):
+        """Create a formatted PDF from the optimized resume text with proper formatting"""
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        
+        doc = SimpleDocTemplate(filename, pagesize=letter)
+        styles = _pdf_styles()
+        
+        # Convert the parsed document to paragraphs
+        story = []
+        
+        for block in parse_resume_markup(content):
+            # Skip empty lines, just add spacing
+            if block.kind == "blank":
+                story.append(Spacer(1, 10))
+                continue
+            
+            if block.kind == "heading":
+                story.append(Paragraph(_pdf_markup(block.spans), styles['ResumeHeading']))
+                continue
+            
+            # Select the appropriate style based on alignment and bold content
+            needs_bold = any(span.style in ("bold", "metric") for span in block.spans)
+            if block.align == "center":
+                alignment_style = 'ResumeCenteredBold' if needs_bold else 'ResumeCentered'
+            elif block.align == "right":
+                alignment_style = 'ResumeRightBold' if needs_bold else 'ResumeRight'
+            else:
+                alignment_style = 'ResumeNormal'
+            
+            processed_line = _pdf_markup(block.spans)
+            if block.kind == "bullet":
+                processed_line = f"• {processed_line}"
+            story.append(Paragraph(processed_line, styles[alignment_style]))
+        
+        # Build the document
+        doc.build(story)
+
+    def write_txt_resume(self, filename, content):
+        """Write the optimized resume as plain text with formatting markers removed"""
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(render_plain_text(parse_resume_markup(content)))
+
+    def write_docx_resume(self, filename, content):
+        """Create a formatted DOCX from the optimized resume text"""
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        
+        alignments = {
+            "left": WD_ALIGN_PARAGRAPH.LEFT,
+            "center": WD_ALIGN_PARAGRAPH.CENTER,
+            "right": WD_ALIGN_PARAGRAPH.RIGHT
+        }
+        
+        # Create a new DOCX with formatting
+        doc = docx.Document()
+        
+        for block in parse_resume_markup(content):
+            if block.kind == "blank":
+                # Keep empty lines as empty paragraphs
+                doc.add_paragraph()
+                continue
+            
+            # Create paragraph with proper alignment
+            para = doc.add_paragraph()
+            para.alignment = alignments[block.align]
+            
+            if block.kind == "bullet":
+                para.style = 'List Bullet'
+            
+            for span in block.spans:
+                if span.style == "metric":
+                    self._add_highlighted_run(para, span.text)
+                elif span.style == "link":
+                    self._add_hyperlink(doc, para, span.text, span.url)
+                elif span.style == "bold":
+                    self._add_bold_run(para, span.text)
+                elif span.style == "italic":
+                    self._add_italic_run(para, span.text)
+                else:
+                    para.add_run(span.text)
+        
+        # Save the document
+        doc.save(filename)
+
+    def _add_bold_run(self, paragraph, text):
+        """Add a bold run to a Word paragraph"""
+        run = paragraph.add_run(text)
+        run.bold = True
+        return text
+
+    def _add_highlighted_run(self, paragraph, text):
+        """Add a bold run to a Word paragraph (without highlighting)"""
+        run = paragraph.add_run(text)
+        run.bold = True
+        return text
+    
+    def _add_italic_run(self, paragraph, text):
+        """Add an italic run to a Word paragraph"""
+        run = paragraph.add_run(text)
+        run.italic = True
+        return text
+
+    def _add_hyperlink(self, document, paragraph, text, url):
+        """Add a hyperlink to a Word paragraph"""
+        from docx.shared import RGBColor
+        from docx.oxml.shared import OxmlElement, qn
+        
+        try:
+            # Create relationship for hyperlink
+            rel_id = document.part.relate_to(url, docx.opc.constants.RELATIONSHIP_TYPE.HYPERLINK, is_external=True)
+            
+            # Create the hyperlink XML element
+            hyperlink = OxmlElement('w:hyperlink')
+            hyperlink.set(qn('r:id'), rel_id)
+            
+            # Create the run element
+            run = OxmlElement('w:r')
+            
+            # Create run properties
+            rPr = OxmlElement('w:rPr')
+            
+            # Set hyperlink style
+            color = OxmlElement('w:color')
+            color.set(qn('w:val'), '0000FF')  # Blue
+            rPr.append(color)
+            
+            # Add underline
+            u = OxmlElement('w:u')
+            u.set(qn('w:val'), 'single')
+            rPr.append(u)
+            
+            run.append(rPr)
+            
+            # Add text to the run
+            t = OxmlElement('w:t')
+            t.text = text
+            run.append(t)
+            
+            # Add the run to the hyperlink
+            hyperlink.append(run)
+            
+            # Add the hyperlink to the paragraph
+            paragraph._p.append(hyperlink)
+            
+            return text
+        except Exception as e:
+            # Fallback if hyperlink creation fails
+            run = paragraph.add_run(text)
+            run.font.color.rgb = RGBColor(0, 0, 255)  # Blue
+            run.font.underline = True
+            return text
+
+
+
+_renderer = ResumeRenderer()
+
+
+def render_resume_file(filename, content, output_format):
+    """Render content to filename atomically and return (filename, size).
+
+    Writes to a temporary file in the same directory, then renames it over
+    the target, so readers only ever see complete files. Runs in process
+    pool workers as well as in-process.
+    """
+    directory, name = os.path.split(os.path.abspath(filename))
+    base, extension = os.path.splitext(name)
+    temp_path = os.path.join(directory, f".{base}.{os.getpid()}.{threading.get_ident()}.tmp{extension}")
+    try:
+        _renderer.render(temp_path, content, output_format)
+        os.replace(temp_path, filename)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return filename, os.path.getsize(filename)
+
+
+def _open_docx_text_only(docx_file):
+    """Open a DOCX (a path or a binary file object) with python-docx, leaving out unused parts.
+
+    python-docx loads every part of the package into memory: photos, logos,
+    themes and style variants included, none of which text extraction
+    reads. The package is read through python-docx's own reader, except
+    that only the parts it parses as XML (document, styles, numbering, ...)
+    and the relationships are decompressed; every other part loads empty.
+    That reader is built on python-docx internals, checked against the
+    versions requirements.txt allows; if they have changed, the whole
+    package is loaded with docx.Document instead.
+    """
+    try:
+        return _open_docx_parts(docx_file)
+    except (ImportError, AttributeError, TypeError) as e:
+        print(
+            f"python-docx internals have changed ({type(e).__name__}: {e}); loading the whole DOCX package",
+            file=sys.stderr
+        )
+        if hasattr(docx_file, "seek"):
+            docx_file.seek(0)
+        return docx.Document(docx_file)
+
+
+def _open_docx_parts(docx_file):
+    """_open_docx_text_only's reader: python-docx's package loading with non-XML parts left empty."""
+    from docx.opc.constants import CONTENT_TYPE as CT
+    from docx.opc.package import Unmarshaller
+    from docx.opc.packuri import PACKAGE_URI
+    from docx.opc.part import PartFactory, XmlPart
+    from docx.opc.phys_pkg import _ZipPkgReader
+    from docx.opc.pkgreader import PackageReader, _ContentTypeMap
+    from docx.package import Package
+    
+    class TextOnlyZipReader(_ZipPkgReader):
+        def __new__(cls, pkg_file):
+            # PhysPkgReader.__new__ would pick the stock zip reader
+            return object.__new__(cls)
+        
+        def __init__(self, pkg_file):
+            super().__init__(pkg_file)
+            self.content_types = _ContentTypeMap.from_xml(self.content_types_xml)
+        
+        def blob_for(self, pack_uri):
+            if not pack_uri.endswith(".rels") and pack_uri != "/[Content_Types].xml":
+                content_type = self.content_types[pack_uri]
+                part_type = PartFactory.part_type_for.get(content_type, PartFactory.default_part_type)
+                if not issubclass(part_type, XmlPart):
+                    return b""
+            return super().blob_for(pack_uri)
+    
+    phys_reader = TextOnlyZipReader(docx_file)
+    try:
+        pkg_srels = PackageReader._srels_for(phys_reader, PACKAGE_URI)
+        sparts = PackageReader._load_serialized_parts(phys_reader, pkg_srels, phys_reader.content_types)
+    finally:
+        phys_reader.close()
+    package = Package()
+    Unmarshaller.unmarshal(PackageReader(phys_reader.content_types, pkg_srels, sparts), package, PartFactory)
+    document_part = package.main_document_part
+    if document_part.content_type != CT.WML_DOCUMENT_MAIN:
+        raise ValueError(f"not a Word file, content type is '{document_part.content_type}'")
+    return document_part.document
+
+
+def parse_docx(docx_file):
+    """Parse a DOCX file (a path or a binary file object) into (plain text, formatted markup).
+
+    Walks the body XML once in document order, so tables appear where they
+    sit in the resume. Output is accumulated in lists and joined at the
+    end, style names are resolved once per style, and cells that span
+    several grid columns or continue a vertical merge are emitted once.
+    """
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    from docx.table import Table, _Cell
+    from docx.text.paragraph import Paragraph
+    
+    text_parts = []
+    formatted_parts = []
+    
+    try:
+        doc = _open_docx_text_only(docx_file)
+        style_names = {}
+        paragraph_tag = qn('w:p')
+        table_tag = qn('w:tbl')
+        
+        for element in doc.element.body.iterchildren():
+            if element.tag == paragraph_tag:
+                para = Paragraph(element, doc)
+                para_full_text = para.text
+                
+                # Skip empty paragraphs
+                if not para_full_text.strip():
+                    formatted_parts.append("\n")
+                    text_parts.append("\n")
+                    continue
+                
+                # Check alignment
+                alignment_tag_start = ""
+                alignment_tag_end = ""
+                
+                alignment = para.alignment
+                if alignment == WD_ALIGN_PARAGRAPH.CENTER:
+                    alignment_tag_start = "<center>"
+                    alignment_tag_end = "</center>"
+                elif alignment == WD_ALIGN_PARAGRAPH.RIGHT:
+                    alignment_tag_start = "<right>"
+                    alignment_tag_end = "</right>"
+                
+                # Style lookups walk the styles part, so resolve each id once
+                style_id = element.style
+                style_name = style_names.get(style_id)
+                if style_name is None:
+                    style_name = style_names[style_id] = para.style.name or ""
+                
+                # Check if the paragraph is a heading
+                if style_name.startswith('Heading'):
+                    formatted_parts.append(f"{alignment_tag_start}**{para_full_text}**{alignment_tag_end}\n")
+                    text_parts.append(para_full_text + "\n")
+                    continue
+                
+                # Check for bullet lists
+                bullet_prefix = "• " if style_name.startswith('List') else ""
+                
+                # Process runs for formatting within paragraphs
+                run_texts = []
+                formatted_runs = []
+                for run in para.runs:
+                    run_text = run.text
+                    bold = run.bold
+                    italic = run.italic
+                    
+                    # Apply formatting based on run properties
+                    if bold and italic:
+                        formatted_runs.append(f"**_{run_text}_**")
+                    elif bold:
+                        formatted_runs.append(f"**{run_text}**")
+                    elif italic:
+                        formatted_runs.append(f"_{run_text}_")
+                    else:
+                        formatted_runs.append(run_text)
+                    run_texts.append(run_text)
+                
+                # Mark metrics (numbers with % or $ signs) for highlighting
+                formatted_para = _METRICS_RE.sub(r'**[\1]**', "".join(formatted_runs))
+                
+                formatted_parts.append(f"{alignment_tag_start}{bullet_prefix}{formatted_para}{alignment_tag_end}\n")
+                text_parts.append(bullet_prefix + "".join(run_texts) + "\n")
+            
+            elif element.tag == table_tag:
+                table = Table(element, doc)
+                
+                # Add table marker
+                formatted_parts.append("<table>\n")
+                for tr in element.tr_lst:
+                    row_cells = []
+                    for tc in tr.tc_lst:
+                        # Cells spanning columns are a single tc already;
+                        # vertically merged continuations repeat the cell above
+                        if tc.vMerge == "continue":
+                            continue
+                        row_cells.append(_Cell(tc, table).text.strip())
+                    
+                    text_parts.append("".join(cell + "\t" for cell in row_cells) + "\n")
+                    formatted_parts.append(
+                        "".join(_METRICS_RE.sub(r'**[\1]**', cell) + "\t" for cell in row_cells) + "\n"
+                    )
+                
+                formatted_parts.append("</table>\n")
+                text_parts.append("\n")
+        
+        text = "".join(text_parts)
+        formatted_text = "".join(formatted_parts)
+            
+    except Exception as e:
+        # If advanced parsing fails, fall back to simple extraction
+        print(
+            f"Could not read DOCX formatting ({type(e).__name__}: {e}); extracting plain paragraph text",
+            file=sys.stderr
+        )
+        if hasattr(docx_file, "seek"):
+            docx_file.seek(0)
+        doc = docx.Document(docx_file)
+        text = "".join(para.text + "\n" for para in doc.paragraphs)
+        formatted_text = text
+    
+    # python-docx's parts and package refer to each other, so the document
+    # is only freed by the next full garbage collection; empty its body XML
+    # (the bulk of it) now. One child at a time: clearing the root instead
+    # is quadratic in the number of tables.
+    for element in doc.element.body.iterchildren():
+        element.clear()
+    return text, formatted_text
+
+
+def resume_cache_key(resume_format, digest):
+    """Parsed-resume cache key for a file's format and SHA-256 hex digest."""
+    return DiskCache.make_key("resume", EXTRACTOR_VERSION, resume_format, digest)
+
+
+def parse_resume_file(path):
+    """Parse a PDF or DOCX resume into (plain text, formatted text).
+
+    Runs entirely in the calling process, so it can be sent to the process
+    pool as is.
+    """
+    resume_format = detect_resume_format(path)
+    if resume_format == 'pdf':
+        # A mapped file (not the path) keeps page extraction in this process
+        with open_mapped(path) as stream:
+            text = "".join(page + "\n" for page in iter_pdf_pages(stream))
+        return text, text
+    if resume_format == 'docx':
+        # python-docx reads the parts it needs straight from the zip on disk
+        return parse_docx(path)
+    raise ValueError("Unsupported file format. Please use PDF or DOCX files.")
+
+
+class ResumeOptimizerEngine(ResumeRenderer):
+    """Headless resume optimization pipeline.
+
+    Holds the fetch -> extract -> optimize -> analyze -> render stages with no
+    dependency on Tk, so the same code serves the GUI, the CLI and batch runs.
+    Stage methods raise on failure and leave error reporting to the caller.
+    """
+
+    def __init__(self, llm_cache=None, resume_cache=None, http_cache=None, scheduler=None,
+                 priority=PRIORITY_INTERACTIVE, metrics=None, router=None):
+        if llm_cache is None:
+            llm_cache = DiskCache(
+                os.path.join(CACHE_DIR, "llm_responses.sqlite3"),
+                max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+                enabled=not CACHE_DISABLED
+            )
+        if resume_cache is None:
+            resume_cache = DiskCache(
+                os.path.join(CACHE_DIR, "parsed_resumes.sqlite3"),
+                max_bytes=int(RESUME_CACHE_MAX_MB * 1024 * 1024),
+                enabled=not CACHE_DISABLED
+            )
+        if http_cache is None:
+            http_cache = DiskCache(
+                os.path.join(CACHE_DIR, "http.sqlite3"),
+                max_bytes=int(HTTP_CACHE_MAX_MB * 1024 * 1024),
+                enabled=not CACHE_DISABLED
+            )
+        self.llm_cache = llm_cache
+        self.resume_cache = resume_cache
+        self.http_cache = http_cache
+        self.ats_scorer = ATSScorer(background=load_ats_background())
+        # LLM calls from this engine queue at this priority
+        self.scheduler = scheduler or get_llm_scheduler()
+        self.priority = priority
+        self.metrics = metrics or get_metrics()
+        self.router = router or get_model_router()
+
+    def extract_text_from_pdf(self, pdf_file, max_pages=None):
+        """Extract text from a PDF file (a path or a binary file object).
+
+        Pages come from iter_pdf_pages, which fans large documents given by
+        path out over the process pool. The second element of the returned
+        tuple is always None: the raw bytes were never used after parsing.
+        """
+        text = "".join(page + "\n" for page in iter_pdf_pages(pdf_file, max_pages))
+        return text, None
+
+    def extract_text_from_docx(self, docx_file, keep_content=False):
+        """Extract text from a DOCX file (a path or a binary file object) with formatting information.
+
+        The second element of the returned tuple is the file's raw bytes when
+        keep_content is set and None otherwise, so callers that only want
+        the text don't hold a copy of the file.
+        """
+        docx_content = None
+        if keep_content:
+            if isinstance(docx_file, (str, os.PathLike)):
+                with open(docx_file, 'rb') as file:
+                    docx_content = file.read()
+            else:
+                docx_content = docx_file.read()
+                docx_file.seek(0)
+        
+        text, formatted_text = self._parse_docx(docx_file)
+        return formatted_text or text, docx_content
+
+    def _parse_docx(self, docx_file):
+        """Parse a DOCX file into (plain text, formatted markup); see parse_docx."""
+        return parse_docx(docx_file)
+
+    def fetch_url(self, url, use_cache=True):
+        """Fetch a page through the shared session and the on-disk HTTP cache (timed as "fetch")."""
+        with self.metrics.span("fetch") as span:
+            text = self._fetch_url(url, use_cache)
+            span.bytes = len(text)
+        return text
+
+    def _fetch_url(self, url, use_cache=True):
+        """Fetch a page through the shared session and the on-disk HTTP cache.
+
+        A cached page is returned without any request while it is fresh
+        (Cache-Control max-age, or HTTP_CACHE_TTL when the server gives none).
+        After that it is revalidated with If-None-Match / If-Modified-Since,
+        so an unchanged posting costs a 304 instead of a full download.
+        """
+        use_cache = use_cache and self.http_cache.enabled
+        key = DiskCache.make_key("http", url)
+        cached = self.http_cache.get(key) if use_cache else None
+        
+        headers = {}
+        if cached is not None:
+            if time.time() - cached["fetched_at"] < cached["max_age"]:
+                return cached["text"]
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        response = get_http_session().get(
+            url,
+            headers=headers,
+            timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        )
+        
+        max_age = _cache_max_age(response.headers.get("Cache-Control", ""))
+        if max_age is None:
+            max_age = HTTP_CACHE_TTL
+        
+        if response.status_code == 304 and cached is not None:
+            # Not modified: keep the stored body, refresh its freshness window
+            cached["fetched_at"] = time.time()
+            cached["max_age"] = max(max_age, 0)
+            self.http_cache.set(key, cached)
+            return cached["text"]
+        
+        response.raise_for_status()
+        
+        if use_cache and max_age >= 0:
+            self.http_cache.set(key, {
+                "text": response.text,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "max_age": max_age
+            })
+        return response.text
+
+    def extract_job_description(self, url):
+        """Extract job description from a URL."""
+        html = self.fetch_url(url)
+        with self.metrics.span("parse_job", bytes=len(html)):
+            return extract_main_text(html)
+
+    def optimize_resume(self, resume_text, job_description, use_cache=True, on_chunk=None, usage=None):
+        """Use OpenAI API to optimize resume for the job description.
+
+        Pass on_chunk to stream the completion: it is called with each piece
+        of text as it arrives, and the assembled text is still returned.
+        Long resumes are optimized section by section (optimize_sections).
+        Token usage reported by the provider is added to usage (a TokenUsage).
+        """
+        sections = self._resume_sections(resume_text)
+        if sections:
+            return self.optimize_sections(sections, job_description, use_cache, on_chunk, usage)
+        return self._cached_completion(
+            OPTIMIZE_SYSTEM_PROMPT, OPTIMIZE_USER_PROMPT, resume_text, job_description,
+            temperature=0.2, use_cache=use_cache, on_chunk=on_chunk, task="optimize", usage=usage
+        )
+
+    def _resume_sections(self, resume_text):
+        """Sections to optimize separately, or None when the resume goes in one request."""
+        if count_tokens(resume_text) >= SECTION_SPLIT_MIN_TOKENS:
+            sections = split_resume_sections(resume_text)
+            if len(sections) > 1:
+                return sections
+        return None
+
+    def optimize_sections(self, sections, job_description, use_cache=True, on_chunk=None, usage=None):
+        """Optimize (text, separator) sections concurrently and reassemble them in order.
+
+        Every section is its own request with the job description as shared
+        context, so the wall time is about that of the longest section. Each
+        section is cached on its own: after a failure, or an edit to one
+        section, only the missing sections are requested again. Streamed
+        chunks are delivered in section order. Raises the first section error.
+        """
+        stream = _OrderedStream(on_chunk, [separator for _, separator in sections]) if on_chunk else None
+        
+        def optimize_section(index, text):
+            try:
+                return self._cached_completion(
+                    OPTIMIZE_SYSTEM_PROMPT, OPTIMIZE_SECTION_USER_PROMPT, text, job_description,
+                    temperature=0.2, use_cache=use_cache,
+                    on_chunk=stream.chunk_callback(index) if stream else None,
+                    task="optimize", stage="optimize_section", usage=usage
+                )
+            finally:
+                if stream:
+                    stream.finish(index)
+        
+        with self.metrics.span("optimize") as span:
+            with ThreadPoolExecutor(max_workers=min(len(sections), 8)) as pool:
+                futures = [pool.submit(optimize_section, index, text) for index, (text, _) in enumerate(sections)]
+            results = [future.result() for future in futures]
+            optimized = "".join(
+                (result or "").strip("\n") + separator for result, (_, separator) in zip(results, sections)
+            )
+            span.bytes = len(optimized)
+        return optimized
+
+    def generate_analysis_report(self, resume_text, job_description, use_cache=True, on_chunk=None, usage=None):
+        """Generate a summary analysis report comparing resume to job description.
+
+        Supports streaming through on_chunk and usage like optimize_resume.
+        """
+        return self._cached_completion(
+            ANALYSIS_SYSTEM_PROMPT, ANALYSIS_USER_PROMPT, resume_text, job_description,
+            temperature=0.3, use_cache=use_cache, on_chunk=on_chunk, task="analyze", usage=usage
+        )
+
+    async def aoptimize_resume(self, resume_text, job_description, use_cache=True, usage=None):
+        """optimize_resume for the event loop; sections are requested concurrently.
+
+        Token counting, cache lookups and metrics files run on the loop's
+        default executor, like every other blocking call.
+        """
+        sections = await asyncio.get_running_loop().run_in_executor(None, self._resume_sections, resume_text)
+        if sections:
+            async with self.metrics.aspan("optimize") as span:
+                results = await asyncio.gather(*(
+                    self._acached_completion(
+                        OPTIMIZE_SYSTEM_PROMPT, OPTIMIZE_SECTION_USER_PROMPT, text, job_description,
+                        temperature=0.2, use_cache=use_cache, task="optimize", stage="optimize_section", usage=usage
+                    )
+                    for text, _ in sections
+                ))
+                optimized = "".join(
+                    (result or "").strip("\n") + separator for result, (_, separator) in zip(results, sections)
+                )
+                span.bytes = len(optimized)
+            return optimized
+        return await self._acached_completion(
+            OPTIMIZE_SYSTEM_PROMPT, OPTIMIZE_USER_PROMPT, resume_text, job_description,
+            temperature=0.2, use_cache=use_cache, task="optimize", usage=usage
+        )
+
+    async def agenerate_analysis_report(self, resume_text, job_description, use_cache=True, usage=None):
+        """generate_analysis_report for the event loop."""
+        return await self._acached_completion(
+            ANALYSIS_SYSTEM_PROMPT, ANALYSIS_USER_PROMPT, resume_text, job_description,
+            temperature=0.3, use_cache=use_cache, task="analyze", usage=usage
+        )
+
+    async def _acached_completion(self, system_prompt, user_prompt, resume_text, job_description,
+                                  temperature, use_cache=True, task="optimize", stage=None, usage=None):
+        """_cached_completion for the event loop."""
+        async with self.metrics.aspan(stage or task) as span:
+            content, tokens, span.cached = await self._acompletion(
+                system_prompt, user_prompt, resume_text, job_description,
+                task, temperature, use_cache, usage
+            )
+            span.bytes = len(content or "")
+            span.tokens = tokens
+        return content
+
+    def _cached_completion(self, system_prompt, user_prompt, resume_text, job_description,
+                           temperature, use_cache=True, on_chunk=None, task="optimize", stage=None, usage=None):
+        """Run a chat completion for task, timed as stage (the task name by default)."""
+        with self.metrics.span(stage or task) as span:
+            content, tokens, span.cached = self._completion(
+                system_prompt, user_prompt, resume_text, job_description,
+                task, temperature, use_cache, on_chunk, usage
+            )
+            span.bytes = len(content or "")
+            span.tokens = tokens
+        return content
+
+    def _completion(self, system_prompt, user_prompt, resume_text, job_description,
+                    task, temperature, use_cache, on_chunk, usage=None):
+        """Run a chat completion, served from the LLM response cache when possible.
+
+        The inputs are first compacted to the prompt token budget, then the
+        router picks the backend and model for the task and prompt size. The
+        cache key covers everything that shapes the answer: the normalized
+        inputs, the backend and model, both prompt templates and the
+        temperature. With on_chunk the request is streamed and a cache hit is
+        delivered as a single chunk. The provider's token usage, if reported,
+        is added to usage.
+        Returns (content, tokens used, whether it was a cache hit).
+        """
+        messages, backend, model, key, cached, estimated_tokens = self._prepare_completion(
+            system_prompt, user_prompt, resume_text, job_description, task, temperature, use_cache
+        )
+        if cached is not None:
+            if on_chunk:
+                on_chunk(cached)
+            return cached, 0, True
+        
+        parts = []
+        reported = []
+        
+        def request():
+            if not on_chunk:
+                response = backend.create(model=model, messages=messages, temperature=temperature)
+                reported.append(getattr(response, "usage", None))
+                return response.choices[0].message.content
+            response = backend.create(
+                model=model, messages=messages, temperature=temperature,
+                stream=True, stream_options={"include_usage": True}
+            )
+            # Hand each delta to the caller as it arrives, assemble the rest
+            for chunk in response:
+                if getattr(chunk, "usage", None):
+                    reported.append(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    on_chunk(delta)
+            return "".join(parts)
+        
+        # A stream that already delivered text can't be retried without repeating it
+        content = self.scheduler.run(
+            request, tokens=estimated_tokens, priority=self.priority,
+            retryable=lambda exc: not parts and is_retryable_llm_error(exc)
+        )
+        return content, self._finish_completion(key, content, estimated_tokens, reported, usage), False
+
+    async def _acompletion(self, system_prompt, user_prompt, resume_text, job_description,
+                           task, temperature, use_cache, usage=None):
+        """_completion for the event loop: the request is awaited on the backend's async client.
+
+        Preparing the prompt (token counting, cache lookup) and settling it
+        (cache write) block, so they run on the loop's default executor.
+        """
+        loop = asyncio.get_running_loop()
+        messages, backend, model, key, cached, estimated_tokens = await loop.run_in_executor(
+            None, self._prepare_completion,
+            system_prompt, user_prompt, resume_text, job_description, task, temperature, use_cache
+        )
+        if cached is not None:
+            return cached, 0, True
+        
+        reported = []
+        
+        async def request():
+            response = await backend.acreate(model=model, messages=messages, temperature=temperature)
+            reported.append(getattr(response, "usage", None))
+            return response.choices[0].message.content
+        
+        content = await self.scheduler.arun(request, tokens=estimated_tokens, priority=self.priority)
+        tokens = await loop.run_in_executor(
+            None, self._finish_completion, key, content, estimated_tokens, reported, usage
+        )
+        return content, tokens, False
+
+    def _prepare_completion(self, system_prompt, user_prompt, resume_text, job_description,
+                            task, temperature, use_cache):
+        """Compact the inputs, build the messages, route them and look up the response cache.
+
+        Returns (messages, backend, model, cache key or None, cached content
+        or None, estimated tokens).
+        """
+        resume_text, job_description = fit_prompt_inputs(system_prompt, user_prompt, resume_text, job_description)
+        messages = build_messages(system_prompt, user_prompt, resume_text, job_description)
+        prompt_tokens = sum(count_tokens(message["content"]) for message in messages)
+        backend, model = self.router.route(task, prompt_tokens)
+        
+        key = None
+        cached = None
+        if use_cache and self.llm_cache.enabled:
+            # Only non-default backends are part of the key, so existing entries stay valid
+            key = DiskCache.make_key(
+                *([backend.base_url] if backend.base_url else []), model, temperature, system_prompt, user_prompt,
+                normalize_text(resume_text), normalize_text(job_description)
+            )
+            cached = self.llm_cache.get(key)
+        return messages, backend, model, key, cached, prompt_tokens + LLM_COMPLETION_TOKEN_ESTIMATE
+
+    def _finish_completion(self, key, content, estimated_tokens, reported, usage):
+        """Settle the token quota and usage, cache the answer; returns the tokens used."""
+        tokens = estimated_tokens
+        if reported and getattr(reported[-1], "total_tokens", None):
+            tokens = reported[-1].total_tokens
+            self.scheduler.record_usage(estimated_tokens, tokens)
+            if usage is not None:
+                usage.add(reported[-1])
+        
+        if key and content:
+            self.llm_cache.set(key, content)
+        return tokens
+
+    def extract_resume(self, resume_path, use_cache=True, keep_content=False):
+        """Extract resume text from a PDF or DOCX file on disk (timed as "extract_resume")."""
+        with self.metrics.span("extract_resume") as span:
+            span.bytes = os.path.getsize(resume_path)
+            return self._extract_resume(resume_path, use_cache, keep_content)
+
+    def _extract_resume(self, resume_path, use_cache=True, keep_content=False):
+        """Extract resume text from a PDF or DOCX file on disk.
+
+        Parsed results are cached by the SHA-256 of the file content plus the
+        extractor version, so an unchanged file is never parsed twice. The
+        file is hashed in chunks and parsed from disk, never read whole.
+        Returns (text, original file content) like the format extractors;
+        the content is None unless keep_content is set.
+        """
+        resume_format = detect_resume_format(resume_path)
+        if resume_format == 'unknown':
+            raise ValueError("Unsupported file format. Please use PDF or DOCX files.")
+        
+        content = None
+        if keep_content:
+            with open(resume_path, 'rb') as file:
+                content = file.read()
+        
+        use_cache = use_cache and self.resume_cache.enabled
+        if use_cache:
+            key = resume_cache_key(resume_format, file_sha256(resume_path))
+            cached = self.resume_cache.get(key)
+            if cached is not None:
+                return cached["formatted"] or cached["text"], content
+        
+        if resume_format == 'pdf':
+            # Parse from the path so large PDFs can be split across processes
+            text, _ = self.extract_text_from_pdf(resume_path)
+            formatted_text = text
+        else:
+            text, formatted_text = self._parse_docx(resume_path)
+        
+        if use_cache and (text or formatted_text):
+            self.resume_cache.set(key, {"text": text, "formatted": formatted_text})
+        return formatted_text or text, content
+
+    def get_job_description(self, job_url="", job_text=""):
+        """Return the job description, preferring pasted text over a URL."""
+        if job_text:
+            return job_text
+        if job_url:
+            job_description = self.extract_job_description(job_url)
+            if not job_description:
+                raise ValueError(f"No job description found at {job_url}")
+            return job_description
+        raise ValueError("Please enter either a job URL or paste the job description")
+
+    def run(self, resume_path, job_url="", job_text="", job_description=None, resume_text=None, usage=None):
+        """Run fetch, extract, optimize and analyze for one resume/job pair.
+
+        Already fetched job descriptions or extracted resume text can be passed
+        in to skip those stages, e.g. when one posting is shared by many resumes.
+        LLM token usage is added to usage (a TokenUsage) when given.
+        """
+        result = PipelineResult(resume_format=detect_resume_format(resume_path))
+        
+        if job_description is None:
+            job_description = self.get_job_description(job_url, job_text)
+        result.job_description = job_description
+        
+        if resume_text is None:
+            resume_text, _ = self.extract_resume(resume_path)
+        if not resume_text:
+            raise ValueError("Could not extract text from the resume")
+        result.resume_text = resume_text
+        
+        result.ats_match = self.ats_scorer.score(resume_text, compact_job_description(job_description))
+        optimized_resume, analysis_report, errors = self.optimize_and_analyze(
+            resume_text, job_description, ats_match=result.ats_match, usage=usage
+        )
+        if "optimize" in errors and "analyze" in errors:
+            raise errors["optimize"]
+        result.optimized_resume = optimized_resume or ""
+        result.analysis_report = analysis_report or ""
+        result.errors = errors
+        return result
+
+    def optimize_and_analyze(self, resume_text, job_description, on_optimize_chunk=None,
+                             on_analysis_chunk=None, ats_match=None, usage=None):
+        """Run the optimize and analysis LLM calls concurrently.
+
+        Neither call depends on the other's output, so a run waits on one model
+        round trip instead of two. A failing call does not discard the other:
+        returns (optimized_resume, analysis_report, errors), where the failed
+        result is None and its exception is stored under "optimize" or "analyze".
+        The chunk callbacks, if given, stream each call (from worker threads).
+        
+        The analysis report opens with the local ATS match section (computed
+        here unless ats_match is passed in), which is streamed first and kept
+        even when the LLM analysis fails.
+        """
+        if ats_match is None:
+            ats_match = self.ats_scorer.score(resume_text, compact_job_description(job_description))
+        ats_section = format_ats_report(ats_match)
+        if on_analysis_chunk:
+            on_analysis_chunk(ats_section + "\n\n")
+        
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = {
+                "optimize": pool.submit(
+                    self.optimize_resume, resume_text, job_description, on_chunk=on_optimize_chunk, usage=usage
+                ),
+                "analyze": pool.submit(
+                    self.generate_analysis_report, resume_text, job_description, on_chunk=on_analysis_chunk, usage=usage
+                )
+            }
+        
+        results = {}
+        errors = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                results[key] = None
+                errors[key] = e
+        
+        analysis_report = ats_section
+        if results["analyze"]:
+            analysis_report += "\n\n" + results["analyze"]
+        return results["optimize"], analysis_report, errors
+
+    def render_resume(self, filename, content, output_format):
+        """Render optimized resume text to filename in the given format.
+
+        The file is written atomically (see render_resume_file), so a reader
+        never sees a half-written resume.
+        """
+        with self.metrics.span("render") as span:
+            _, span.bytes = render_resume_file(filename, content, output_format)
+
+    def submit_render(self, filename, content, output_format):
+        """Render in the shared process pool; returns a Future of (filename, size).
+
+        Batch runs push every render through here, so any number of them
+        share the pool's worker processes instead of the GIL.
+        """
+        return get_process_pool().submit(render_resume_file, filename, content, output_format)
+
+    def export_all(self, base_path, content, formats=EXPORT_FORMATS):
+        """Render content in every format at the same time in worker processes.
+
+        base_path is the output path without extension. Returns
+        {format: filename}; each file is written atomically.
+        """
+        with self.metrics.span("render") as span:
+            futures = {
+                output_format: self.submit_render(base_path + FORMAT_EXTENSIONS[output_format], content, output_format)
+                for output_format in formats
+            }
+            results = {output_format: future.result() for output_format, future in futures.items()}
+            span.bytes = sum(size for _, size in results.values())
+        return {output_format: filename for output_format, (filename, _) in results.items()}
+
+
+# Worker threads never touch Tk directly; their UI updates are queued and
+# applied on the Tk thread once per frame (~60 per second)
+UI_FRAME_MS = 16
+
+
+class UIEventQueue:
+    """Thread-safe queue of UI updates, drained on the Tk thread once per frame.
+
+    post() queues a call to run in order. post_latest() keeps only the newest
+    call for a key (progress), and post_text() joins every chunk for a key
+    into one call (streamed text), so a burst of events costs one redraw.
+    Keyed events merge only with events posted since the last plain post(),
+    which keeps them ordered against it.
+    """
+    
+    def __init__(self, root, interval_ms=UI_FRAME_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._pending = []
+        self._slots = {}
+        self._posted = 0
+        self._run = 0
+        self._frames = 0
+    
+    def start(self):
+        """Begin draining on the Tk thread."""
+        self.root.after(self.interval_ms, self._tick)
+    
+    def post(self, func, *args):
+        """Queue func(*args); it runs after everything queued before it."""
+        with self._lock:
+            self._pending.append([func, args, None])
+            self._slots.clear()
+            self._posted += 1
+    
+    def post_latest(self, key, func, *args):
+        """Queue func(*args), replacing a pending call with the same key."""
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                self._slots[key] = slot = [func, args, None]
+                self._pending.append(slot)
+            else:
+                slot[0], slot[1] = func, args
+            self._posted += 1
+    
+    def post_text(self, key, func, text):
+        """Queue func(text), joining text onto a pending call with the same key."""
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                self._slots[key] = slot = [func, (), []]
+                self._pending.append(slot)
+            slot[2].append(text)
+            self._posted += 1
+    
+    def drain(self):
+        """Run every queued call (Tk thread)."""
+        with self._lock:
+            events, self._pending = self._pending, []
+            self._slots.clear()
+            self._frames += 1
+            self._run += len(events)
+        for func, args, chunks in events:
+            if chunks is not None:
+                args = ("".join(chunks),)
+            try:
+                func(*args)
+            except Exception as e:
+                # One failed update must not stop the ones queued after it
+                print(f"UI update {getattr(func, '__name__', func)} failed: {e}", file=sys.stderr)
+    
+    def stats(self):
+        with self._lock:
+            return {"posted": self._posted, "run": self._run, "frames": self._frames}
+    
+    def _tick(self):
+        # Reschedule first: a modal dialog opened by an event runs a nested
+        # event loop, and later updates should keep flowing behind it
+        self.root.after(self.interval_ms, self._tick)
+        self.drain()
+
+
+# Analysis Report line styles
+_REPORT_HEADING_RE = re.compile(r'^\d+\.\s+\w+')
+
+
+def report_line_tags(line):
+    """Return the (tag, start_col, end_col) spans to apply to one report line."""
+    stripped = line.strip()
+    if not stripped:
+        return []
+    
+    spans = []
+    
+    # Headings (numbered items)
+    if _REPORT_HEADING_RE.match(stripped):
+        spans.append(("heading", 0, len(line)))
+    
+    # Subheadings (terms like "Strengths:", "Weaknesses:", etc.)
+    if stripped.endswith(':'):
+        spans.append(("subheading", 0, len(line)))
+    
+    # Bullets - only the marker itself is coloured
+    if stripped[0] in "•-":
+        col = len(line) - len(line.lstrip())
+        spans.append(("bullet", col, col + 1))
+    return spans
+
+
+class ReportHighlighter:
+    """Tags Analysis Report text in a Tk Text widget without touching the text.
+
+    Indices are absolute "line.col" strings, so each tag costs the same no
+    matter how far down the report it is. feed() takes text as it is appended
+    to the widget (e.g. streamed chunks) and tags each line once it is
+    complete; finish() tags the trailing line.
+    """
+    
+    TAG_STYLES = {
+        "heading": {"font": ("Arial", 14, "bold")},
+        "subheading": {"font": ("Arial", 12, "bold"), "foreground": "#1E88E5"},
+        "bullet": {"foreground": "#26A69A"},
+        "highlight": {"background": "#FFF9C4"},
+    }
+    
+    def __init__(self, text_widget):
+        self.widget = text_widget
+        for tag, style in self.TAG_STYLES.items():
+            self.widget.tag_configure(tag, **style)
+        self.reset()
+    
+    def reset(self):
+        """Start again from line 1 (call after the widget is cleared)."""
+        self.line = 1
+        self.partial = ""
+    
+    def feed(self, text):
+        """Tag the lines completed by text appended to the end of the widget."""
+        lines = (self.partial + text).split("\n")
+        self.partial = lines.pop()
+        self._tag_lines(lines)
+    
+    def finish(self):
+        """Tag the last line, which has no trailing newline."""
+        if self.partial:
+            self._tag_lines([self.partial])
+            # A later feed() continues this line rather than starting a new one
+            self.line -= 1
+    
+    def highlight_all(self):
+        """Re-tag the widget's whole content from scratch."""
+        for tag in self.TAG_STYLES:
+            self.widget.tag_remove(tag, "1.0", "end")
+        self.reset()
+        self.feed(self.widget.get("1.0", "end-1c"))
+        self.finish()
+    
+    def _tag_lines(self, lines):
+        # Collect every range first so each tag needs one Tk call per batch
+        ranges = {}
+        for line in lines:
+            for tag, start, end in report_line_tags(line):
+                ranges.setdefault(tag, []).extend((f"{self.line}.{start}", f"{self.line}.{end}"))
+            self.line += 1
+        for tag, indices in ranges.items():
+            self.widget.tag_add(tag, *indices)
+
 
 class ResumeOptimizerApp:
     def __init__(self, root):
@@ -51,11 +3398,18 @@ class ResumeOptimizerApp:
         # Variables
         self.resume_path = ""
         self.resume_format = ""
-        self.original_resume_content = None
         self.job_description = ""
         self.optimized_resume_text = ""
         self.analysis_report = ""
         
+        # Headless pipeline shared with the CLI
+        self.engine = ResumeOptimizerEngine()
+        self.run_progress = None
+        
+        # Worker threads hand every widget update to the Tk thread through here
+        self.ui_events = UIEventQueue(self.root)
+        self.ui_events.start()
+        
         # Create main frame with improved appearance
         self.main_frame = ctk.CTkFrame(self.root, fg_color=self.colors["background"], corner_radius=0)
         self.main_frame.pack(fill=tk.BOTH, expand=True)
@@ -181,7 +3535,8 @@ class ResumeOptimizerApp:
             ("Same as input", "same_as_input"),
             ("Plain text (.txt)", "txt"),
             ("Word (.docx)", "docx"),
-            ("PDF (.pdf)", "pdf")
+            ("PDF (.pdf)", "pdf"),
+            ("All formats", "all")
         ]
         
         for i, (text, value) in enumerate(formats):
@@ -264,6 +3619,7 @@ class ResumeOptimizerApp:
             pady=15
         )
         self.analysis_text.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
+        self.analysis_highlighter = ReportHighlighter(self.analysis_text)
         
         # Optimized resume text area
         self.resume_text = scrolledtext.ScrolledText(
@@ -327,8 +3683,8 @@ class ResumeOptimizerApp:
         self.results_frame.pack_forget()
         self.save_frame.pack_forget()
         
-        # Check if API key exists
-        if not openai.api_key:
+        # Check if API key exists (without importing openai yet)
+        if not os.getenv("OPENAI_API_KEY"):
             self.show_api_key_dialog()
     
     def show_api_key_dialog(self):
@@ -339,6 +3695,7 @@ class ResumeOptimizerApp:
         )
         api_key = dialog.get_input()
         if api_key:
+            os.environ["OPENAI_API_KEY"] = api_key
             openai.api_key = api_key
             # Create .env file if it doesn't exist
             with open(".env", "w") as f:
@@ -365,13 +3722,7 @@ class ResumeOptimizerApp:
             self.resume_path = filename
             
             # Determine file format
-            lower_filename = filename.lower()
-            if lower_filename.endswith('.pdf'):
-                self.resume_format = 'pdf'
-            elif lower_filename.endswith('.docx'):
-                self.resume_format = 'docx'
-            else:
-                self.resume_format = 'unknown'
+            self.resume_format = detect_resume_format(filename)
     
     def save_text_to_file(self, text, default_filename):
         """Save text content to a file"""
@@ -387,182 +3738,24 @@ class ResumeOptimizerApp:
     
     def extract_text_from_pdf(self, pdf_file):
         """Extract text from a PDF file."""
-        text = ""
-        pdf_content = None
-        
         try:
-            # Store original content for formatting
-            pdf_content = pdf_file.read()
-            pdf_file.seek(0)
-            
-            reader = PyPDF2.PdfReader(pdf_file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+            return self.engine.extract_text_from_pdf(pdf_file)
         except Exception as e:
             messagebox.showerror("Error", f"Error extracting text from PDF: {e}")
-        
-        return text, pdf_content
+            return "", None
 
     def extract_text_from_docx(self, docx_file):
         """Extract text from a DOCX file with formatting information."""
-        text = ""
-        formatted_text = ""
-        docx_content = None
-        
         try:
-            # Store original content for formatting
-            docx_content = docx_file.read()
-            docx_file.seek(0)
-            
-            doc = docx.Document(docx_file)
-            
-            # Process paragraphs with formatting
-            for para in doc.paragraphs:
-                # Skip empty paragraphs
-                if not para.text.strip():
-                    formatted_text += "\n"
-                    text += "\n"
-                    continue
-                
-                # Check alignment
-                alignment_tag_start = ""
-                alignment_tag_end = ""
-                
-                if para.alignment == WD_ALIGN_PARAGRAPH.CENTER:
-                    alignment_tag_start = "<center>"
-                    alignment_tag_end = "</center>"
-                elif para.alignment == WD_ALIGN_PARAGRAPH.RIGHT:
-                    alignment_tag_start = "<right>"
-                    alignment_tag_end = "</right>"
-                
-                # Check if the paragraph is a heading
-                if para.style.name.startswith('Heading'):
-                    formatted_text += f"{alignment_tag_start}**{para.text}**{alignment_tag_end}\n"
-                    text += para.text + "\n"
-                    continue
-                
-                # Process runs for formatting within paragraphs
-                para_text = ""
-                formatted_para = ""
-                
-                # Check for bullet lists
-                if para.style.name.startswith('List'):
-                    bullet_prefix = "• "
-                else:
-                    bullet_prefix = ""
-                
-                for run in para.runs:
-                    run_text = run.text
-                    
-                    # Check for hyperlinks - this is a simplistic approach
-                    hyperlink = False
-                    
-                    # Apply formatting based on run properties
-                    if run.bold and run.italic:
-                        formatted_para += f"**_{run_text}_**"
-                    elif run.bold:
-                        formatted_para += f"**{run_text}**"
-                    elif run.italic:
-                        formatted_para += f"_{run_text}_"
-                    else:
-                        formatted_para += run_text
-                    
-                    para_text += run_text
-                
-                # Look for metrics (numbers with % or $ signs)
-                metrics_pattern = r'\b(\d+%|\$\d+(?:,\d+)*(?:\.\d+)?|\d+\s*%|\d+\s*(?:percent|pct))\b'
-                metrics = re.findall(metrics_pattern, para_text, re.IGNORECASE)
-                
-                # If metrics found, mark them for highlighting
-                if metrics:
-                    for metric in metrics:
-                        # Only replace if not already marked with formatting
-                        if metric in formatted_para and f"**[{metric}]**" not in formatted_para:
-                            formatted_para = formatted_para.replace(
-                                metric, 
-                                f"**[{metric}]**"
-                            )
-                
-                # Add bullet if needed
-                if bullet_prefix:
-                    formatted_para = bullet_prefix + formatted_para
-                
-                # Add to formatted text
-                formatted_text += f"{alignment_tag_start}{formatted_para}{alignment_tag_end}\n"
-                text += bullet_prefix + para_text + "\n"
-            
-            # Get text from tables as well
-            for table in doc.tables:
-                # Add table marker
-                formatted_text += "<table>\n"
-                for row in table.rows:
-                    row_text = ""
-                    formatted_row = ""
-                    for cell in row.cells:
-                        cell_text = cell.text.strip()
-                        row_text += cell_text + "\t"
-                        
-                        # Check for bold/formatting in cell paragraphs
-                        cell_formatted = cell_text
-                        
-                        # Look for metrics in cells
-                        metrics_pattern = r'\b(\d+%|\$\d+(?:,\d+)*(?:\.\d+)?|\d+\s*%|\d+\s*(?:percent|pct))\b'
-                        metrics = re.findall(metrics_pattern, cell_text, re.IGNORECASE)
-                        
-                        # If metrics found, mark them
-                        if metrics:
-                            for metric in metrics:
-                                cell_formatted = cell_formatted.replace(
-                                    metric, 
-                                    f"**[{metric}]**"
-                                )
-                        
-                        formatted_row += cell_formatted + "\t"
-                    
-                    text += row_text + "\n"
-                    formatted_text += formatted_row + "\n"
-                
-                formatted_text += "</table>\n"
-                text += "\n"
-                
+            return self.engine.extract_text_from_docx(docx_file)
         except Exception as e:
-            # If advanced parsing fails, fall back to simple extraction
-            try:
-                docx_file.seek(0)
-                doc = docx.Document(docx_file)
-                for para in doc.paragraphs:
-                    text += para.text + "\n"
-                formatted_text = text
-            except Exception as inner_e:
-                messagebox.showerror("Error", f"Error extracting text from DOCX: {inner_e}")
-        
-        return formatted_text or text, docx_content
+            messagebox.showerror("Error", f"Error extracting text from DOCX: {e}")
+            return "", None
 
     def extract_job_description(self, url):
         """Extract job description from a URL."""
         try:
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Try to find common job description containers
-            job_description = ""
-            
-            # Look for job description in various common containers
-            job_containers = soup.select('.job-description, .description, .content, [class*="job"], [class*="description"], [id*="job"], [id*="description"]')
-            if job_containers:
-                # Use the largest container as it's likely to be the main content
-                largest_container = max(job_containers, key=lambda x: len(x.get_text()))
-                job_description = largest_container.get_text(strip=True, separator='\n')
-            else:
-                # Fallback to body text if no specific container is found
-                job_description = soup.body.get_text(strip=True, separator='\n')
-                
-            # Clean up the text
-            job_description = ' '.join(job_description.split())
-                
-            return job_description
+            return self.engine.extract_job_description(url)
         except Exception as e:
             messagebox.showerror("Error", f"Error extracting job description: {e}")
             return None
@@ -570,53 +3763,7 @@ class ResumeOptimizerApp:
     def optimize_resume(self, resume_text, job_description):
         """Use OpenAI API to optimize resume for the job description."""
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": """You are an expert resume optimizer who helps candidates match their resumes to job descriptions for better ATS matching scores.
-                    
-                    When optimizing resumes, you must preserve the original formatting structure:
-                    1. Keep section headings exactly as they are (same capitalization, punctuation)
-                    2. Maintain heading levels and hierarchy
-                    3. Preserve bullet points and list formatting
-                    4. Maintain indentation and text alignment patterns
-                    5. Preserve any hyperlinks by using [text](url) format
-                    6. Keep date formats consistent
-                    
-                    For formatting instructions:
-                    - Use **bold** for headings and important text
-                    - Use _italics_ for emphasis where appropriate
-                    - Format metrics and key achievements like: **[increased revenue by 25%]**
-                    - Preserve center or right alignment with <center> or <right> tags
-                    - For left-justified text, no special tags are needed
-                    - Maintain any table-like structures by using consistent spacing
-                    """},
-                    {"role": "user", "content": f"""
-                    I need to optimize my resume for a specific job. 
-                    
-                    Here is my current resume:
-                    {resume_text}
-                    
-                    Here is the job description:
-                    {job_description}
-                    
-                    Please optimize my resume to better match this job description and increase my ATS matching score. 
-                    Use the same format as my original resume, but enhance the content to better align with the job requirements.
-                    Keep my honest experiences and qualifications, but highlight relevant skills and use appropriate keywords from the job description.
-                    
-                    Very important formatting requirements:
-                    1. Maintain the exact same section structure and headings
-                    2. Bold all headings and section titles using **text**
-                    3. Make key metrics and achievements bold using **[metric]** format
-                    4. Preserve text alignment - use <center> tags for centered text and <right> tags for right-justified text
-                    5. Maintain any hyperlinks in the form [text](url)
-                    
-                    Return only the optimized resume text with thorough formatting indicators.
-                    """}
-                ],
-                temperature=0.2
-            )
-            return response.choices[0].message.content
+            return self.engine.optimize_resume(resume_text, job_description)
         except Exception as e:
             messagebox.showerror("Error", f"Error optimizing resume: {e}")
             return None
@@ -624,177 +3771,14 @@ class ResumeOptimizerApp:
     def generate_analysis_report(self, resume_text, job_description):
         """Generate a summary analysis report comparing resume to job description."""
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert resume analyst who provides objective feedback on resumes."},
-                    {"role": "user", "content": f"""
-                    I need an analysis of my resume compared to a specific job description.
-                    
-                    Resume:
-                    {resume_text}
-                    
-                    Job Description:
-                    {job_description}
-                    
-                    Please provide a detailed analysis with the following sections:
-                    1. Strengths: What parts of my resume match well with the job description?
-                    2. Weaknesses: What important elements from the job description are missing or underrepresented in my resume?
-                    3. Areas for Improvement: Specific suggestions to make my resume more competitive for this position.
-                    4. Keyword Analysis: Key terms from the job description that should be included in my resume.
-                    5. ATS Compatibility Score: Provide an estimated match percentage (0-100%) based on key requirements.
-                    
-                    Be honest, specific, and actionable in your feedback.
-                    """}
-                ],
-                temperature=0.3
-            )
-            return response.choices[0].message.content
+            return self.engine.generate_analysis_report(resume_text, job_description)
         except Exception as e:
             messagebox.showerror("Error", f"Error generating analysis report: {e}")
             return None
     
     def create_pdf_resume(self, filename, content):
         """Create a formatted PDF from the optimized resume text with proper formatting"""
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        styles = getSampleStyleSheet()
-        
-        # Create custom styles
-        styles.add(ParagraphStyle(
-            name='ResumeHeading',
-            parent=styles['Heading1'],
-            fontSize=14,
-            fontName='Helvetica-Bold',
-            spaceAfter=10,
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='ResumeNormal',
-            parent=styles['Normal'],
-            fontSize=11,
-            spaceAfter=5,
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='ResumeBold',
-            parent=styles['Normal'],
-            fontSize=11,
-            fontName='Helvetica-Bold',
-            spaceAfter=5,
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='ResumeCentered',
-            parent=styles['Normal'],
-            fontSize=11,
-            alignment=TA_CENTER,
-            spaceAfter=5,
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='ResumeCenteredBold',
-            parent=styles['Normal'],
-            fontSize=11,
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER,
-            spaceAfter=5,
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='ResumeRight',
-            parent=styles['Normal'],
-            fontSize=11,
-            alignment=TA_RIGHT,
-            spaceAfter=5,
-        ))
-        
-        styles.add(ParagraphStyle(
-            name='ResumeRightBold',
-            parent=styles['Normal'],
-            fontSize=11,
-            fontName='Helvetica-Bold',
-            alignment=TA_RIGHT,
-            spaceAfter=5,
-        ))
-        
-        # Process content and convert to paragraphs
-        story = []
-        
-        for line in content.split('\n'):
-            # Skip empty lines, just add spacing
-            if not line.strip():
-                story.append(Spacer(1, 10))
-                continue
-            
-            # Check for alignment tags
-            alignment_style = 'ResumeNormal'
-            processed_line = line
-            
-            if line.startswith('<center>') and line.endswith('</center>'):
-                alignment_style = 'ResumeCentered'
-                processed_line = line[8:-9]  # Remove tags
-            elif line.startswith('<right>') and line.endswith('</right>'):
-                alignment_style = 'ResumeRight'
-                processed_line = line[7:-8]  # Remove tags
-            
-            # Check if line is a heading (bold)
-            bold_pattern = r'^\s*\*\*(.*?)\*\*\s*$'
-            if re.match(bold_pattern, processed_line):
-                heading_text = re.search(bold_pattern, processed_line).group(1)
-                story.append(Paragraph(heading_text, styles['ResumeHeading']))
-                continue
-            
-            # Process formatting
-            # 1. Convert hyperlinks [text](url)
-            hyperlink_pattern = r'\[(.*?)\]\((.*?)\)'
-            processed_line = re.sub(
-                hyperlink_pattern,
-                r'<link href="\2">\1</link>',
-                processed_line
-            )
-            
-            # 2. Convert metrics **[metric]** - just make them bold, no highlighting
-            metric_pattern = r'\*\*\[(.*?)\]\*\*'
-            processed_line = re.sub(
-                metric_pattern,
-                r'<b>\1</b>',
-                processed_line
-            )
-            
-            # 3. Convert bold text **text**
-            bold_pattern = r'\*\*(.*?)\*\*'
-            processed_line = re.sub(
-                bold_pattern,
-                r'<b>\1</b>',
-                processed_line
-            )
-            
-            # 4. Convert italic text _text_
-            italic_pattern = r'_(.*?)_'
-            processed_line = re.sub(
-                italic_pattern,
-                r'<i>\1</i>',
-                processed_line
-            )
-            
-            # Determine if the line would require bold style based on content
-            needs_bold = '<b>' in processed_line and '</b>' in processed_line
-            
-            # Select the appropriate style based on alignment and bold content
-            if alignment_style == 'ResumeCentered' and needs_bold:
-                alignment_style = 'ResumeCenteredBold'
-            elif alignment_style == 'ResumeRight' and needs_bold:
-                alignment_style = 'ResumeRightBold'
-            
-            # 5. Handle bullet points
-            if processed_line.strip().startswith('•') or processed_line.strip().startswith('-'):
-                bullet_text = processed_line.strip()[1:].strip()
-                story.append(Paragraph(f"• {bullet_text}", styles[alignment_style]))
-            else:
-                story.append(Paragraph(processed_line, styles[alignment_style]))
-        
-        # Build the document
-        doc.build(story)
+        self.engine.create_pdf_resume(filename, content)
     
     def save_formatted_resume(self):
         """Save the optimized resume with formatting preserved"""
@@ -807,13 +3791,17 @@ class ResumeOptimizerApp:
         if output_format == "same_as_input":
             output_format = self.resume_format
         
-        # Define potential output file extensions and types
-        format_extensions = {
-            "txt": ".txt",
-            "docx": ".docx",
-            "pdf": ".pdf"
-        }
+        if output_format == "all":
+            # One name for all three files; the extensions are added per format
+            filename = filedialog.asksaveasfilename(
+                initialfile="optimized_resume",
+                filetypes=[("All files", "*.*")]
+            )
+            if filename:
+                self.start_save(os.path.splitext(filename)[0], output_format)
+            return
         
+        # Define potential output file types
         format_descriptions = {
             "txt": "Text files",
             "docx": "Word documents",
@@ -821,323 +3809,217 @@ class ResumeOptimizerApp:
         }
         
         # Set default filename and extension based on format
-        default_extension = format_extensions.get(output_format, ".txt")
+        default_extension = FORMAT_EXTENSIONS.get(output_format, ".txt")
         format_description = format_descriptions.get(output_format, "Text files")
-        
-        # Ask user for save location
-        filename = filedialog.asksaveasfilename(
-            defaultextension=default_extension,
-            initialfile=f"optimized_resume{default_extension}",
-            filetypes=[(format_description, f"*{default_extension}"), ("All files", "*.*")]
-        )
-        
-        if not filename:
-            return
-        
-        try:
-            # Create formatted output based on selected format
-            if output_format == "txt":
-                # For text format, just save as is
-                with open(filename, "w", encoding="utf-8") as f:
-                    # Remove formatting tags for plain text output
-                    clean_text = self.optimized_resume_text
-                    # Remove alignment tags
-                    clean_text = re.sub(r'<(center|right)>(.*?)</\1>', r'\2', clean_text)
-                    # Remove bold markers
-                    clean_text = re.sub(r'\*\*\[(.*?)\]\*\*', r'\1', clean_text)
-                    clean_text = re.sub(r'\*\*(.*?)\*\*', r'\1', clean_text)
-                    # Remove italic markers
-                    clean_text = re.sub(r'_(.*?)_', r'\1', clean_text)
-                    # Convert hyperlinks
-                    clean_text = re.sub(r'\[(.*?)\]\((.*?)\)', r'\1 (\2)', clean_text)
-                    f.write(clean_text)
-                    
-            elif output_format == "docx":
-                # Create a new DOCX with formatting
-                doc = docx.Document()
-                
-                # Process content line by line
-                for line in self.optimized_resume_text.split('\n'):
-                    if not line.strip():
-                        # Skip empty lines
-                        doc.add_paragraph()
-                        continue
-                    
-                    # Check for alignment
-                    alignment = WD_ALIGN_PARAGRAPH.LEFT  # Default
-                    processed_line = line
-                    
-                    # Handle center alignment
-                    if line.startswith('<center>') and line.endswith('</center>'):
-                        alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        processed_line = line[8:-9]  # Remove tags
-                    
-                    # Handle right alignment
-                    elif line.startswith('<right>') and line.endswith('</right>'):
-                        alignment = WD_ALIGN_PARAGRAPH.RIGHT
-                        processed_line = line[7:-8]  # Remove tags
-                    
-                    # Create paragraph with proper alignment
-                    para = doc.add_paragraph()
-                    para.alignment = alignment
-                    
-                    # Check if entire line is bold (heading)
-                    bold_pattern = r'^\s*\*\*(.*?)\*\*\s*$'
-                    if re.match(bold_pattern, processed_line):
-                        heading_text = re.search(bold_pattern, processed_line).group(1)
-                        run = para.add_run(heading_text)
-                        run.bold = True
-                        continue
-                    
-                    # Handle bullet points
-                    if processed_line.strip().startswith('•') or processed_line.strip().startswith('-'):
-                        para.style = 'List Bullet'
-                        processed_line = processed_line.strip()[1:].strip()
-                    
-                    # We'll now process the remaining text with mixed formatting
-                    remaining_text = processed_line
-                    
-                    while remaining_text:
-                        # Look for formatting patterns in this order of precedence
-                        patterns = [
-                            # Metrics: **[30% increase]** - just make bold, no highlighting
-                            (r'\*\*\[(.*?)\]\*\*', lambda m: self._add_highlighted_run(para, m.group(1))),
-                            
-                            # Hyperlinks: [text](url)
-                            (r'\[(.*?)\]\((.*?)\)', lambda m: self._add_hyperlink(doc, para, m.group(1), m.group(2))),
-                            
-                            # Bold text: **text**
-                            (r'\*\*(.*?)\*\*', lambda m: self._add_bold_run(para, m.group(1))),
-                            
-                            # Italic text: _text_
-                            (r'_(.*?)_', lambda m: self._add_italic_run(para, m.group(1)))
-                        ]
-                        
-                        # Find the first matching pattern
-                        match = None
-                        pattern_index = -1
-                        
-                        for i, (pattern, _) in enumerate(patterns):
-                            m = re.search(pattern, remaining_text)
-                            if m and (match is None or m.start() < match.start()):
-                                match = m
-                                pattern_index = i
-                        
-                        if match:
-                            # Add text before the match
-                            if match.start() > 0:
-                                para.add_run(remaining_text[:match.start()])
-                            
-                            # Process the matched pattern
-                            _, handler = patterns[pattern_index]
-                            handler(match)
-                            
-                            # Continue with remaining text
-                            remaining_text = remaining_text[match.end():]
-                        else:
-                            # No more patterns, add the rest as plain text
-                            if remaining_text:
-                                para.add_run(remaining_text)
-                            break
-                
-                # Save the document
-                doc.save(filename)
-                    
-            elif output_format == "pdf":
-                # Create PDF with formatting
-                self.create_pdf_resume(filename, self.optimized_resume_text)
-            
-            messagebox.showinfo("Success", f"Formatted resume saved successfully to {filename}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Error saving formatted resume: {e}")
-    
-    def _add_bold_run(self, paragraph, text):
-        """Add a bold run to a Word paragraph"""
-        run = paragraph.add_run(text)
-        run.bold = True
-        return text
-
-    def _add_highlighted_run(self, paragraph, text):
-        """Add a bold run to a Word paragraph (without highlighting)"""
-        run = paragraph.add_run(text)
-        run.bold = True
-        return text
-    
-    def _add_italic_run(self, paragraph, text):
-        """Add an italic run to a Word paragraph"""
-        run = paragraph.add_run(text)
-        run.italic = True
-        return text
-
-    def _add_hyperlink(self, document, paragraph, text, url):
-        """Add a hyperlink to a Word paragraph"""
-        try:
-            # Create relationship for hyperlink
-            rel_id = document.part.relate_to(url, docx.opc.constants.RELATIONSHIP_TYPE.HYPERLINK, is_external=True)
-            
-            # Create the hyperlink XML element
-            hyperlink = OxmlElement('w:hyperlink')
-            hyperlink.set(qn('r:id'), rel_id)
-            
-            # Create the run element
-            run = OxmlElement('w:r')
-            
-            # Create run properties
-            rPr = OxmlElement('w:rPr')
-            
-            # Set hyperlink style
-            color = OxmlElement('w:color')
-            color.set(qn('w:val'), '0000FF')  # Blue
-            rPr.append(color)
-            
-            # Add underline
-            u = OxmlElement('w:u')
-            u.set(qn('w:val'), 'single')
-            rPr.append(u)
-            
-            run.append(rPr)
-            
-            # Add text to the run
-            t = OxmlElement('w:t')
-            t.text = text
-            run.append(t)
-            
-            # Add the run to the hyperlink
-            hyperlink.append(run)
-            
-            # Add the hyperlink to the paragraph
-            paragraph._p.append(hyperlink)
-            
-            return text
+        
+        # Ask user for save location
+        filename = filedialog.asksaveasfilename(
+            defaultextension=default_extension,
+            initialfile=f"optimized_resume{default_extension}",
+            filetypes=[(format_description, f"*{default_extension}"), ("All files", "*.*")]
+        )
+        
+        if not filename:
+            return
+        
+        self.start_save(filename, output_format)
+    
+    def start_save(self, filename, output_format):
+        """Render the optimized resume on a worker thread so the window stays responsive"""
+        self.save_formatted_button.configure(state="disabled")
+        threading.Thread(
+            target=self.save_formatted_resume_thread,
+            args=(filename, self.optimized_resume_text, output_format),
+            daemon=True
+        ).start()
+    
+    def save_formatted_resume_thread(self, filename, content, output_format):
+        """Render one format, or all of them in worker processes (worker thread)"""
+        try:
+            if output_format == "all":
+                paths = self.engine.export_all(filename, content)
+                message = "Formatted resume saved successfully to:\n" + "\n".join(paths.values())
+            else:
+                self.engine.render_resume(filename, content, output_format)
+                message = f"Formatted resume saved successfully to {filename}"
+            self.ui_events.post(messagebox.showinfo, "Success", message)
         except Exception as e:
-            # Fallback if hyperlink creation fails
-            run = paragraph.add_run(text)
-            run.font.color.rgb = RGBColor(0, 0, 255)  # Blue
-            run.font.underline = True
-            return text
+            self.ui_events.post(messagebox.showerror, "Error", f"Error saving formatted resume: {e}")
+        finally:
+            self.ui_events.post(lambda: self.save_formatted_button.configure(state="normal"))
     
     def update_progress(self, value, text):
-        """Update progress bar and label"""
+        """Update progress bar and label (main thread)"""
         self.progress_bar.set(value)
         self.progress_label.configure(text=text)
-        self.root.update_idletasks()
     
-    def process_resume_thread(self):
+    def show_run_progress(self, progress):
+        """Show the measured progress of a running pipeline (main thread)"""
+        if progress is self.run_progress and progress.current:
+            self.update_progress(progress.fraction(), STAGE_LABELS.get(progress.current, "Working..."))
+    
+    def poll_progress(self, worker):
+        """Keep the progress bar moving between events while a run is going (main thread)"""
+        if not worker.is_alive():
+            return
+        if self.run_progress is not None:
+            self.ui_events.post_latest("progress", self.show_run_progress, self.run_progress)
+        self.root.after(100, self.poll_progress, worker)
+    
+    def end_run(self, error=None):
+        """Report an error, if any, and re-enable processing (main thread)"""
+        self.run_progress = None
+        if error:
+            messagebox.showerror("Error", error)
+        self.progress_frame.pack_forget()
+        self.process_button.configure(state="normal")
+    
+    def process_resume_thread(self, job_url, job_desc_text, resume_path):
         """Process resume in a separate thread to keep UI responsive"""
-        # Get inputs
-        job_url = self.url_entry.get().strip()
-        job_desc_text = self.job_desc_text.get("1.0", tk.END).strip()
-        resume_path = self.file_entry.get().strip()
-        
-        # Show progress indicator
-        self.progress_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
-        self.update_progress(0.05, "Starting optimization process...")
-        
+        # The progress bar follows the stages this run will actually go through
+        stages = ["extract_resume", "optimize", "analyze"]
+        if job_url and not job_desc_text:
+            stages[:0] = ["fetch", "parse_job"]
+        try:
+            with RunProgress(self.engine.metrics, stages) as progress:
+                self.run_progress = progress
+                self.run_pipeline(progress, job_url, job_desc_text, resume_path)
+        except Exception as e:
+            # Whatever went wrong, the Process button must come back
+            self.ui_events.post(self.end_run, f"Error processing resume: {e}")
+    
+    def run_pipeline(self, progress, job_url, job_desc_text, resume_path):
+        """Run every stage for one resume and job description (worker thread)
+
+        Widgets are only ever touched through self.ui_events.
+        """
         # Validate inputs
         if not resume_path or not os.path.exists(resume_path):
-            messagebox.showerror("Error", "Please select a valid resume file")
-            self.progress_frame.pack_forget()
-            self.process_button.configure(state="normal")
+            self.ui_events.post(self.end_run, "Please select a valid resume file")
             return
         
         # Get job description (either from URL or text input)
-        self.update_progress(0.1, "Obtaining job description...")
-        
         if job_desc_text:
             # Use directly entered text
             job_description = job_desc_text
         elif job_url:
             # Extract from URL
-            job_description = self.extract_job_description(job_url)
+            try:
+                job_description = self.engine.extract_job_description(job_url)
+            except Exception as e:
+                self.ui_events.post(self.end_run, f"Error extracting job description: {e}")
+                return
             if not job_description:
-                self.progress_frame.pack_forget()
-                self.process_button.configure(state="normal")
+                self.ui_events.post(self.end_run)
                 return
         else:
-            messagebox.showerror("Error", "Please enter either a job URL or paste the job description")
-            self.progress_frame.pack_forget()
-            self.process_button.configure(state="normal")
+            self.ui_events.post(self.end_run, "Please enter either a job URL or paste the job description")
             return
         
         self.job_description = job_description
         
         # Extract resume text
-        self.update_progress(0.3, "Reading and analyzing resume file...")
         resume_text = ""
         
+        if detect_resume_format(resume_path) == 'unknown':
+            self.ui_events.post(self.end_run, "Unsupported file format. Please use PDF or DOCX files.")
+            return
+        
         try:
-            if resume_path.lower().endswith('.pdf'):
-                with open(resume_path, 'rb') as file:
-                    resume_text, self.original_resume_content = self.extract_text_from_pdf(file)
-            elif resume_path.lower().endswith('.docx'):
-                with open(resume_path, 'rb') as file:
-                    resume_text, self.original_resume_content = self.extract_text_from_docx(file)
-            else:
-                messagebox.showerror("Error", "Unsupported file format. Please use PDF or DOCX files.")
-                self.progress_frame.pack_forget()
-                self.process_button.configure(state="normal")
-                return
+            # Served from the parsed-resume cache when the file is unchanged
+            resume_text, _ = self.engine.extract_resume(resume_path)
         except Exception as e:
-            messagebox.showerror("Error", f"Error reading resume file: {e}")
-            self.progress_frame.pack_forget()
-            self.process_button.configure(state="normal")
+            self.ui_events.post(self.end_run, f"Error reading resume file: {e}")
             return
         
         if not resume_text:
-            messagebox.showerror("Error", "Could not extract text from the resume")
-            self.progress_frame.pack_forget()
-            self.process_button.configure(state="normal")
+            self.ui_events.post(self.end_run, "Could not extract text from the resume")
             return
         
-        # Process with OpenAI
-        self.update_progress(0.5, "Optimizing resume... (this may take a minute)")
-        optimized_resume = self.optimize_resume(resume_text, job_description)
+        # Process with OpenAI - optimization and analysis run concurrently and
+        # stream into the result tabs as tokens arrive; chunks that arrive
+        # within one frame are inserted together
+        self.ui_events.post(self.prepare_streaming_results)
         
-        if not optimized_resume:
-            self.progress_frame.pack_forget()
-            self.process_button.configure(state="normal")
-            return
+        def on_optimize_chunk(text):
+            progress.add_bytes("optimize", len(text))
+            self.ui_events.post_text("optimize", self.append_streamed_resume, text)
+            self.ui_events.post_latest("progress", self.show_run_progress, progress)
         
-        self.optimized_resume_text = optimized_resume
+        def on_analysis_chunk(text):
+            progress.add_bytes("analyze", len(text))
+            self.ui_events.post_text("analyze", self.append_streamed_analysis, text)
+            self.ui_events.post_latest("progress", self.show_run_progress, progress)
+        
+        optimized_resume, analysis_report, errors = self.engine.optimize_and_analyze(
+            resume_text,
+            job_description,
+            on_optimize_chunk=on_optimize_chunk,
+            on_analysis_chunk=on_analysis_chunk
+        )
         
-        self.update_progress(0.8, "Generating analysis report...")
-        analysis_report = self.generate_analysis_report(resume_text, job_description)
+        # Report each failed call, but keep whichever result came back
+        if "optimize" in errors:
+            self.ui_events.post(messagebox.showerror, "Error", f"Error optimizing resume: {errors['optimize']}")
+        if "analyze" in errors:
+            self.ui_events.post(messagebox.showerror, "Error", f"Error generating analysis report: {errors['analyze']}")
         
-        if not analysis_report:
-            self.progress_frame.pack_forget()
-            self.process_button.configure(state="normal")
-            return
+        if not optimized_resume and "optimize" not in errors:
+            self.ui_events.post(messagebox.showwarning, "Warning", "The model returned an empty optimized resume")
         
+        optimized_resume = optimized_resume or ""
+        analysis_report = analysis_report or ""
+        self.optimized_resume_text = optimized_resume
         self.analysis_report = analysis_report
         
         # Update UI with results
-        self.update_progress(1.0, "Completed!")
-        self.root.after(0, self.update_results, optimized_resume, analysis_report)
+        self.ui_events.post(self.update_results, optimized_resume, analysis_report)
     
-    def update_results(self, optimized_resume, analysis_report):
-        """Update UI with results (called from main thread)"""
-        # Clear previous results
+    def prepare_streaming_results(self):
+        """Clear and show the result tabs so streamed text has somewhere to go (main thread)"""
         self.analysis_text.delete("1.0", tk.END)
         self.resume_text.delete("1.0", tk.END)
+        self.analysis_highlighter.reset()
+        self.results_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.tab_view.set("Optimized Resume")
+    
+    def append_streamed_resume(self, text):
+        """Append streamed optimized resume text (main thread)"""
+        self.resume_text.insert(tk.END, text)
+    
+    def append_streamed_analysis(self, text):
+        """Append streamed analysis text and tag the lines it completes (main thread)"""
+        self.analysis_text.insert(tk.END, text)
+        self.analysis_highlighter.feed(text)
+    
+    def update_results(self, optimized_resume, analysis_report):
+        """Update UI with results (called from main thread)"""
+        # The streamed text is normally the final text already; only replace
+        # a widget when it differs (e.g. a cached result or a failed stream)
+        if self.resume_text.get("1.0", "end-1c") != optimized_resume:
+            self.resume_text.delete("1.0", tk.END)
+            self.resume_text.insert("1.0", optimized_resume)
         
-        # Insert new results
-        self.analysis_text.insert("1.0", analysis_report)
-        self.resume_text.insert("1.0", optimized_resume)
-        
-        # Format text display
-        self.apply_text_highlighting(self.analysis_text)
+        if self.analysis_text.get("1.0", "end-1c") != analysis_report:
+            self.analysis_text.delete("1.0", tk.END)
+            self.analysis_text.insert("1.0", analysis_report)
+            self.apply_text_highlighting(self.analysis_text)
+        else:
+            # Streamed lines are tagged already; only the last one is left
+            self.analysis_highlighter.finish()
         
         # Show results and save sections
         self.results_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         self.save_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        # Update progress and button
+        # Update progress and button; late progress events are ignored
+        self.run_progress = None
+        self.progress_bar.set(1.0)
         self.progress_label.configure(text="Resume optimization complete!")
         self.process_button.configure(state="normal")
         
-        # Switch to analysis tab
-        self.tab_view.set("Analysis Report")
+        # Switch to analysis tab, or the resume if the analysis failed
+        self.tab_view.set("Analysis Report" if analysis_report else "Optimized Resume")
         
         # Scroll to top of results
         self.analysis_text.see("1.0")
@@ -1145,49 +4027,1153 @@ class ResumeOptimizerApp:
     
     def apply_text_highlighting(self, text_widget):
         """Apply formatting to the analysis text"""
-        content = text_widget.get("1.0", tk.END)
-        
-        # Define tags
-        text_widget.tag_configure("heading", font=("Arial", 14, "bold"))
-        text_widget.tag_configure("subheading", font=("Arial", 12, "bold"), foreground="#1E88E5")
-        text_widget.tag_configure("bullet", foreground="#26A69A")
-        text_widget.tag_configure("highlight", background="#FFF9C4")
-        
-        # Clear text and reinsert with formatting
-        text_widget.delete("1.0", tk.END)
-        text_widget.insert(tk.END, content)
-        
-        # Apply formatting
-        lines = content.split('\n')
-        pos = "1.0"
-        
-        for line in lines:
-            line_end = f"{pos}+{len(line)}c"
-            
-            # Headings (numbered items)
-            if re.match(r'^\d+\.\s+\w+', line.strip()):
-                text_widget.tag_add("heading", pos, line_end)
-            
-            # Subheadings (terms like "Strengths:", "Weaknesses:", etc.)
-            if line.strip().endswith(':'):
-                text_widget.tag_add("subheading", pos, line_end)
-            
-            # Bullets
-            if line.strip().startswith('•') or line.strip().startswith('-'):
-                text_widget.tag_add("bullet", pos, f"{pos}+1c")
-            
-            # Next line
-            pos = f"{line_end}+1c"
+        if text_widget is self.analysis_text:
+            self.analysis_highlighter.highlight_all()
+        else:
+            ReportHighlighter(text_widget).highlight_all()
     
     def process_resume(self):
         """Start resume processing"""
         # Disable process button while working
         self.process_button.configure(state="disabled")
         
+        # Show progress indicator
+        self.progress_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.update_progress(0, "Starting optimization process...")
+        
+        # Read the inputs here; the worker thread must not touch widgets
+        job_url = self.url_entry.get().strip()
+        job_desc_text = self.job_desc_text.get("1.0", tk.END).strip()
+        resume_path = self.file_entry.get().strip()
+        
         # Start processing in a separate thread
-        threading.Thread(target=self.process_resume_thread, daemon=True).start()
+        self.run_progress = None
+        worker = threading.Thread(
+            target=self.process_resume_thread,
+            args=(job_url, job_desc_text, resume_path),
+            daemon=True
+        )
+        worker.start()
+        self.poll_progress(worker)
+
+
+@dataclass
+class BatchJob:
+    """One resume/job description pair in a batch run."""
+    name: str
+    resume_path: str
+    job_url: str = ""
+    job_text: str = ""
+    output_format: str = "same_as_input"
+
+
+def _safe_name(text):
+    """Turn arbitrary text into a file-system friendly name."""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', text).strip('_') or "job"
+
+
+def _read_manifest(manifest_path):
+    """Load a manifest; returns (manifest, resolve) where resolve makes paths relative to it."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    return manifest, lambda path: path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+
+def _manifest_jobs(manifest, resolve):
+    """Return the manifest's jobs as (name, url, text) tuples.
+
+    A name already taken by an earlier job gets the job's position as a
+    suffix ("backend-3"), so every job writes to its own folder.
+    """
+    jobs = []
+    taken = set()
+    for index, job in enumerate(manifest.get("jobs", []), start=1):
+        if isinstance(job, str):
+            job = {"url": job} if job.startswith(("http://", "https://")) else {"text": job}
+        job_text = job.get("text", "")
+        if job.get("file"):
+            with open(resolve(job["file"]), "r", encoding="utf-8") as f:
+                job_text = f.read()
+        name = _safe_name(job.get("name") or f"job{index}")
+        if name in taken:
+            name = f"{name}-{index}"
+        taken.add(name)
+        jobs.append((name, job.get("url", ""), job_text))
+    return jobs
+
+
+def duplicate_job_names(jobs):
+    """Return the names shared by more than one BatchJob, sorted."""
+    counts = Counter(job.name for job in jobs)
+    return sorted(name for name, count in counts.items() if count > 1)
+
+
+def load_fan_out_jobs(resume_path, manifest_path, output_format=None):
+    """Pair one resume with every job in a manifest (its "resumes" are ignored)."""
+    manifest, resolve = _read_manifest(manifest_path)
+    output_format = output_format or manifest.get("output_format", "same_as_input")
+    return [
+        BatchJob(name=job_name, resume_path=resume_path, job_url=job_url, job_text=job_text, output_format=output_format)
+        for job_name, job_url, job_text in _manifest_jobs(manifest, resolve)
+    ]
+
+
+def load_batch_manifest(manifest_path):
+    """Load a batch manifest and expand it into resume/job pairs.
+
+    The manifest is a JSON object with a list of resume paths and a list of
+    jobs, each given as {"url": ...}, {"text": ...} or {"file": ...} with an
+    optional "name". Every resume is paired with every job (N x M). Relative
+    paths are resolved against the manifest's directory. Pairs are named
+    <resume>__<job>; resumes with the same file name in different folders
+    get a hash of their path appended to tell them apart.
+    """
+    manifest, resolve = _read_manifest(manifest_path)
+    output_format = manifest.get("output_format", "same_as_input")
+    jobs = _manifest_jobs(manifest, resolve)
+    resume_paths = [resolve(resume) for resume in manifest.get("resumes", [])]
+    resume_names = [_safe_name(os.path.splitext(os.path.basename(path))[0]) for path in resume_paths]
+    name_counts = Counter(resume_names)
+    
+    batch = []
+    for resume_path, resume_name in zip(resume_paths, resume_names):
+        if name_counts[resume_name] > 1:
+            path_hash = hashlib.sha256(os.path.abspath(resume_path).encode("utf-8")).hexdigest()[:8]
+            resume_name = f"{resume_name}-{path_hash}"
+        for job_name, job_url, job_text in jobs:
+            batch.append(BatchJob(
+                name=f"{resume_name}__{job_name}",
+                resume_path=resume_path,
+                job_url=job_url,
+                job_text=job_text,
+                output_format=output_format
+            ))
+    return batch
+
+
+def write_batch_outputs(engine, job, result, output_dir):
+    """Write the rendered resume and analysis report for one pair."""
+    job_dir = os.path.join(output_dir, job.name)
+    os.makedirs(job_dir, exist_ok=True)
+    
+    output_format = job.output_format
+    if output_format == "same_as_input":
+        output_format = result.resume_format
+    formats = EXPORT_FORMATS if output_format == "all" else (output_format if output_format in FORMAT_EXTENSIONS else "txt",)
+    
+    outputs = []
+    if result.optimized_resume:
+        # Rendered in the shared process pool, written atomically
+        base_path = os.path.join(job_dir, "optimized_resume")
+        with engine.metrics.span("render") as span:
+            futures = [
+                engine.submit_render(base_path + FORMAT_EXTENSIONS[fmt], result.optimized_resume, fmt)
+                for fmt in formats
+            ]
+            for future in futures:
+                resume_file, size = future.result()
+                span.bytes += size
+                outputs.append(resume_file)
+    
+    if result.analysis_report:
+        report_file = os.path.join(job_dir, "analysis_report.txt")
+        with open(report_file, "w", encoding="utf-8") as f:
+            f.write(result.analysis_report)
+        outputs.append(report_file)
+    return outputs
+
+
+# Durable batch queue. Every pair of a batch run is a row in a SQLite file in
+# the output directory, together with the last stage it completed and the
+# artifacts produced so far, so an interrupted run resumes where it stopped
+# without repeating finished fetches, extractions or LLM calls. Workers in
+# any number of processes claim pairs under a lease; a pair whose worker went
+# away is claimed again when the lease runs out, or at once if the worker was
+# a process on this machine that no longer exists.
+BATCH_QUEUE_FILE = "batch_queue.sqlite3"
+QUEUE_LEASE_SECONDS = float(os.getenv("RESUME_OPTIMIZER_QUEUE_LEASE", "600"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("RESUME_OPTIMIZER_QUEUE_MAX_ATTEMPTS", "3"))
+QUEUE_STAGES = ("queued", "fetched", "extracted", "optimized", "analyzed", "rendered")
+
+# A pair claimed by a worker: owner is unique to this claim
+ClaimedJob = namedtuple("ClaimedJob", "id owner attempts job")
+
+
+class LeaseLostError(RuntimeError):
+    """The claim on a queued pair expired and another worker took it over."""
+
+
+def _queue_owner():
+    """Owner string for a new claim: host, process and a per-claim token."""
+    import socket
+    return f"{socket.gethostname()}:{os.getpid()}:{os.urandom(4).hex()}"
+
+
+def _owner_alive(owner):
+    """False only when owner is a process on this machine that has exited."""
+    import socket
+    host, pid, _ = (owner.split(":") + ["", ""])[:3]
+    if host != socket.gethostname() or not pid.isdigit() or os.name == "nt":
+        # Other machines (and Windows, where signal 0 would kill) wait for the lease
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _job_fingerprint(job):
+    """Identify a pair's inputs, including the resume file's size and mtime."""
+    try:
+        stat = os.stat(job.resume_path)
+        resume_version = [stat.st_size, stat.st_mtime_ns]
+    except OSError:
+        resume_version = None
+    return DiskCache.make_key(job.resume_path, resume_version, job.job_url, job.job_text, job.output_format)
+
+
+class JobQueue:
+    """Durable queue of batch pairs and their stage artifacts in one SQLite file.
+
+    Safe to share between threads and between processes: claims and stage
+    updates run in BEGIN IMMEDIATE transactions and are tied to the claim's
+    owner, so a worker that lost its lease can't overwrite the new owner.
+    """
+
+    def __init__(self, path, lease_seconds=QUEUE_LEASE_SECONDS, max_attempts=QUEUE_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, resume_path TEXT NOT NULL, "
+                "job_url TEXT NOT NULL, job_text TEXT NOT NULL, output_format TEXT NOT NULL, "
+                "fingerprint TEXT NOT NULL, stage TEXT NOT NULL DEFAULT 'queued', "
+                "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+                "owner TEXT, lease_until REAL, error TEXT, updated REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                "job_id INTEGER NOT NULL, name TEXT NOT NULL, value BLOB NOT NULL, PRIMARY KEY (job_id, name))"
+            )
+        return self._conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two processes can never
+        # both read a pair as claimable and then both claim it
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def enqueue(self, jobs):
+        """Add BatchJobs by name and re-open the ones that need another try.
+
+        A pair whose inputs changed since it was queued (including an edited
+        resume file) starts over; failed and partial pairs go back to pending
+        and keep the artifacts they already have. Raises ValueError, adding
+        nothing, if two of the jobs share a name.
+        """
+        duplicates = duplicate_job_names(jobs)
+        if duplicates:
+            raise ValueError(f"Several pairs are named {', '.join(duplicates)}; every pair needs its own name")
+        now = time.time()
+        with self._transaction() as conn:
+            existing = dict(conn.execute("SELECT name, fingerprint FROM jobs"))
+            for job in jobs:
+                fingerprint = _job_fingerprint(job)
+                values = (job.resume_path, job.job_url, job.job_text, job.output_format, fingerprint, now, job.name)
+                if job.name not in existing:
+                    conn.execute(
+                        "INSERT INTO jobs (resume_path, job_url, job_text, output_format, fingerprint, updated, name) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)", values
+                    )
+                elif existing[job.name] != fingerprint:
+                    conn.execute(
+                        "DELETE FROM artifacts WHERE job_id = (SELECT id FROM jobs WHERE name = ?)", (job.name,)
+                    )
+                    conn.execute(
+                        "UPDATE jobs SET resume_path = ?, job_url = ?, job_text = ?, output_format = ?, "
+                        "fingerprint = ?, updated = ?, stage = 'queued', status = 'pending', attempts = 0, "
+                        "owner = NULL, lease_until = NULL, error = NULL WHERE name = ?", values
+                    )
+            conn.execute(
+                "UPDATE jobs SET status = 'pending', attempts = 0 "
+                "WHERE status = 'failed' OR (status = 'done' AND error IS NOT NULL)"
+            )
+
+    def claim(self):
+        """Claim the next runnable pair for this process; returns a ClaimedJob or None."""
+        now = time.time()
+        owner = _queue_owner()
+        with self._transaction() as conn:
+            # Pairs held by local processes that have exited are free right away
+            running = conn.execute("SELECT id, owner FROM jobs WHERE status = 'running' AND lease_until >= ?", (now,))
+            dead = [(job_id,) for job_id, job_owner in running.fetchall() if not _owner_alive(job_owner)]
+            conn.executemany("UPDATE jobs SET lease_until = 0 WHERE id = ?", dead)
+            row = conn.execute(
+                "SELECT id, attempts, name, resume_path, job_url, job_text, output_format FROM jobs "
+                "WHERE status = 'pending' OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated = ? WHERE id = ?",
+                (owner, now + self.lease_seconds, now, row[0])
+            )
+        return ClaimedJob(row[0], owner, row[1] + 1, BatchJob(*row[2:]))
+
+    def artifacts(self, job_id):
+        """Return {name: value} of everything stored for a pair."""
+        with self._lock:
+            rows = self._connection().execute("SELECT name, value FROM artifacts WHERE job_id = ?", (job_id,)).fetchall()
+        return {name: json.loads(zlib.decompress(value).decode("utf-8")) for name, value in rows}
+
+    def save(self, claim, stage, **artifacts):
+        """Store artifacts, advance the pair to stage (never backwards) and renew the lease.
 
-def main():
+        Raises LeaseLostError if the claim is no longer current.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT stage FROM jobs WHERE id = ? AND owner = ? AND status = 'running'", (claim.id, claim.owner)
+            ).fetchone()
+            if row is None:
+                raise LeaseLostError(f"Lost the claim on {claim.job.name}")
+            conn.executemany(
+                "INSERT OR REPLACE INTO artifacts (job_id, name, value) VALUES (?, ?, ?)",
+                [
+                    (claim.id, name, zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8")))
+                    for name, value in artifacts.items()
+                ]
+            )
+            stage = max(row[0], stage, key=QUEUE_STAGES.index)
+            conn.execute(
+                "UPDATE jobs SET stage = ?, lease_until = ?, updated = ? WHERE id = ?",
+                (stage, now + self.lease_seconds, now, claim.id)
+            )
+
+    def complete(self, claim, error=None):
+        """Mark a claimed pair done; error records a partial result."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', error = ?, lease_until = NULL, updated = ? "
+                "WHERE id = ? AND owner = ?",
+                (error, time.time(), claim.id, claim.owner)
+            )
+
+    def fail(self, claim, error):
+        """Record a failed attempt; returns the new status ("pending" to retry, or "failed")."""
+        status = "pending" if claim.attempts < self.max_attempts else "failed"
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_until = NULL, updated = ? WHERE id = ? AND owner = ?",
+                (status, error, time.time(), claim.id, claim.owner)
+            )
+        return status
+
+    def unfinished(self):
+        """Number of pairs still pending or running (in any process)."""
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')"
+            ).fetchone()[0]
+
+    def summaries(self, names=None):
+        """Return a summary dict per pair (in queue order, or in the order of names)."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, name, resume_path, job_url, stage, status, attempts, error FROM jobs ORDER BY id"
+            ).fetchall()
+        summaries = {}
+        for job_id, name, resume_path, job_url, stage, status, attempts, error in rows:
+            summary = {
+                "name": name, "resume": resume_path, "job_url": job_url,
+                "status": {"done": "partial" if error else "ok", "failed": "error"}.get(status, status),
+                "stage": stage, "attempts": attempts
+            }
+            if status == "done":
+                artifacts = self.artifacts(job_id)
+                summary["ats_score"] = artifacts.get("ats_match", {}).get("score")
+                summary["outputs"] = artifacts.get("outputs", [])
+            if error:
+                summary["error"] = error
+            summaries[name] = summary
+        return [summaries[name] for name in names if name in summaries] if names is not None else list(summaries.values())
+
+
+class _SharedResults:
+    """Compute each key once per run, even when several threads ask at the same time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+
+    def get(self, key, func, *args):
+        with self._lock:
+            future = self._futures.get(key)
+            first = future is None
+            if first:
+                future = self._futures[key] = Future()
+        if first:
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                # Failures are not kept: the next caller (e.g. a retry) tries again
+                with self._lock:
+                    del self._futures[key]
+                future.set_exception(e)
+        return future.result()
+
+
+def process_queued_job(engine, queue, claim, output_dir, shared=None):
+    """Run the stages a claimed pair has not completed yet, saving after each one.
+
+    Each LLM answer is stored the moment it arrives, so a crash never loses
+    a paid-for call. If an LLM call fails while attempts remain, the error is
+    raised so the pair is retried later; on the last attempt whatever came
+    back is rendered. Returns an error string for a partial result, else None.
+    """
+    shared = shared or _SharedResults()
+    job = claim.job
+    artifacts = queue.artifacts(claim.id)
+    
+    if "job_description" not in artifacts:
+        artifacts["job_description"] = shared.get(
+            ("job", job.job_url, job.job_text), engine.get_job_description, job.job_url, job.job_text
+        )
+        queue.save(claim, "fetched", job_description=artifacts["job_description"])
+    job_description = artifacts["job_description"]
+    
+    if "resume_text" not in artifacts:
+        resume_text = shared.get(("resume", job.resume_path), lambda path: engine.extract_resume(path)[0], job.resume_path)
+        if not resume_text:
+            raise ValueError("Could not extract text from the resume")
+        artifacts["resume_text"] = resume_text
+        queue.save(claim, "extracted", resume_text=resume_text)
+    resume_text = artifacts["resume_text"]
+    
+    calls = {
+        "optimize": (engine.optimize_resume, "optimized_resume", "optimized"),
+        "analyze": (engine.generate_analysis_report, "analysis", "analyzed")
+    }
+    missing = [task for task, (_, artifact, _) in calls.items() if artifact not in artifacts]
+    errors = {}
+    if missing:
+        def run_task(task):
+            func, artifact, stage = calls[task]
+            content = func(resume_text, job_description)
+            queue.save(claim, stage, **{artifact: content})
+            return content
+        
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            futures = {task: pool.submit(run_task, task) for task in missing}
+        for task, future in futures.items():
+            try:
+                artifacts[calls[task][1]] = future.result()
+            except LeaseLostError:
+                raise
+            except Exception as e:
+                errors[task] = e
+        if errors and (claim.attempts < queue.max_attempts or len(errors) == len(calls)):
+            raise next(iter(errors.values()))
+    
+    ats_match = engine.ats_scorer.score(resume_text, compact_job_description(job_description))
+    analysis_report = format_ats_report(ats_match)
+    if artifacts.get("analysis"):
+        analysis_report += "\n\n" + artifacts["analysis"]
+    result = PipelineResult(
+        resume_text=resume_text,
+        job_description=job_description,
+        optimized_resume=artifacts.get("optimized_resume") or "",
+        analysis_report=analysis_report,
+        resume_format=detect_resume_format(job.resume_path),
+        ats_match=ats_match
+    )
+    outputs = write_batch_outputs(engine, job, result, output_dir)
+    queue.save(claim, "rendered", ats_match=ats_match, outputs=outputs)
+    error = "; ".join(f"{stage}: {e}" for stage, e in errors.items()) or None
+    queue.complete(claim, error)
+    return error
+
+
+def work_queue(queue, output_dir, engine=None, max_workers=4, log=print, poll_seconds=2.0):
+    """Claim and process pairs on max_workers threads until the queue is finished.
+
+    While other processes hold the last pairs, the workers wait and take
+    over any whose lease runs out.
+    """
+    engine = engine or ResumeOptimizerEngine(priority=PRIORITY_BULK)
+    shared = _SharedResults()
+    
+    def worker():
+        while True:
+            claim = queue.claim()
+            if claim is None:
+                if not queue.unfinished():
+                    return
+                time.sleep(poll_seconds)
+                continue
+            name = claim.job.name
+            try:
+                error = process_queued_job(engine, queue, claim, output_dir, shared)
+                log(f"[partial] {name}: {error}" if error else f"[ok] {name}")
+            except LeaseLostError:
+                log(f"[lost] {name}: lease expired, left to its new worker")
+            except Exception as e:
+                status = queue.fail(claim, str(e))
+                log(f"[{'retry' if status == 'pending' else 'error'}] {name}: {e}")
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for future in [pool.submit(worker) for _ in range(max_workers)]:
+            future.result()
+
+
+def run_batch(jobs, output_dir, max_workers=4, engine=None, log=print):
+    """Run every job through the pipeline on a bounded worker pool.
+
+    Pairs go through the durable JobQueue in output_dir, so running the same
+    batch again after an interruption only does the work that is left, and
+    extra processes can help with `worker`. Each distinct resume is extracted
+    once and each distinct job posting is fetched once per process. Returns
+    one summary dict per job, in input order, and writes it to summary.json.
+    """
+    engine = engine or ResumeOptimizerEngine(priority=PRIORITY_BULK)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    queue = JobQueue(os.path.join(output_dir, BATCH_QUEUE_FILE))
+    queue.enqueue(jobs)
+    work_queue(queue, output_dir, engine, max_workers, log)
+    summaries = queue.summaries([job.name for job in jobs])
+    
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summaries, f, indent=2)
+    engine.metrics.write_prometheus(os.path.join(output_dir, "metrics.prom"))
+    return summaries
+
+
+def run_fan_out(resume_path, jobs, output_dir, max_workers=4, engine=None, log=print):
+    """Optimize one resume for many job postings ("one resume, many jobs").
+
+    The resume is parsed once. The first posting runs on its own so the
+    provider has cached the shared prompt prefix (system prompt and resume)
+    before the others are sent concurrently. Every posting's summary records
+    its latency and the share of prompt tokens served from the provider's
+    prefix cache. Returns the summaries in input order and writes them to
+    summary.json.
+    """
+    engine = engine or ResumeOptimizerEngine(priority=PRIORITY_BULK)
+    os.makedirs(output_dir, exist_ok=True)
+    resume_text, _ = engine.extract_resume(resume_path)
+    if not resume_text:
+        raise ValueError("Could not extract text from the resume")
+    
+    def process(job, job_future):
+        summary = {"name": job.name, "job_url": job.job_url}
+        usage = TokenUsage()
+        started = None
+        try:
+            job_description = job_future.result()
+            started = time.perf_counter()
+            result = engine.run(resume_path, job_description=job_description, resume_text=resume_text, usage=usage)
+            summary["ats_score"] = result.ats_match.get("score")
+            summary["outputs"] = write_batch_outputs(engine, job, result, output_dir)
+            if result.errors:
+                summary["status"] = "partial"
+                summary["error"] = "; ".join(f"{stage}: {e}" for stage, e in result.errors.items())
+            else:
+                summary["status"] = "ok"
+        except Exception as e:
+            summary["status"] = "error"
+            summary["error"] = str(e)
+        summary["seconds"] = round(time.perf_counter() - started, 3) if started else None
+        summary.update(usage.as_dict())
+        log(
+            f"[{summary['status']}] {job.name}: {summary['seconds'] or 0:.2f}s, "
+            f"{usage.cached_tokens}/{usage.prompt_tokens} prompt tokens cached ({usage.cached_ratio():.0%})"
+            + (f": {summary['error']}" if "error" in summary else "")
+        )
+        return summary
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        job_futures = [pool.submit(engine.get_job_description, job.job_url, job.job_text) for job in jobs]
+        summaries = [process(jobs[0], job_futures[0])] if jobs else []
+        futures = [pool.submit(process, job, job_future) for job, job_future in zip(jobs[1:], job_futures[1:])]
+        summaries += [future.result() for future in futures]
+    
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summaries, f, indent=2)
+    engine.metrics.write_prometheus(os.path.join(output_dir, "metrics.prom"))
+    return summaries
+
+
+# HTTP service mode: one shared instance serving many users. Uploads are
+# streamed to disk, LLM calls are awaited on the event loop, parsing and
+# rendering run in the process pool. Job state lives in memory; results are
+# files under the data directory.
+SERVICE_MAX_UPLOAD_MB = float(os.getenv("RESUME_OPTIMIZER_SERVICE_MAX_UPLOAD_MB", "20"))
+SERVICE_MAX_JOBS = int(os.getenv("RESUME_OPTIMIZER_SERVICE_MAX_JOBS", "16"))
+# Finished jobs are forgotten after this many seconds, oldest first beyond
+# SERVICE_MAX_FINISHED_JOBS; their result files stay on disk
+SERVICE_JOB_TTL = float(os.getenv("RESUME_OPTIMIZER_SERVICE_JOB_TTL", "86400"))
+SERVICE_MAX_FINISHED_JOBS = int(os.getenv("RESUME_OPTIMIZER_SERVICE_MAX_FINISHED_JOBS", "1000"))
+SERVICE_CHUNK_SIZE = 64 * 1024
+
+_HTTP_REASONS = {
+    200: "OK", 201: "Created", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 411: "Length Required",
+    413: "Payload Too Large", 500: "Internal Server Error"
+}
+
+_CONTENT_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+}
+
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class _HTTPError(Exception):
+    """An error answered with the given status and a JSON {"error": message} body."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ResumeService:
+    """asyncio HTTP front end for the pipeline.
+
+    Endpoints (JSON unless noted):
+        GET  /health                   status, job counts and LLM scheduler stats
+        PUT  /uploads/<filename>       raw PDF/DOCX body; returns its upload_id
+        POST /jobs                     {"upload_id", "job_url" or "job_text", "format"}
+        GET  /jobs/<id>                job status, ATS score, token usage, outputs
+        GET  /jobs/<id>/resume         the rendered resume (?format= picks one of "all")
+        GET  /jobs/<id>/report         the analysis report as text
+    
+    At most max_jobs jobs run at once; the rest wait as "queued". Finished
+    jobs are kept for job_ttl seconds, and at most max_finished_jobs of them.
+    """
+
+    def __init__(self, data_dir, engine=None, max_jobs=SERVICE_MAX_JOBS,
+                 max_upload_bytes=int(SERVICE_MAX_UPLOAD_MB * 1024 * 1024),
+                 job_ttl=SERVICE_JOB_TTL, max_finished_jobs=SERVICE_MAX_FINISHED_JOBS):
+        self.data_dir = data_dir
+        self.upload_dir = os.path.join(data_dir, "uploads")
+        self.jobs_dir = os.path.join(data_dir, "jobs")
+        self.engine = engine or ResumeOptimizerEngine()
+        self.max_jobs = max_jobs
+        self.max_upload_bytes = max_upload_bytes
+        self.job_ttl = job_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs = {}
+        self._tasks = set()
+        self._slots = None
+
+    async def serve(self, host="127.0.0.1", port=8080, ready=None):
+        """Listen until cancelled. ready(server) is called once the socket is bound."""
+        os.makedirs(self.upload_dir, exist_ok=True)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        # Fetches and cache lookups block a thread each, so allow one per job and then some
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.max_jobs * 2 + 4))
+        self._slots = asyncio.Semaphore(self.max_jobs)
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        if ready:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        """Answer one request per connection."""
+        try:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            try:
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = request_line.split(" ", 2)
+                headers = {
+                    name.strip().lower(): value.strip()
+                    for name, _, value in (line.partition(":") for line in header_lines if line)
+                }
+                url = urllib.parse.urlsplit(target)
+                response = await self.dispatch(method, url.path, urllib.parse.parse_qs(url.query), headers, reader, writer)
+            except _HTTPError as e:
+                response = e.status, {"error": e.message}
+            except ValueError as e:
+                response = 400, {"error": str(e)}
+            if response is not None:
+                await self._send_json(writer, *response)
+        except ConnectionError:
+            pass
+        except Exception as e:
+            print(f"Service error: {e}", file=sys.stderr)
+            with contextlib.suppress(Exception):
+                await self._send_json(writer, 500, {"error": "Internal server error"})
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, query, headers, reader, writer):
+        """Route a request; returns (status, JSON body), or None once a file has been streamed."""
+        parts = [part for part in path.split("/") if part]
+        if parts == ["health"] and method == "GET":
+            statuses = Counter(job["status"] for job in self.jobs.values())
+            return 200, {"status": "ok", "jobs": dict(statuses), "llm": self.engine.scheduler.stats()}
+        if len(parts) == 2 and parts[0] == "uploads" and method == "PUT":
+            return await self._receive_upload(urllib.parse.unquote(parts[1]), headers, reader, writer)
+        if parts == ["jobs"] and method == "POST":
+            return self._submit_job(await self._read_json(headers, reader, writer))
+        if len(parts) in (2, 3) and parts[0] == "jobs" and method == "GET":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise _HTTPError(404, f"No job {parts[1]}")
+            if len(parts) == 2:
+                return 200, self._job_status(job)
+            return await self._send_result(writer, job, parts[2], query)
+        raise _HTTPError(404 if parts[:1] not in (["health"], ["uploads"], ["jobs"]) else 405, f"No route for {method} {path}")
+
+    async def _content_length(self, headers, writer, limit):
+        """Check Content-Length against limit, then let a waiting client send its body."""
+        length = headers.get("content-length")
+        if length is None:
+            raise _HTTPError(411, "Content-Length is required")
+        if not length.isdigit():
+            raise _HTTPError(400, "Invalid Content-Length")
+        if int(length) > limit:
+            raise _HTTPError(413, f"Body exceeds {limit} bytes")
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        return int(length)
+
+    async def _read_json(self, headers, reader, writer):
+        length = await self._content_length(headers, writer, 1024 * 1024)
+        try:
+            body = await reader.readexactly(length)
+        except asyncio.IncompleteReadError as e:
+            raise _HTTPError(400, f"Body ended after {len(e.partial)} of {length} bytes")
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            # JSONDecodeError, or UnicodeDecodeError for a body that isn't UTF-8/16/32
+            raise _HTTPError(400, f"Invalid JSON: {e}")
+
+    def _upload_path(self, upload_id, resume_format):
+        return os.path.join(self.upload_dir, upload_id + FORMAT_EXTENSIONS[resume_format])
+
+    async def _receive_upload(self, filename, headers, reader, writer):
+        """Stream an upload to disk in chunks; its SHA-256 is the upload_id."""
+        resume_format = detect_resume_format(filename)
+        if resume_format == 'unknown':
+            raise _HTTPError(400, "Unsupported file format. Please use PDF or DOCX files.")
+        length = await self._content_length(headers, writer, self.max_upload_bytes)
+        
+        digest = hashlib.sha256()
+        temp_path = os.path.join(self.upload_dir, f".{os.urandom(8).hex()}.part")
+        try:
+            with open(temp_path, "wb") as f:
+                remaining = length
+                while remaining:
+                    chunk = await reader.read(min(SERVICE_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise _HTTPError(400, "Upload ended before Content-Length bytes")
+                    digest.update(chunk)
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            upload_id = digest.hexdigest()
+            os.replace(temp_path, self._upload_path(upload_id, resume_format))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return 201, {"upload_id": upload_id, "format": resume_format, "bytes": length}
+
+    def _submit_job(self, request):
+        """Create a job from a POST /jobs body and start it in the background."""
+        if not isinstance(request, dict):
+            raise _HTTPError(400, "Expected a JSON object")
+        upload_id = str(request.get("upload_id", ""))
+        resume_path = None
+        if _UPLOAD_ID_RE.match(upload_id):
+            resume_path = next((
+                path for path in (self._upload_path(upload_id, fmt) for fmt in ("pdf", "docx"))
+                if os.path.exists(path)
+            ), None)
+        if resume_path is None:
+            raise _HTTPError(404, f"No upload {upload_id!r}")
+        job_url = str(request.get("job_url") or "")
+        job_text = str(request.get("job_text") or "")
+        if not job_url and not job_text:
+            raise _HTTPError(400, "Please enter either a job URL or paste the job description")
+        output_format = request.get("format") or "same_as_input"
+        if output_format not in ("same_as_input", "all") and output_format not in FORMAT_EXTENSIONS:
+            raise _HTTPError(400, f"Unknown format {output_format!r}")
+        
+        self._evict_finished_jobs()
+        job_id = os.urandom(8).hex()
+        job = {
+            "id": job_id, "status": "queued", "created": time.time(), "upload_id": upload_id,
+            "job_url": job_url, "format": output_format, "outputs": [],
+            "_resume_path": resume_path, "_job_text": job_text
+        }
+        self.jobs[job_id] = job
+        task = asyncio.get_running_loop().create_task(self._run_job(job))
+        # The loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return 202, self._job_status(job)
+
+    def _evict_finished_jobs(self):
+        """Forget finished jobs past job_ttl, and the oldest beyond max_finished_jobs."""
+        # self.jobs is in submission order, close enough to finishing order
+        finished = [job for job in self.jobs.values() if "finished" in job]
+        excess = len(finished) - self.max_finished_jobs
+        expired = time.time() - self.job_ttl
+        for index, job in enumerate(finished):
+            if index < excess or job["finished"] < expired:
+                del self.jobs[job["id"]]
+
+    def _job_status(self, job):
+        return {key: value for key, value in job.items() if not key.startswith("_")}
+
+    async def _run_job(self, job):
+        """Run the pipeline for one job once a slot is free, recording the outcome on job."""
+        async with self._slots:
+            job["status"] = "running"
+            started = time.perf_counter()
+            usage = TokenUsage()
+            try:
+                error = await self._process(job, usage)
+                job["status"] = "partial" if error else "done"
+                if error:
+                    job["error"] = error
+            except Exception as e:
+                job["status"] = "error"
+                job["error"] = str(e)
+            job["seconds"] = round(time.perf_counter() - started, 3)
+            job.update(usage.as_dict())
+            job["finished"] = time.time()
+
+    async def _process(self, job, usage):
+        """Fetch, extract, optimize and analyze (concurrently), then render. Returns a partial-result error or None."""
+        engine = self.engine
+        resume_path = job["_resume_path"]
+        job_description = job["_job_text"] or await self._job_description(job["job_url"])
+        resume_text = await self._resume_text(resume_path, job["upload_id"])
+        if not resume_text:
+            raise ValueError("Could not extract text from the resume")
+        
+        ats_match = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: engine.ats_scorer.score(resume_text, compact_job_description(job_description))
+        )
+        job["ats_score"] = ats_match.get("score")
+        optimized_resume, analysis = await asyncio.gather(
+            engine.aoptimize_resume(resume_text, job_description, usage=usage),
+            engine.agenerate_analysis_report(resume_text, job_description, usage=usage),
+            return_exceptions=True
+        )
+        errors = {
+            stage: result for stage, result in (("optimize", optimized_resume), ("analyze", analysis))
+            if isinstance(result, BaseException)
+        }
+        if len(errors) == 2:
+            raise errors["optimize"]
+        
+        analysis_report = format_ats_report(ats_match)
+        if "analyze" not in errors and analysis:
+            analysis_report += "\n\n" + analysis
+        result = PipelineResult(
+            resume_text=resume_text,
+            job_description=job_description,
+            optimized_resume="" if "optimize" in errors else optimized_resume or "",
+            analysis_report=analysis_report,
+            resume_format=detect_resume_format(resume_path),
+            ats_match=ats_match,
+            errors=errors
+        )
+        # Renders go to the process pool; this thread only waits for them
+        output_job = BatchJob(name=job["id"], resume_path=resume_path, output_format=job["format"])
+        paths = await asyncio.get_running_loop().run_in_executor(
+            None, write_batch_outputs, engine, output_job, result, self.jobs_dir
+        )
+        job["outputs"] = [os.path.basename(path) for path in paths]
+        return "; ".join(f"{stage}: {e}" for stage, e in errors.items()) or None
+
+    async def _job_description(self, job_url):
+        """Fetch on a thread (shared session and HTTP cache), parse in the process pool."""
+        loop = asyncio.get_running_loop()
+        html = await loop.run_in_executor(None, self.engine.fetch_url, job_url)
+        async with self.engine.metrics.aspan("parse_job", bytes=len(html)):
+            job_description = await loop.run_in_executor(get_process_pool(), extract_main_text, html)
+        if not job_description:
+            raise ValueError(f"No job description found at {job_url}")
+        return job_description
+
+    async def _resume_text(self, resume_path, digest):
+        """Parse an upload in the process pool, through the engine's parsed-resume cache."""
+        cache = self.engine.resume_cache
+        key = resume_cache_key(detect_resume_format(resume_path), digest)
+        loop = asyncio.get_running_loop()
+        async with self.engine.metrics.aspan("extract_resume") as span:
+            span.bytes = os.path.getsize(resume_path)
+            cached = await loop.run_in_executor(None, cache.get, key) if cache.enabled else None
+            if cached is not None:
+                return cached["formatted"] or cached["text"]
+            text, formatted_text = await loop.run_in_executor(get_process_pool(), parse_resume_file, resume_path)
+            if cache.enabled and (text or formatted_text):
+                await loop.run_in_executor(None, cache.set, key, {"text": text, "formatted": formatted_text})
+        return formatted_text or text
+
+    async def _send_result(self, writer, job, kind, query):
+        """Stream a finished job's resume or report."""
+        if kind == "report":
+            name = "analysis_report.txt"
+        elif kind == "resume":
+            wanted = query.get("format", [""])[0]
+            name = next((
+                output for output in job["outputs"]
+                if output.startswith("optimized_resume.") and (not wanted or output.endswith("." + wanted))
+            ), None)
+        else:
+            raise _HTTPError(404, f"No result {kind!r}")
+        if job["status"] in ("queued", "running"):
+            raise _HTTPError(409, f"Job is {job['status']}")
+        if name not in job["outputs"]:
+            raise _HTTPError(404, f"Job {job['id']} has no {kind}")
+        
+        path = os.path.join(self.jobs_dir, job["id"], name)
+        size = os.path.getsize(path)
+        content_type = _CONTENT_TYPES[os.path.splitext(name)[1][1:]]
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nContent-Length: {size}\r\n"
+            f"Content-Disposition: attachment; filename=\"{name}\"\r\nConnection: close\r\n\r\n".encode("latin-1")
+        )
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(SERVICE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        return None
+
+    async def _send_json(self, writer, status, body):
+        data = json.dumps(body).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_HTTP_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data
+        )
+        await writer.drain()
+
+
+def build_arg_parser():
+    """Build the command line parser for headless use."""
+    parser = argparse.ArgumentParser(
+        prog="resume_optimizer",
+        description="Resume Optimizer Pro. Run without arguments to start the desktop app."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    batch_parser = subparsers.add_parser("batch", help="Optimize N resumes against M job descriptions")
+    batch_parser.add_argument("manifest", help="JSON manifest listing resumes and jobs")
+    batch_parser.add_argument("-o", "--output-dir", default="optimized_resumes", help="Directory for the results")
+    batch_parser.add_argument("-w", "--workers", type=int, default=4, help="Number of parallel workers")
+    batch_parser.add_argument(
+        "-f", "--format",
+        choices=["same_as_input", "txt", "docx", "pdf", "all"],
+        help="Output format (overrides the manifest)"
+    )
+    batch_parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response, parsed resume and HTTP caches")
+    
+    worker_parser = subparsers.add_parser("worker", help="Help finish a batch run that another process started")
+    worker_parser.add_argument("output_dir", help="Output directory of the batch run")
+    worker_parser.add_argument("-w", "--workers", type=int, default=4, help="Number of parallel workers")
+    
+    fan_out_parser = subparsers.add_parser("fanout", help="Optimize one resume for every job in a manifest")
+    fan_out_parser.add_argument("resume", help="Resume file (PDF or DOCX)")
+    fan_out_parser.add_argument("manifest", help="JSON manifest listing the jobs (its resumes are ignored)")
+    fan_out_parser.add_argument("-o", "--output-dir", default="optimized_resumes", help="Directory for the results")
+    fan_out_parser.add_argument("-w", "--workers", type=int, default=4, help="Number of parallel workers")
+    fan_out_parser.add_argument(
+        "-f", "--format",
+        choices=["same_as_input", "txt", "docx", "pdf", "all"],
+        help="Output format (overrides the manifest)"
+    )
+    fan_out_parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM response, parsed resume and HTTP caches")
+    
+    serve_parser = subparsers.add_parser("serve", help="Run the pipeline as a local HTTP service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument("--data-dir", default="resume_service", help="Directory for uploads and results")
+    serve_parser.add_argument("--max-jobs", type=int, default=SERVICE_MAX_JOBS, help="Jobs processed at the same time")
+    
+    stub_parser = subparsers.add_parser(
+        "stub-server",
+        help="Run a local OpenAI-compatible stand-in for offline load tests"
+    )
+    stub_parser.add_argument("--host", default="127.0.0.1")
+    stub_parser.add_argument("--port", type=int, default=8089)
+    stub_parser.add_argument("--latency", type=float, default=0.0, help="Seconds before each answer starts")
+    stub_parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    
+    background_parser = subparsers.add_parser(
+        "ats-background",
+        help="Count keyword document frequencies over saved job postings for the local ATS score"
+    )
+    background_parser.add_argument("postings", nargs="+", help="Job postings saved as .txt or .html files")
+    background_parser.add_argument("-o", "--output", default="ats_background.json", help="JSON file to write")
+    return parser
+
+
+def cli(argv=None):
+    """Command line entry point. Returns a process exit code."""
+    args = build_arg_parser().parse_args(argv)
+    
+    if args.command == "stub-server":
+        server = make_stub_server(args.host, args.port, latency=args.latency, chunk_delay=args.chunk_delay)
+        print(f"Stub OpenAI API listening on http://{args.host}:{server.server_address[1]}/v1 (Ctrl+C to stop)")
+        print(f"Point the app at it with RESUME_OPTIMIZER_LLM_BASE_URL=http://{args.host}:{server.server_address[1]}/v1")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return 0
+    
+    if args.command == "ats-background":
+        def job_descriptions():
+            for path in args.postings:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+                if path.lower().endswith((".html", ".htm")):
+                    text = extract_main_text(text)
+                yield compact_job_description(text)
+        
+        background = build_ats_background(job_descriptions())
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(background, f)
+        print(f"Counted {len(background['document_frequency'])} terms over {background['documents']} postings into {args.output}")
+        print(f"Use it with RESUME_OPTIMIZER_ATS_BACKGROUND={args.output}")
+        return 0
+    
+    if args.command == "serve":
+        if get_model_router().needs_openai_key() and not os.getenv("OPENAI_API_KEY"):
+            print("OPENAI_API_KEY is not set. Add it to the environment or a .env file.", file=sys.stderr)
+            return 2
+        service = ResumeService(args.data_dir, max_jobs=max(1, args.max_jobs))
+        
+        def ready(server):
+            host, port = server.sockets[0].getsockname()[:2]
+            print(f"Resume service listening on http://{host}:{port} (Ctrl+C to stop)")
+        
+        try:
+            asyncio.run(service.serve(args.host, args.port, ready=ready))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    
+    if args.command == "worker":
+        queue_path = os.path.join(args.output_dir, BATCH_QUEUE_FILE)
+        if not os.path.exists(queue_path):
+            print(f"No batch queue in {args.output_dir}", file=sys.stderr)
+            return 2
+        if get_model_router().needs_openai_key() and not os.getenv("OPENAI_API_KEY"):
+            print("OPENAI_API_KEY is not set. Add it to the environment or a .env file.", file=sys.stderr)
+            return 2
+        queue = JobQueue(queue_path)
+        work_queue(queue, args.output_dir, max_workers=max(1, args.workers))
+        failed = sum(1 for summary in queue.summaries() if summary["status"] != "ok")
+        print(f"Queue finished, {failed} pairs failed. Results in {args.output_dir}")
+        return 1 if failed else 0
+    
+    if args.command in ("batch", "fanout"):
+        if get_model_router().needs_openai_key() and not os.getenv("OPENAI_API_KEY"):
+            print("OPENAI_API_KEY is not set. Add it to the environment or a .env file.", file=sys.stderr)
+            return 2
+        if args.command == "fanout":
+            jobs = load_fan_out_jobs(args.resume, args.manifest)
+        else:
+            jobs = load_batch_manifest(args.manifest)
+        duplicates = duplicate_job_names(jobs)
+        if duplicates:
+            # Left after load_batch_manifest made names unique: the same resume listed twice
+            print(f"The manifest lists these pairs more than once: {', '.join(duplicates)}", file=sys.stderr)
+            return 2
+        if args.format:
+            for job in jobs:
+                job.output_format = args.format
+        engine = ResumeOptimizerEngine(priority=PRIORITY_BULK)
+        if args.no_cache:
+            engine.llm_cache.enabled = False
+            engine.resume_cache.enabled = False
+            engine.http_cache.enabled = False
+        if args.command == "fanout":
+            try:
+                summaries = run_fan_out(args.resume, jobs, args.output_dir, max_workers=max(1, args.workers), engine=engine)
+            except Exception as e:
+                print(f"Error reading resume file: {e}", file=sys.stderr)
+                return 1
+        else:
+            summaries = run_batch(jobs, args.output_dir, max_workers=max(1, args.workers), engine=engine)
+        failed = sum(1 for summary in summaries if summary["status"] != "ok")
+        print(f"Processed {len(summaries)} jobs, {failed} failed. Results in {args.output_dir}")
+        if args.command == "fanout" and summaries:
+            prompt_tokens = sum(summary["prompt_tokens"] for summary in summaries)
+            cached_tokens = sum(summary["cached_tokens"] for summary in summaries)
+            latencies = sorted(summary["seconds"] for summary in summaries if summary["seconds"] is not None)
+            print(
+                f"Prompt cache: {cached_tokens}/{prompt_tokens} prompt tokens cached "
+                f"({cached_tokens / prompt_tokens if prompt_tokens else 0:.0%})"
+            )
+            if latencies:
+                print(f"Latency per posting: first {summaries[0]['seconds'] or 0:.2f}s, median {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s")
+        if engine.llm_cache.enabled:
+            stats = engine.llm_cache.stats()
+            print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+        stats = engine.scheduler.stats()
+        print(f"LLM requests: {stats['calls']} calls, {stats['retries']} retries, {stats['wait_seconds']:.1f}s queued for quota")
+        print("Stage timings:")
+        for stage, stats in engine.metrics.summary().items():
+            print(
+                f"  {stage:15s} {stats['count']:4d} runs {stats['seconds']:9.2f}s "
+                f"{stats['bytes']:10d} bytes {stats['tokens']:8d} tokens"
+            )
+        return 1 if failed else 0
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        # Headless mode: no window, paths are relative to the caller's directory
+        return cli(argv)
+    
     # Check if running as script or frozen executable
     if getattr(sys, 'frozen', False):
         # Running as compiled executable
@@ -1196,11 +5182,14 @@ def main():
         # Running as script
         os.chdir(os.path.dirname(os.path.abspath(__file__)))
     
+    # Set CustomTkinter appearance
+    ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
+    ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
+    
     # Create root window
     root = ctk.CTk()
     app = ResumeOptimizerApp(root)
     root.mainloop()
 
 if __name__ == "__main__":
-    import sys
-    main()
\ No newline at end of file
+    sys.exit(main())
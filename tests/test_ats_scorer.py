@@ -0,0 +1,88 @@
+"""ATSScorer keyword selection and scoring."""
+import sys
+import time
+
+import resume_optimizer
+from resume_optimizer import ATSScorer, ats_proper_nouns, build_ats_background
+
+SKILL_HEAVY_JOB = """\
+Senior Backend Engineer
+at Northwind Analytics
+Remote (US) or Austin, TX
+Northwind Analytics builds the data platform that thousands of retailers use. Our pipeline processes four billion events a day.
+Design and build services in Python and Go running on Kubernetes
+Own the ingestion pipeline built on Kafka and PostgreSQL
+Deep experience with Python, including asyncio
+Familiarity with Terraform and CI/CD pipelines
+"""
+
+OTHER_JOBS = [
+    "Senior Product Designer. Design services for our data team every day. Deep user research experience.",
+    "Data Engineer, senior level. Build and design data services; own the data platform day to day.",
+    "Senior Software Engineer. Design and own services, deep systems knowledge, on call one day a week.",
+]
+
+SKILLS = ["python", "go", "kubernetes", "kafka", "postgresql", "asyncio", "terraform", "ci/cd"]
+GENERIC = ["day", "deep", "design", "data", "senior", "engineer", "services"]
+
+
+def keywords(match):
+    return match["matched"] + match["missing"]
+
+
+def test_skills_outrank_words_every_posting_uses():
+    pairs = [("", SKILL_HEAVY_JOB)] + [("", job) for job in OTHER_JOBS]
+    ranked = ATSScorer().score_batch(pairs)[0]["missing"]
+    last_skill = max(ranked.index(skill) for skill in SKILLS)
+    for word in GENERIC:
+        assert word not in ranked or ranked.index(word) > last_skill, word
+
+
+def test_background_weights_a_single_pair_like_a_batch():
+    background = build_ats_background(OTHER_JOBS)
+    assert background["documents"] == 3 and background["document_frequency"]["design"] == 3
+    single = ATSScorer(background=background).score("Python and Kafka", SKILL_HEAVY_JOB)
+    pairs = [("Python and Kafka", SKILL_HEAVY_JOB)] + [("", job) for job in OTHER_JOBS]
+    batch = ATSScorer().score_batch(pairs)[0]
+    # Scores differ only through the batch's average resume length
+    assert (single["matched"], single["missing"]) == (batch["matched"], batch["missing"])
+
+
+def test_names_and_numbers_are_not_keywords():
+    terms = keywords(ATSScorer().score("", SKILL_HEAVY_JOB))
+    for word in ("northwind", "austin", "tx", "four", "billion", "thousands"):
+        assert all(word not in term.split(" ") for term in terms), word
+    assert set(SKILLS) <= set(terms)
+
+
+def test_score_follows_skill_coverage():
+    scorer = ATSScorer()
+    partial = scorer.score("Python developer", SKILL_HEAVY_JOB)["score"]
+    full = scorer.score(" ".join(keywords(scorer.score("", SKILL_HEAVY_JOB))), SKILL_HEAVY_JOB)["score"]
+    assert 0 < partial < full == 100
+
+
+def test_proper_nouns():
+    assert ats_proper_nouns(SKILL_HEAVY_JOB) == {"northwind", "analytics", "austin", "tx"}
+    # Capitalized skills are not names
+    assert ats_proper_nouns("Acme is hiring. You will use Python and Snowflake with Ray daily.") == {"acme"}
+
+
+def test_stopwords_cover_number_words():
+    assert {"four", "billion", "hundred"} <= resume_optimizer._ATS_STOPWORDS
+
+
+def test_batch_cost_grows_linearly(monkeypatch):
+    # The pure-Python path, as when numpy is not installed
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    scorer = ATSScorer()
+
+    def timed(count):
+        pairs = [(f"Python resume {i}", f"{SKILL_HEAVY_JOB}\nSkill{i} and Tool{i} experience") for i in range(count)]
+        start = time.perf_counter()
+        results = scorer.score_batch(pairs)
+        assert len(results) == count
+        return time.perf_counter() - start
+
+    timed(50)
+    assert timed(800) < 40 * timed(100)
@@ -0,0 +1,42 @@
+"""Batch manifests and the durable job queue (no LLM calls)."""
+import json
+
+import pytest
+
+from resume_optimizer import JobQueue, cli, load_batch_manifest, load_fan_out_jobs
+
+
+def write_manifest(tmp_path, manifest):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    return str(path)
+
+
+def test_resumes_with_the_same_file_name_get_distinct_pairs(tmp_path):
+    manifest = write_manifest(tmp_path, {"resumes": ["a/resume.pdf", "b/resume.pdf", "c/other.pdf"], "jobs": ["Python"]})
+    names = [job.name for job in load_batch_manifest(manifest)]
+    assert len(set(names)) == 3
+    assert names[0].startswith("resume-") and names[0].endswith("__job1")
+    assert names[2] == "other__job1"
+    # Stable across loads, so a restarted run finds its pairs
+    assert names == [job.name for job in load_batch_manifest(manifest)]
+    JobQueue(str(tmp_path / "queue.sqlite")).enqueue(load_batch_manifest(manifest))
+
+
+def test_jobs_with_the_same_name_get_distinct_pairs(tmp_path):
+    manifest = write_manifest(tmp_path, {"jobs": [{"name": "backend", "text": "Go"}, {"name": "backend", "text": "Rust"}]})
+    assert [job.name for job in load_fan_out_jobs("resume.pdf", manifest)] == ["backend", "backend-2"]
+
+
+def test_duplicate_pairs_are_reported_before_anything_is_queued(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("OPENAI_API_KEY", "x")
+    manifest = write_manifest(tmp_path, {"resumes": ["a/resume.pdf", "a/resume.pdf"], "jobs": ["Python"]})
+    jobs = load_batch_manifest(manifest)
+    queue = JobQueue(str(tmp_path / "queue.sqlite"))
+    with pytest.raises(ValueError, match="__job1"):
+        queue.enqueue(jobs)
+    assert queue.summaries() == []
+
+    assert cli(["batch", manifest, "-o", str(tmp_path / "results")]) == 2
+    assert "more than once" in capsys.readouterr().err
+    assert not (tmp_path / "results").exists()
@@ -0,0 +1,32 @@
+"""Peak memory of a batch run stays flat as the batch grows (tracemalloc, LLM stubbed)."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import resume_optimizer
+from bench_batch_memory import build_templates, measure_batch
+from bench_pipeline import stub_completion
+
+WORKERS = 2
+
+
+@pytest.fixture
+def templates(tmp_path, monkeypatch):
+    monkeypatch.setattr(resume_optimizer.openai.chat.completions, "create", stub_completion)
+    templates = build_templates(str(tmp_path), pages=2)
+    # Imports, lazy caches and the render processes are set up here, not measured
+    measure_batch(str(tmp_path), templates, WORKERS, WORKERS)
+    return templates
+
+
+def test_peak_memory_per_job_stays_flat(tmp_path, templates):
+    # The DOCX resumes carry a 1 MB photo: kept per job, it would dominate
+    single = max(measure_batch(str(tmp_path), [template], 1, 1)[0] for template in templates)
+    small, _ = measure_batch(str(tmp_path), templates, WORKERS, WORKERS)
+    large, retained = measure_batch(str(tmp_path), templates, 4 * WORKERS, WORKERS)
+    assert large / WORKERS < 1.5 * single
+    assert large < 1.5 * small
+    assert retained < single
@@ -0,0 +1,74 @@
+"""Job description compaction and prompt budgeting."""
+from resume_optimizer import (
+    OPTIMIZE_SYSTEM_PROMPT, OPTIMIZE_USER_PROMPT, compact_job_description, fit_prompt_inputs
+)
+
+
+def test_phrases_only_match_whole_words():
+    job = "You will design intuitive interfaces for clinicians.\nYou will redesign checkout flows."
+    assert compact_job_description(job) == job
+
+
+def test_domain_words_are_kept():
+    job = (
+        "Dental Hygienist\n"
+        "Perform dental cleanings, x-rays and periodontal charting.\n"
+        "Screen patients for vision problems and refer them to our optometrist."
+    )
+    assert compact_job_description(job) == job
+
+
+def test_short_title_ends_a_boilerplate_section():
+    job = (
+        "About Us\n"
+        "Acme builds payments software for small businesses.\n"
+        "The Role\n"
+        "You'll write Python services for the ledger and own their on-call rotation."
+    )
+    compacted = compact_job_description(job)
+    assert "Acme builds" not in compacted
+    assert compacted.startswith("The Role\nYou'll write Python services")
+
+
+def test_boilerplate_is_removed():
+    job = (
+        "Backend Engineer\n"
+        "Build Python services on Kubernetes and own the ingestion pipeline end to end.\n"
+        "Tune PostgreSQL queries, design Kafka topics and mentor two junior engineers.\n"
+        "Benefits:\n"
+        "Medical, dental and vision insurance\n"
+        "401(k) with company match\n"
+        "We are an equal opportunity employer. All qualified applicants will be considered."
+    )
+    compacted = compact_job_description(job)
+    assert compacted.endswith("mentor two junior engineers.")
+
+
+def test_all_boilerplate_falls_back_to_the_original():
+    job = "About Us\nAcme builds payments software.\nWe value curiosity and kindness."
+    assert compact_job_description(job) == job
+
+
+def test_prompt_never_gets_an_empty_job_description():
+    job = "About Us\nAcme builds payments software.\nThe Role\nYou'll write Python."
+    _, fitted = fit_prompt_inputs(OPTIMIZE_SYSTEM_PROMPT, OPTIMIZE_USER_PROMPT, "Resume", job)
+    assert "You'll write Python." in fitted
+
+
+def test_benefit_list_items_do_not_end_the_section():
+    job = (
+        "Backend Engineer\n"
+        "Build Python services on Kubernetes and own the ingestion pipeline end to end.\n"
+        "Benefits\n"
+        "Flexible working hours\n"
+        "Generous parental leave\n"
+        "Home office stipend\n"
+        "Requirements\n"
+        "Five years of Go or Python and production experience with PostgreSQL."
+    )
+    assert compact_job_description(job) == (
+        "Backend Engineer\n"
+        "Build Python services on Kubernetes and own the ingestion pipeline end to end.\n"
+        "Requirements\n"
+        "Five years of Go or Python and production experience with PostgreSQL."
+    )
@@ -0,0 +1,33 @@
+"""DOCX text extraction."""
+import docx
+import pytest
+
+import resume_optimizer
+from resume_optimizer import parse_docx
+
+
+@pytest.fixture
+def resume_docx(tmp_path):
+    document = docx.Document()
+    document.add_paragraph("Jane Doe")
+    table = document.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Python"
+    table.cell(0, 1).text = "Kafka"
+    path = tmp_path / "resume.docx"
+    document.save(str(path))
+    return str(path)
+
+
+def test_tables_are_kept(resume_docx):
+    _, formatted = parse_docx(resume_docx)
+    assert formatted == "Jane Doe\n<table>\nPython\tKafka\t\n</table>\n"
+
+
+def test_changed_python_docx_internals_still_keep_tables(resume_docx, monkeypatch, capsys):
+    def changed(docx_file):
+        raise AttributeError("type object 'PackageReader' has no attribute '_srels_for'")
+
+    monkeypatch.setattr(resume_optimizer, "_open_docx_parts", changed)
+    with open(resume_docx, "rb") as f:
+        assert parse_docx(f)[1] == "Jane Doe\n<table>\nPython\tKafka\t\n</table>\n"
+    assert "python-docx internals have changed" in capsys.readouterr().err
@@ -0,0 +1,43 @@
+"""Job posting text extraction from HTML."""
+import pytest
+
+from resume_optimizer import extract_main_text
+
+PARSERS = ["lxml", "html.parser"]
+
+POSTING = """<html><body>
+<nav><a href="/">Jobs</a></nav>
+<div class="posting">
+  <h1>Backend Engineer</h1>
+  <p>Build Python services on Kubernetes, own the Kafka ingestion pipeline and tune PostgreSQL queries for latency.</p>
+  <form id="application_form" action="/apply" method="post">
+    <label>First Name <input type="text" name="first_name"></label>
+    <label>Resume/CV <input type="file" name="resume"></label>
+    <p>Submit application</p>
+  </form>
+</div>
+</body></html>"""
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_application_form_is_dropped(parser):
+    text = extract_main_text(POSTING, parser=parser)
+    assert "own the Kafka ingestion pipeline" in text
+    for label in ("First Name", "Resume/CV", "Submit application"):
+        assert label not in text
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_page_wrapped_in_a_form_keeps_its_text(parser):
+    html = '<html><body><form id="aspnetForm"><div><p>Build Python services and mentor engineers.</p></div></form></body></html>'
+    assert extract_main_text(html, parser=parser) == "Build Python services and mentor engineers."
+
+
+@pytest.mark.parametrize("job_type", ['"JobPosting"', '["JobPosting"]', '["Thing", "JobPosting"]'])
+def test_json_ld_type_may_be_a_list(job_type):
+    html = (
+        '<html><head><script type="application/ld+json">'
+        f'{{"@context": "https://schema.org", "@type": {job_type}, "description": "<p>Own our payments roadmap.</p>"}}'
+        '</script></head><body><p>Loading job details</p></body></html>'
+    )
+    assert extract_main_text(html) == "Own our payments roadmap."
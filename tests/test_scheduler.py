@@ -0,0 +1,99 @@
+"""LLMScheduler admission for threads and coroutines."""
+import asyncio
+import threading
+import time
+
+from resume_optimizer import LLMScheduler
+
+
+def make_scheduler(**kwargs):
+    return LLMScheduler(**{"rpm": 0, "tpm": 0, "max_concurrency": 2, **kwargs})
+
+
+def test_queued_coroutines_do_not_hold_threads():
+    scheduler = make_scheduler()
+    threads = []
+
+    async def call(index):
+        threads.append(threading.active_count())
+        await asyncio.sleep(0.001)
+        return index
+
+    async def main():
+        return await asyncio.gather(*(scheduler.arun(lambda i=i: call(i)) for i in range(100)))
+
+    assert asyncio.run(main()) == list(range(100))
+    assert max(threads) == threading.active_count()
+    assert scheduler.stats()["calls"] == 100
+
+
+def test_threads_and_coroutines_share_the_concurrency_limit():
+    scheduler = make_scheduler(max_concurrency=1)
+    active = []
+    lock = threading.Lock()
+
+    def enter():
+        with lock:
+            active.append(1)
+            assert len(active) == 1
+
+    def leave():
+        with lock:
+            active.pop()
+
+    def blocking_call():
+        enter()
+        time.sleep(0.02)
+        leave()
+
+    async def async_call():
+        enter()
+        await asyncio.sleep(0.02)
+        leave()
+
+    async def main():
+        workers = [threading.Thread(target=scheduler.run, args=(blocking_call,)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        await asyncio.gather(*(scheduler.arun(async_call) for _ in range(3)))
+        for worker in workers:
+            worker.join()
+
+    asyncio.run(main())
+    assert scheduler.stats()["calls"] == 6
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = make_scheduler(max_concurrency=1)
+
+    async def answer():
+        return 42
+
+    async def main():
+        scheduler._acquire(0, 0)
+        waiter = asyncio.ensure_future(scheduler.arun(answer))
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"] == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        scheduler._release()
+        stats = scheduler.stats()
+        assert (stats["active"], stats["queued"]) == (0, 0)
+        return await scheduler.arun(answer)
+
+    assert asyncio.run(main()) == 42
+
+
+def test_rate_limit_wait_is_timed_on_the_loop():
+    scheduler = make_scheduler(rpm=600, headroom=1.0, max_concurrency=4)
+
+    async def answer():
+        return 1
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(*(scheduler.arun(answer) for _ in range(603)))
+        return time.monotonic() - start
+
+    # 600 from the full bucket, then 10 per second
+    assert 0.2 < asyncio.run(main()) < 2
@@ -0,0 +1,110 @@
+"""ResumeService request handling (no LLM calls)."""
+import os
+import json
+import time
+import asyncio
+
+import pytest
+
+from resume_optimizer import ResumeService
+
+
+async def exchange(service, request):
+    """Send raw request bytes to a running service; returns (status, JSON body)."""
+    server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        writer.write_eof()
+        response = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(body)
+
+
+def post_jobs(body, content_length=None):
+    length = len(body) if content_length is None else content_length
+    return (
+        b"POST /jobs HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        + f"Content-Length: {length}\r\n\r\n".encode() + body
+    )
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = ResumeService(str(tmp_path))
+    # Created by serve(), which these tests bypass
+    os.makedirs(service.upload_dir)
+    return service
+
+
+def test_short_body_is_a_bad_request(service):
+    status, body = asyncio.run(exchange(service, post_jobs(b'{"upload_id": "', content_length=200)))
+    assert status == 400
+    assert "ended after 15 of 200 bytes" in body["error"]
+
+
+@pytest.mark.parametrize("payload", [b"{not json", b"\xff\xfe\xfd\xfc\xfb", b"[1, 2]"])
+def test_malformed_json_is_a_bad_request(service, payload):
+    status, body = asyncio.run(exchange(service, post_jobs(payload)))
+    assert status == 400
+    assert body["error"]
+
+
+def test_unknown_upload_is_not_found(service):
+    payload = json.dumps({"upload_id": "0" * 64, "job_text": "Python"}).encode()
+    status, _ = asyncio.run(exchange(service, post_jobs(payload)))
+    assert status == 404
+
+
+def test_short_upload_is_a_bad_request(service, tmp_path):
+    request = b"PUT /uploads/resume.pdf HTTP/1.1\r\nContent-Length: 5000\r\n\r\n%PDF-1.4 truncated"
+    status, _ = asyncio.run(exchange(service, request))
+    assert status == 400
+    assert not any(path.name.endswith(".part") for path in tmp_path.rglob("*"))
+
+
+def test_finished_jobs_are_evicted(tmp_path):
+    service = ResumeService(str(tmp_path), job_ttl=60, max_finished_jobs=2)
+    now = time.time()
+    for job_id, finished in (("expired", now - 120), ("a", now - 5), ("b", now - 4), ("running", None), ("c", now - 3)):
+        service.jobs[job_id] = {"id": job_id, "status": "running" if finished is None else "done"}
+        if finished is not None:
+            service.jobs[job_id]["finished"] = finished
+    service._evict_finished_jobs()
+    assert list(service.jobs) == ["b", "running", "c"]
+
+
+def test_blocking_completion_work_stays_off_the_loop(service):
+    engine = service.engine
+
+    def slow_prepare(*args):
+        # A cache lookup waiting on another thread's lock
+        time.sleep(0.3)
+        return [], None, "model", None, "cached answer", 0
+
+    engine._prepare_completion = slow_prepare
+    engine.metrics.jsonl_path = ""
+    engine.metrics.prometheus_path = ""
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        answer = await engine.agenerate_analysis_report("Resume", "Job")
+        task.cancel()
+        return answer, ticks
+
+    answer, ticks = asyncio.run(main())
+    assert answer == "cached answer"
+    assert ticks >= 10